@@ -0,0 +1,156 @@
+from typing import TYPE_CHECKING
+from typing import AsyncIterator
+from typing import Awaitable
+from typing import Callable
+from typing import Optional
+from typing import List
+from typing import Any
+import asyncio
+import json
+import time
+
+if TYPE_CHECKING:
+    from vertexai.generative_models import Part
+
+
+# Deterministic filler text, so prompt sizes are identical from run to run.
+LOREM = ("The subject is documented in several encyclopedic sources. It has a long recorded history. "
+         "Researchers have described it in detail, and many of its properties are well known. ")
+
+
+class FakeResponse:
+    """
+    Mimics the part of GenerationResponse the agent reads.
+    """
+
+    def __init__(self, text: str):
+        self.text = text
+
+
+class FakeGenerativeModel:
+    """
+    A deterministic stand-in for GenerativeModel that replays scripted responses.
+
+    Every prompt it receives is recorded, so callers can inspect prompt sizes per iteration.
+    """
+
+    def __init__(self, script: List[str], latency: float = 0.0, chunk_size: int = 64, cycle: bool = False):
+        """
+        Initializes the fake model.
+
+        Args:
+            script (List[str]): The responses to return, in order; the last one repeats once exhausted.
+            latency (float): The simulated response time in seconds.
+            chunk_size (int): The size of the chunks a streamed response is split into.
+            cycle (bool): Whether to start the script over once exhausted, so a long-lived agent
+                replays it on every run, instead of repeating the last response.
+        """
+        self._model_name = "fake-gemini"
+        self.script = script
+        self.latency = latency
+        self.chunk_size = chunk_size
+        self.cycle = cycle
+        self.calls = 0
+        self.prompts: List[str] = []
+
+    def _next(self, contents: List["Part"]) -> str:
+        self.prompts.append("".join(part.text for part in contents))
+        index = self.calls % len(self.script) if self.cycle else min(self.calls, len(self.script) - 1)
+        text = self.script[index]
+        self.calls += 1
+        return text
+
+    def generate_content(self, contents: List["Part"], **kwargs: Any) -> FakeResponse:
+        text = self._next(contents)
+        if self.latency:
+            time.sleep(self.latency)
+        return FakeResponse(text)
+
+    async def generate_content_async(self, contents: List["Part"], stream: bool = False, **kwargs: Any) -> Any:
+        text = self._next(contents)
+        if not stream:
+            if self.latency:
+                await asyncio.sleep(self.latency)
+            return FakeResponse(text)
+        return self._stream(text)
+
+    async def _stream(self, text: str) -> AsyncIterator[FakeResponse]:
+        chunks = [text[i:i + self.chunk_size] for i in range(0, len(text), self.chunk_size)]
+        for chunk in chunks:
+            if self.latency:
+                await asyncio.sleep(self.latency / len(chunks))
+            yield FakeResponse(chunk)
+
+
+def build_script(iterations: int, tools: Optional[List[str]] = None) -> List[str]:
+    """
+    Builds a model script that uses a tool on every iteration but the last, then answers.
+
+    Args:
+        iterations (int): The number of model calls in the run, including the final answer.
+        tools (Optional[List[str]]): The tool names to alternate between.
+
+    Returns:
+        List[str]: The scripted responses, fenced like Gemini's JSON output.
+    """
+    tools = tools or ["wikipedia", "google"]
+    script = []
+    for i in range(1, iterations):
+        response = {
+            "thought": f"Step {i}: I still need more information, so I will look up the next entity.",
+            "action": {
+                "name": tools[(i - 1) % len(tools)],
+                "reason": "It is the most direct source for this fact.",
+                "input": f"Entity {i}"
+            }
+        }
+        script.append(f"```json\n{json.dumps(response, indent=2)}\n```")
+    answer = {"thought": "I now have enough information to answer.", "answer": "The answer is 42."}
+    script.append(f"```json\n{json.dumps(answer, indent=2)}\n```")
+    return script
+
+
+def fake_wiki(latency: float = 0.0, summary_sentences: int = 12) -> Callable[[str], Awaitable[str]]:
+    """
+    Creates a fake Wikipedia tool returning a payload shaped like src.tools.wiki.search.
+
+    Args:
+        latency (float): The simulated lookup time in seconds.
+        summary_sentences (int): How many filler sentence groups the summary holds.
+
+    Returns:
+        Callable[[str], Awaitable[str]]: The async tool function.
+    """
+    async def search(query: str) -> str:
+        if latency:
+            await asyncio.sleep(latency)
+        result = {"query": query, "title": query, "summary": f"{query} is a topic. " + LOREM * summary_sentences}
+        return json.dumps(result, ensure_ascii=False, indent=2)
+    return search
+
+
+def fake_serp(latency: float = 0.0, results: int = 10) -> Callable[[str], Awaitable[str]]:
+    """
+    Creates a fake Google search tool returning a payload shaped like src.tools.serp.search.
+
+    Args:
+        latency (float): The simulated lookup time in seconds.
+        results (int): The number of organic results returned.
+
+    Returns:
+        Callable[[str], Awaitable[str]]: The async tool function.
+    """
+    async def search(query: str) -> str:
+        if latency:
+            await asyncio.sleep(latency)
+        top_results = [
+            {
+                "position": position,
+                "title": f"{query} - result {position}",
+                "link": f"https://example.com/{position}",
+                "snippet": f"{query} result {position}. " + LOREM
+            }
+            for position in range(1, results + 1)
+        ]
+        return json.dumps({"top_results": top_results}, indent=2)
+    return search
@@ -0,0 +1,213 @@
+from src.bench.fakes import FakeGenerativeModel
+from src.utils.ratelimit import RateLimiter
+from src.utils.ratelimit import set_limiter
+from src.react.trace import get_trace_sink
+from src.llm.tokens import estimate_tokens
+from src.react.trace import NullTraceSink
+from src.bench.fakes import build_script
+from src.bench.fakes import fake_wiki
+from src.bench.fakes import fake_serp
+from src.config.logging import logger
+from src.config.setup import config
+from src.react.agent import Agent
+from pydantic import BaseModel
+from typing import Optional
+from pydantic import Field
+from typing import Tuple
+from typing import Dict
+from typing import List
+import tracemalloc
+import statistics
+import argparse
+import logging
+import json
+import time
+import sys
+import gc
+
+
+BENCH_QUERY = "What is the age of the oldest tree in the country that has won the most FIFA World Cup titles?"
+
+
+class BenchResult(BaseModel):
+    """
+    Represents the measurements for one benchmark configuration.
+    """
+    iterations: int = Field(..., description="The number of model calls per run.")
+    repeats: int = Field(..., description="The number of timed runs.")
+    stream: bool = Field(..., description="Whether responses were streamed.")
+    latency_ms: Dict[str, float] = Field(..., description="End-to-end run latency: min, median, p95 and max.")
+    overhead_ms_per_iteration: float = Field(..., description="Median latency minus simulated waits, per iteration.")
+    prompt_chars: List[int] = Field(..., description="The prompt length sent on each iteration.")
+    prompt_tokens: List[int] = Field(..., description="The estimated prompt tokens sent on each iteration.")
+    peak_kib: float = Field(..., description="Peak traced memory during one run.")
+    retained_kib: float = Field(..., description="Traced memory still allocated after one run.")
+    allocations: int = Field(..., description="Memory blocks still allocated after one run.")
+
+
+def create_bench_agent(iterations: int, model_latency: float = 0.0, tool_latency: float = 0.0,
+                       stream: bool = False, trace: bool = False) -> Tuple[Agent, FakeGenerativeModel]:
+    """
+    Creates an agent backed by the fake model and fake tools, scripted to run a fixed number of iterations.
+
+    Args:
+        iterations (int): The number of model calls in a run, including the final answer.
+        model_latency (float): The simulated model response time in seconds.
+        tool_latency (float): The simulated tool lookup time in seconds.
+        stream (bool): Whether the agent streams responses.
+        trace (bool): Whether to emit to the configured trace sink instead of discarding events.
+
+    Returns:
+        Tuple[Agent, FakeGenerativeModel]: The agent and its model, whose recorded prompts can be inspected.
+    """
+    model = FakeGenerativeModel(build_script(iterations), latency=model_latency)
+    agent = Agent(model=model, sink=get_trace_sink() if trace else NullTraceSink(), stream=stream)
+    agent.register("wikipedia", fake_wiki(tool_latency))
+    agent.register("google", fake_serp(tool_latency))
+    agent.max_iterations = iterations
+    return agent, model
+
+
+def _percentile(samples: List[float], percent: float) -> float:
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, max(0, round(percent / 100 * len(ordered)) - 1))
+    return ordered[index]
+
+
+def _run(agent: Agent, model: FakeGenerativeModel) -> float:
+    """
+    Runs the benchmark query once from a fresh script position and returns its latency in seconds.
+    """
+    model.calls = 0
+    model.prompts = []
+    started = time.perf_counter()
+    agent.execute(BENCH_QUERY)
+    return time.perf_counter() - started
+
+
+def benchmark(iterations: int, repeats: int = 20, warmup: int = 2, model_latency: float = 0.0,
+              tool_latency: float = 0.0, stream: bool = False, trace: bool = False) -> BenchResult:
+    """
+    Measures the agent loop for one iteration count.
+
+    The on-disk response cache and the Gemini rate limit are bypassed for the duration, so every
+    run exercises the full loop at full speed.
+
+    Args:
+        iterations (int): The number of model calls per run, including the final answer.
+        repeats (int): The number of timed runs.
+        warmup (int): The number of untimed runs before measuring.
+        model_latency (float): The simulated model response time in seconds.
+        tool_latency (float): The simulated tool lookup time in seconds.
+        stream (bool): Whether the agent streams responses.
+        trace (bool): Whether to emit to the configured trace sink.
+
+    Returns:
+        BenchResult: The latency, overhead, prompt size and allocation measurements.
+    """
+    cache_enabled = config.LLM_CACHE.get('enabled', False)
+    config.LLM_CACHE['enabled'] = False
+    limiter = set_limiter("gemini", RateLimiter("gemini"))
+    try:
+        agent, model = create_bench_agent(iterations, model_latency, tool_latency, stream, trace)
+        for _ in range(warmup):
+            _run(agent, model)
+
+        samples = [_run(agent, model) for _ in range(repeats)]
+        prompts = list(model.prompts)
+
+        gc.collect()
+        tracemalloc.start()
+        try:
+            _run(agent, model)
+            retained, peak = tracemalloc.get_traced_memory()
+            allocations = sum(stat.count for stat in tracemalloc.take_snapshot().statistics("filename"))
+        finally:
+            tracemalloc.stop()
+    finally:
+        config.LLM_CACHE['enabled'] = cache_enabled
+        set_limiter("gemini", limiter)
+
+    median = statistics.median(samples)
+    waited = iterations * model_latency + (iterations - 1) * tool_latency
+    return BenchResult(
+        iterations=iterations,
+        repeats=repeats,
+        stream=stream,
+        latency_ms={
+            "min": min(samples) * 1000,
+            "median": median * 1000,
+            "p95": _percentile(samples, 95) * 1000,
+            "max": max(samples) * 1000
+        },
+        overhead_ms_per_iteration=max(median - waited, 0.0) * 1000 / iterations,
+        prompt_chars=[len(prompt) for prompt in prompts],
+        prompt_tokens=[estimate_tokens(prompt) for prompt in prompts],
+        peak_kib=peak / 1024,
+        retained_kib=retained / 1024,
+        allocations=allocations
+    )
+
+
+def format_report(results: List[BenchResult]) -> str:
+    """
+    Formats benchmark results as a fixed-width table.
+
+    Args:
+        results (List[BenchResult]): The results to format.
+
+    Returns:
+        str: The table text.
+    """
+    header = (f"{'iters':>5} {'median ms':>10} {'p95 ms':>9} {'ovh ms/it':>10} {'first prompt':>13} "
+              f"{'last prompt':>12} {'last tok':>9} {'peak KiB':>9} {'kept KiB':>9} {'blocks':>7}")
+    lines = [header, "-" * len(header)]
+    for result in results:
+        lines.append(
+            f"{result.iterations:>5} {result.latency_ms['median']:>10.2f} {result.latency_ms['p95']:>9.2f} "
+            f"{result.overhead_ms_per_iteration:>10.3f} {result.prompt_chars[0]:>13} {result.prompt_chars[-1]:>12} "
+            f"{result.prompt_tokens[-1]:>9} {result.peak_kib:>9.1f} {result.retained_kib:>9.1f} {result.allocations:>7}"
+        )
+    return "\n".join(lines)
+
+
+def main() -> None:
+    """
+    Command-line entry point for the offline loop benchmark.
+    """
+    parser = argparse.ArgumentParser(description="Benchmark the ReAct loop against a fake model and fake tools.")
+    parser.add_argument("--iterations", type=int, nargs="+", default=[1, 2, 4, 8], help="Iteration counts to measure.")
+    parser.add_argument("--repeats", type=int, default=20, help="Timed runs per iteration count.")
+    parser.add_argument("--warmup", type=int, default=2, help="Untimed runs before measuring.")
+    parser.add_argument("--model-latency", type=float, default=0.0, help="Simulated model latency in seconds.")
+    parser.add_argument("--tool-latency", type=float, default=0.0, help="Simulated tool latency in seconds.")
+    parser.add_argument("--stream", action="store_true", help="Stream responses and dispatch tool calls early.")
+    parser.add_argument("--trace", action="store_true", help="Write traces to the configured sink.")
+    parser.add_argument("--output", default=None, help="Also write the results to this JSON file.")
+    parser.add_argument("--max-overhead-ms", type=float, default=None,
+                        help="Exit with status 1 if any per-iteration overhead exceeds this.")
+    parser.add_argument("--verbose", action="store_true", help="Keep INFO logging, which is part of the overhead.")
+    args = parser.parse_args()
+
+    if not args.verbose:
+        logger.setLevel(logging.WARNING)
+
+    results: List[BenchResult] = []
+    for iterations in args.iterations:
+        results.append(benchmark(iterations, repeats=args.repeats, warmup=args.warmup,
+                                 model_latency=args.model_latency, tool_latency=args.tool_latency,
+                                 stream=args.stream, trace=args.trace))
+    print(format_report(results))
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as file:
+            json.dump([result.model_dump() for result in results], file, indent=2)
+
+    worst: Optional[float] = max(result.overhead_ms_per_iteration for result in results) if results else None
+    if args.max_overhead_ms is not None and worst is not None and worst > args.max_overhead_ms:
+        logger.error("Per-iteration overhead %.3f ms exceeds the limit of %s ms", worst, args.max_overhead_ms)
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,151 @@
+from pydantic import BaseModel
+from typing import Optional
+from pydantic import Field
+from typing import Tuple
+from typing import Dict
+from typing import List
+import subprocess
+import statistics
+import argparse
+import json
+import time
+import sys
+import os
+
+
+# What a cold invocation pays before it can do any work, from bare import to a fully warmed process.
+SCENARIOS: Dict[str, str] = {
+    "interpreter": "pass",
+    "import": "import src.react.agent",
+    "init": "import src.react.agent; from src.config.setup import init; init()",
+    "warm": "import src.react.agent; from src.config.setup import init; init(warm=True)"
+}
+
+ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+class StartupResult(BaseModel):
+    """
+    Represents the cold-start measurements for one scenario.
+    """
+    scenario: str = Field(..., description="The scenario name.")
+    runs: int = Field(..., description="The number of fresh interpreters measured.")
+    wall_ms: Dict[str, float] = Field(..., description="Process wall time: min, median and max.")
+    over_interpreter_ms: float = Field(..., description="Median wall time minus the bare interpreter's.")
+    slowest: List[Tuple[str, float]] = Field(default_factory=list,
+                                             description="The packages with the largest import time, in ms.")
+
+
+def _slowest_imports(stderr: str, top: int) -> List[Tuple[str, float]]:
+    """
+    Parses `-X importtime` output into the top-level packages that took longest to import,
+    summing the self time of each package's modules.
+    """
+    totals: Dict[str, float] = {}
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        own, _, name = line[len("import time:"):].split("|")
+        if own.strip().isdigit():
+            package = name.strip().split(".")[0]
+            totals[package] = totals.get(package, 0.0) + int(own) / 1000
+    return sorted(totals.items(), key=lambda item: item[1], reverse=True)[:top]
+
+
+def _run(statement: str) -> Tuple[float, str]:
+    """
+    Runs a statement in a fresh interpreter and returns its wall time in seconds and its import trace.
+    """
+    started = time.perf_counter()
+    completed = subprocess.run([sys.executable, "-X", "importtime", "-c", statement], cwd=ROOT,
+                               capture_output=True, text=True)
+    elapsed = time.perf_counter() - started
+    if completed.returncode != 0:
+        raise RuntimeError(f"Startup scenario failed: {statement}\n{completed.stderr[-2000:]}")
+    return elapsed, completed.stderr
+
+
+def measure(scenarios: List[str], runs: int = 10, top: int = 5) -> List[StartupResult]:
+    """
+    Measures the cold start of each scenario in fresh interpreters.
+
+    Args:
+        scenarios (List[str]): The scenario names, from SCENARIOS.
+        runs (int): The number of interpreters started per scenario.
+        top (int): The number of slowest packages to report.
+
+    Returns:
+        List[StartupResult]: The measurements, in the order given.
+    """
+    baseline = statistics.median(_run(SCENARIOS["interpreter"])[0] for _ in range(runs))
+    results: List[StartupResult] = []
+    for scenario in scenarios:
+        samples: List[float] = []
+        stderr = ""
+        for _ in range(runs):
+            elapsed, stderr = _run(SCENARIOS[scenario])
+            samples.append(elapsed)
+        median = statistics.median(samples)
+        results.append(StartupResult(
+            scenario=scenario,
+            runs=runs,
+            wall_ms={"min": min(samples) * 1000, "median": median * 1000, "max": max(samples) * 1000},
+            over_interpreter_ms=max(median - baseline, 0.0) * 1000,
+            slowest=_slowest_imports(stderr, top)
+        ))
+    return results
+
+
+def format_report(results: List[StartupResult]) -> str:
+    """
+    Formats startup results as a fixed-width table, followed by each scenario's slowest packages.
+
+    Args:
+        results (List[StartupResult]): The results to format.
+
+    Returns:
+        str: The report text.
+    """
+    header = f"{'scenario':<12} {'median ms':>10} {'min ms':>8} {'max ms':>8} {'over python':>12}"
+    lines = [header, "-" * len(header)]
+    for result in results:
+        lines.append(f"{result.scenario:<12} {result.wall_ms['median']:>10.1f} {result.wall_ms['min']:>8.1f} "
+                     f"{result.wall_ms['max']:>8.1f} {result.over_interpreter_ms:>12.1f}")
+    for result in results:
+        if result.slowest:
+            lines.append("")
+            lines.append(f"Slowest packages ({result.scenario}):")
+            lines.extend(f"  {name:<40} {ms:>8.1f} ms" for name, ms in result.slowest)
+    return "\n".join(lines)
+
+
+def main() -> None:
+    """
+    Command-line entry point for the cold-start benchmark.
+    """
+    parser = argparse.ArgumentParser(description="Measure how long a fresh process takes to import and initialize the agent.")
+    parser.add_argument("--scenarios", nargs="+", choices=[name for name in SCENARIOS if name != "interpreter"],
+                        default=["import", "init", "warm"], help="Scenarios to measure.")
+    parser.add_argument("--runs", type=int, default=10, help="Fresh interpreters per scenario.")
+    parser.add_argument("--top", type=int, default=5, help="Slowest packages to list per scenario.")
+    parser.add_argument("--output", default=None, help="Also write the results to this JSON file.")
+    parser.add_argument("--max-import-ms", type=float, default=None,
+                        help="Exit with status 1 if importing the agent takes longer than this over a bare interpreter.")
+    args = parser.parse_args()
+
+    results = measure(args.scenarios, runs=args.runs, top=args.top)
+    print(format_report(results))
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as file:
+            json.dump([result.model_dump() for result in results], file, indent=2)
+
+    imported: Optional[StartupResult] = next((result for result in results if result.scenario == "import"), None)
+    if args.max_import_ms is not None and imported is not None and imported.over_interpreter_ms > args.max_import_ms:
+        print(f"Import takes {imported.over_interpreter_ms:.1f} ms over a bare interpreter, "
+              f"exceeding the limit of {args.max_import_ms} ms", file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
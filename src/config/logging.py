@@ -1,4 +1,8 @@
+import logging.handlers
+import threading
 import logging
+import atexit
+import queue
 import os
 
 
@@ -19,7 +23,44 @@ class CustomLogRecord(logging.LogRecord):
         self.pathname = custom_path_filter(self.pathname)
 
 
-def setup_logger(log_filename="app.log", log_dir="logs"):
+LOG_FORMAT = "%(asctime)s [%(levelname)s] [%(module)s] [%(pathname)s]: %(message)s"
+
+# Payloads logged through Truncated are cut to this many characters unless set otherwise.
+MAX_PAYLOAD_CHARS = 2000
+
+_listener = None
+
+
+def _stop_listener():
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+
+
+class DeferredQueueHandler(logging.handlers.QueueHandler):
+    """
+    Puts records on the queue unformatted, so message interpolation (including Truncated payloads)
+    runs on the listener thread rather than in the caller.
+
+    The stock QueueHandler formats each record before queuing it so it can be pickled; the
+    queue here never leaves the process. Arguments are therefore formatted after the call
+    returns and should not be mutated afterwards.
+    """
+
+    def prepare(self, record):
+        return record
+
+
+def setup_logger(log_filename="app.log", log_dir="logs", level=logging.INFO, use_queue=True):
+    """
+    Configures the root logger to write to the console and a log file.
+
+    With use_queue, callers only put unformatted records on an in-memory queue and a background
+    thread does the message formatting and I/O, so concurrent agents never wait on a handler's
+    lock or a slow terminal.
+    Calling it again replaces the previous configuration.
+    """
     # Ensure the logging directory exists
     if not os.path.exists(log_dir):
         os.makedirs(log_dir)
@@ -27,18 +68,101 @@ def setup_logger(log_filename="app.log", log_dir="logs"):
     # Define the log file path
     log_filepath = os.path.join(log_dir, log_filename)
 
-    # Define the logging configuration
+    formatter = logging.Formatter(LOG_FORMAT)
+    handlers = [logging.StreamHandler(), logging.FileHandler(log_filepath)]
+    for handler in handlers:
+        handler.setFormatter(formatter)
+
     logging.setLogRecordFactory(CustomLogRecord)
-    logging.basicConfig(
-        level=logging.INFO,
-        format="%(asctime)s [%(levelname)s] [%(module)s] [%(pathname)s]: %(message)s",
-        handlers=[
-            logging.StreamHandler(),
-            logging.FileHandler(log_filepath)
-        ]
-    )
+    root = logging.getLogger()
+    _stop_listener()
+    for handler in list(root.handlers):
+        root.removeHandler(handler)
+        handler.close()
+    root.setLevel(level)
+
+    if use_queue:
+        global _listener
+        records = queue.SimpleQueue()
+        _listener = logging.handlers.QueueListener(records, *handlers, respect_handler_level=True)
+        _listener.start()
+        root.addHandler(DeferredQueueHandler(records))
+    else:
+        for handler in handlers:
+            root.addHandler(handler)
 
     # Return the configured logger
-    return logging.getLogger()
+    return root
+
+
+def configure_logging(settings):
+    """
+    Applies the logging section of the configuration: level, queue, log_dir, log_file and max_payload_chars.
+    """
+    global _logger, MAX_PAYLOAD_CHARS
+    MAX_PAYLOAD_CHARS = settings.get('max_payload_chars', MAX_PAYLOAD_CHARS)
+    with _logger_lock:
+        _logger = setup_logger(
+            log_filename=settings.get('log_file', "app.log"),
+            log_dir=settings.get('log_dir', "logs"),
+            level=logging.getLevelName(str(settings.get('level', "INFO")).upper()),
+            use_queue=settings.get('queue', True)
+        )
+    return _logger
+
+
+class Truncated:
+    """
+    Wraps a large payload (a model response, a tool result) passed as a logging argument.
+
+    The text is only converted and cut to max_chars if the record is actually emitted, so
+    payloads logged at a disabled level cost nothing beyond creating the wrapper.
+    """
+    __slots__ = ("value", "max_chars")
+
+    def __init__(self, value, max_chars=None):
+        self.value = value
+        self.max_chars = max_chars
+
+    def __str__(self):
+        text = str(self.value)
+        limit = self.max_chars if self.max_chars is not None else MAX_PAYLOAD_CHARS
+        if len(text) <= limit:
+            return text
+        return f"{text[:limit]}... [{len(text) - limit} more chars]"
+
+
+_logger = None
+_logger_lock = threading.Lock()
+
+# Flush records still on the queue when the process exits.
+atexit.register(_stop_listener)
+
+
+def get_logger(log_filename="app.log", log_dir="logs"):
+    """
+    Returns the application logger, configuring handlers (and creating the log directory) on first use.
+    """
+    global _logger
+    if _logger is None:
+        with _logger_lock:
+            if _logger is None:
+                _logger = setup_logger(log_filename, log_dir)
+    return _logger
+
+
+class LazyLogger:
+    """
+    Stands in for the application logger until it is first used, so importing a module
+    creates no log directory or file handler.
+    """
+    def __getattr__(self, name):
+        # Methods are cached on the proxy, so later calls cost a plain attribute lookup;
+        # data attributes such as level are always read from the logger.
+        value = getattr(get_logger(), name)
+        if callable(value):
+            setattr(self, name, value)
+        return value
+
 
-logger = setup_logger()
\ No newline at end of file
+logger = LazyLogger()
\ No newline at end of file
@@ -1,7 +1,10 @@
+from src.config.logging import configure_logging
 from src.config.logging import logger
+from typing import Optional
 from typing import Dict
 from typing import Any
-import yaml
+import threading
+import importlib
 import os
 
 
@@ -32,6 +35,23 @@ class Config:
         self.CREDENTIALS_PATH = self.__config['credentials_json']
         self._set_google_credentials(self.CREDENTIALS_PATH)
         self.MODEL_NAME = self.__config['model_name']
+        self.STRUCTURED_OUTPUT = self.__config.get('structured_output', False)
+        self.LLM_CACHE = self.__config.get('llm_cache', {})
+        self.TOOL_CACHE = self.__config.get('tool_cache', {})
+        self.HTTP = self.__config.get('http', {})
+        self.TRACE = self.__config.get('trace', {})
+        self.HISTORY = self.__config.get('history', {})
+        self.OBSERVATION = self.__config.get('observation', {})
+        self.PREFETCH = self.__config.get('prefetch', {})
+        self.EVIDENCE = self.__config.get('evidence', {})
+        self.METRICS = self.__config.get('metrics', {})
+        self.BUDGET = self.__config.get('budget', {})
+        self.RESILIENCE = self.__config.get('resilience', {})
+        self.RATE_LIMIT = self.__config.get('rate_limit', {})
+        self.TOOLS = self.__config.get('tools', {})
+        self.LOGGING = self.__config.get('logging', {})
+        self.SERVER = self.__config.get('server', {})
+        self.WIKIPEDIA = self.__config.get('wikipedia', {})
 
     @staticmethod
     def _load_config(config_path: str) -> Dict[str, Any]:
@@ -44,11 +64,13 @@ class Config:
         Returns:
         - dict: Loaded configuration data.
         """
+        import yaml
+
         try:
             with open(config_path, 'r') as file:
                 return yaml.safe_load(file)
         except Exception as e:
-            logger.error(f"Failed to load the configuration file. Error: {e}")
+            logger.error("Failed to load the configuration file. Error: %s", e)
 
     @staticmethod
     def _set_google_credentials(credentials_path: str) -> None:
@@ -61,4 +83,65 @@ class Config:
         os.environ['GOOGLE_APPLICATION_CREDENTIALS'] = credentials_path
 
 
-config = Config()
\ No newline at end of file
+DEFAULT_CONFIG_PATH = "./config/config.yml"
+
+# Heavy modules that are otherwise imported on the first model or tool call.
+WARM_MODULES = ("vertexai.generative_models", "requests", "wikipediaapi", "src.tools.serp", "src.tools.wiki")
+
+_config: Optional[Config] = None
+_config_lock = threading.Lock()
+
+
+def get_config(config_path: str = DEFAULT_CONFIG_PATH) -> Config:
+    """
+    Returns the configuration singleton, reading the YAML file and setting credentials on first use.
+
+    Args:
+        config_path (str): Path to the YAML configuration file; only used by the first call.
+
+    Returns:
+        Config: The loaded configuration.
+    """
+    global _config
+    if _config is None:
+        with _config_lock:
+            if _config is None:
+                _config = Config(config_path)
+    return _config
+
+
+class LazyConfig:
+    """
+    Stands in for the configuration until an attribute is first read, so importing a module
+    reads no files and sets no environment variables.
+    """
+    def __getattr__(self, name: str) -> Any:
+        # Only called for names not yet cached on the proxy, so later reads cost a plain attribute lookup.
+        value = getattr(get_config(), name)
+        setattr(self, name, value)
+        return value
+
+
+def init(config_path: str = DEFAULT_CONFIG_PATH, warm: bool = False) -> Config:
+    """
+    Loads the configuration and sets up logging from its logging section, up front instead of on first use.
+
+    Long-running processes (servers, batch runs) can call this at startup to pay every
+    initialization cost before the first request; short-lived invocations can skip it.
+
+    Args:
+        config_path (str): Path to the YAML configuration file.
+        warm (bool): Whether to also import the Gemini SDK and tool modules now.
+
+    Returns:
+        Config: The loaded configuration.
+    """
+    loaded = get_config(config_path)
+    configure_logging(loaded.LOGGING)
+    if warm:
+        for module in WARM_MODULES:
+            importlib.import_module(module)
+    return loaded
+
+
+config = LazyConfig()
\ No newline at end of file
@@ -1,36 +1,77 @@
-from vertexai.generative_models import HarmBlockThreshold
-from vertexai.generative_models import GenerationConfig
-from vertexai.generative_models import GenerativeModel
-from vertexai.generative_models import HarmCategory
-from vertexai.generative_models import Part
+from src.llm.tokens import usage_from_response
+from src.utils.resilience import get_upstream
+from src.utils.ratelimit import get_limiter
+from src.llm.tokens import estimate_tokens
+from src.utils.cache import SQLiteCache
+from src.utils.aio import run_in_thread
 from src.config.logging import logger
+from src.utils.cache import make_key
+from src.config.setup import config
+from src.llm.tokens import Usage
+from typing import TYPE_CHECKING
+from typing import AsyncIterator
 from typing import Optional
+from typing import Callable
 from typing import Dict
 from typing import List 
+from typing import Any
+import functools
+import threading
+import json
 
+if TYPE_CHECKING:
+    from vertexai.generative_models import GenerationResponse
+    from vertexai.generative_models import GenerationConfig
+    from vertexai.generative_models import GenerativeModel
+    from vertexai.generative_models import Part
 
-def _create_generation_config() -> GenerationConfig:
+
+# Receives the token usage of each call; cache hits report zero tokens.
+UsageCallback = Callable[[Usage], None]
+
+
+class StreamInterruptedError(Exception):
     """
-    Creates and returns a generation configuration.
+    Raised when a response stream fails after it was opened, so the text received so far is incomplete.
+    """
+
+
+@functools.lru_cache(maxsize=None)
+def _create_generation_config(schema: Optional[str] = None) -> "GenerationConfig":
+    """
+    Creates and returns a generation configuration, built once per response schema and reused for every call.
+
+    Args:
+        schema (Optional[str]): The JSON-encoded response schema, to request schema-constrained JSON output.
     """
+    from vertexai.generative_models import GenerationConfig
+
     try:
+        structured: Dict[str, Any] = {}
+        if schema is not None:
+            structured = {"response_mime_type": "application/json", "response_schema": json.loads(schema)}
         gen_config = GenerationConfig(
             temperature=0.0,
             top_p=1.0,
             candidate_count=1,
             max_output_tokens=8192,
-            seed=12345
+            seed=12345,
+            **structured
         )
         return gen_config
     except Exception as e:
-        logger.error(f"Error creating generation configuration: {e}")
+        logger.error("Error creating generation configuration: %s", e)
         raise
 
 
-def _create_safety_settings() -> Dict[HarmCategory, HarmBlockThreshold]:
+@functools.lru_cache(maxsize=None)
+def _create_safety_settings() -> Dict[Any, Any]:
     """
-    Creates safety settings for content generation.
+    Creates safety settings for content generation, built once and reused for every call.
     """
+    from vertexai.generative_models import HarmBlockThreshold
+    from vertexai.generative_models import HarmCategory
+
     try:
         safety_settings = {
             HarmCategory.HARM_CATEGORY_UNSPECIFIED: HarmBlockThreshold.BLOCK_NONE,
@@ -41,35 +82,351 @@ def _create_safety_settings() -> Dict[HarmCategory, HarmBlockThreshold]:
         }
         return safety_settings
     except Exception as e:
-        logger.error(f"Error creating safety settings: {e}")
+        logger.error("Error creating safety settings: %s", e)
         raise
 
 
-def generate(model: GenerativeModel, contents: List[Part]) -> Optional[str]:
+_response_cache: Optional[SQLiteCache] = None
+_response_cache_lock = threading.Lock()
+
+
+def get_response_cache() -> Optional[SQLiteCache]:
+    """
+    Returns the shared on-disk response cache, creating it on first use.
+
+    Returns:
+        Optional[SQLiteCache]: The response cache, or None if caching is disabled in the configuration.
+    """
+    global _response_cache
+    settings = config.LLM_CACHE
+    if not settings.get('enabled', False):
+        return None
+    if _response_cache is None:
+        with _response_cache_lock:
+            if _response_cache is None:
+                _response_cache = SQLiteCache(
+                    path=settings.get('path', './data/cache/llm.sqlite'),
+                    max_entries=settings.get('max_entries', 10000),
+                    ttl_seconds=settings.get('ttl_seconds')
+                )
+    return _response_cache
+
+
+@functools.lru_cache(maxsize=None)
+def _generation_config_dict(schema: Optional[str] = None) -> Dict[str, Any]:
+    """
+    Returns the generation configuration as a dictionary, for use in cache keys.
+    """
+    return _create_generation_config(schema).to_dict()
+
+
+def _schema_key(response_schema: Optional[Dict[str, Any]]) -> Optional[str]:
+    """
+    Encodes a response schema canonically, so it can key the cached generation configurations.
+    """
+    return json.dumps(response_schema, sort_keys=True) if response_schema is not None else None
+
+
+def _cache_key(model: "GenerativeModel", contents: List["Part"], schema: Optional[str] = None) -> str:
+    """
+    Builds the cache key for a request from the model name, generation config and rendered prompt.
+
+    Args:
+        model (GenerativeModel): The generative model instance.
+        contents (List["Part"]): The list of content parts.
+        schema (Optional[str]): The JSON-encoded response schema, if structured output is requested.
+
+    Returns:
+        str: The cache key.
+    """
+    model_name = getattr(model, '_model_name', type(model).__name__)
+    rendered: List[Any] = [part.to_dict() if hasattr(part, 'to_dict') else str(part) for part in contents]
+    return make_key(model_name, _generation_config_dict(schema), rendered)
+
+
+def text_contents(prompt: str) -> List["Part"]:
+    """
+    Wraps a prompt as the content parts of a request.
+
+    Args:
+        prompt (str): The prompt text.
+
+    Returns:
+        List[Part]: A single text part.
+    """
+    from vertexai.generative_models import Part
+
+    return [Part.from_text(prompt)]
+
+
+def _prompt_text(contents: List["Part"]) -> str:
+    """
+    Joins the text of the content parts, for local token estimates.
+    """
+    texts = []
+    for part in contents:
+        try:
+            texts.append(part.text)
+        except (AttributeError, ValueError):
+            continue
+    return "".join(texts)
+
+
+def _report_usage(on_usage: Optional[UsageCallback], response: Any, contents: List["Part"], text: str) -> None:
+    """
+    Charges a completed call's output tokens to the rate limiter and passes its usage to the caller's callback, if any.
+    """
+    usage = usage_from_response(response, _prompt_text(contents), text)
+    # The prompt was charged up front; output tokens are only known now.
+    get_limiter("gemini").debit(usage.output_tokens)
+    if on_usage is not None:
+        on_usage(usage)
+
+
+async def _report_usage_async(on_usage: Optional[UsageCallback], response: Any, contents: List["Part"],
+                              text: str) -> None:
+    """
+    Like _report_usage, but charges the rate limiter without blocking the event loop.
+    """
+    usage = usage_from_response(response, _prompt_text(contents), text)
+    await get_limiter("gemini").debit_async(usage.output_tokens)
+    if on_usage is not None:
+        on_usage(usage)
+
+
+def _call(model: "GenerativeModel", contents: List["Part"], schema: Optional[str] = None) -> "GenerationResponse":
+    """
+    Makes one Gemini call, paced by the shared rate limiter and retried on transient failures.
+
+    Args:
+        model (GenerativeModel): The generative model instance.
+        contents (List["Part"]): The list of content parts.
+        schema (Optional[str]): The JSON-encoded response schema, if structured output is requested.
+
+    Returns:
+        GenerationResponse: The model's response.
+    """
+    limiter = get_limiter("gemini")
+    prompt_tokens = estimate_tokens(_prompt_text(contents))
+
+    def attempt() -> "GenerationResponse":
+        # Every attempt, including retries, waits for its turn against the QPS and TPM quotas.
+        limiter.acquire(prompt_tokens)
+        return model.generate_content(
+            contents,
+            generation_config=_create_generation_config(schema),
+            safety_settings=_create_safety_settings()
+        )
+
+    # A failing backend trips the circuit breaker shared by every agent in the process.
+    return get_upstream("gemini").call(attempt)
+
+
+async def _call_async(model: "GenerativeModel", contents: List["Part"], schema: Optional[str] = None,
+                      stream: bool = False) -> Any:
+    """
+    Makes one async Gemini call, paced by the shared rate limiter and retried on transient failures.
+
+    Args:
+        model (GenerativeModel): The generative model instance.
+        contents (List["Part"]): The list of content parts.
+        schema (Optional[str]): The JSON-encoded response schema, if structured output is requested.
+        stream (bool): Whether to open a response stream; only opening it is retried.
+
+    Returns:
+        Any: The GenerationResponse, or an async iterator of partial responses when streaming.
+    """
+    limiter = get_limiter("gemini")
+    prompt_tokens = estimate_tokens(_prompt_text(contents))
+
+    async def attempt() -> Any:
+        await limiter.acquire_async(prompt_tokens)
+        kwargs = {"stream": True} if stream else {}
+        return await model.generate_content_async(
+            contents,
+            generation_config=_create_generation_config(schema),
+            safety_settings=_create_safety_settings(),
+            **kwargs
+        )
+
+    return await get_upstream("gemini").call_async(attempt)
+
+
+def _extract_text(response: "GenerationResponse") -> Optional[str]:
+    """
+    Extracts the text from a model response, logging empty responses.
+
+    Args:
+        response (GenerationResponse): The response returned by the model.
+
+    Returns:
+        Optional[str]: The response text, or None if the response is empty.
+    """
+    if not response.text:
+        logger.error("Empty response from the model")
+        return None
+
+    logger.info("Successfully generated response")
+    return response.text
+
+
+def generate(model: "GenerativeModel", contents: List["Part"],
+             on_usage: Optional[UsageCallback] = None,
+             response_schema: Optional[Dict[str, Any]] = None) -> Optional[str]:
     """
     Generates a response using the provided model and contents.
     
     Args:
         model (GenerativeModel): The generative model instance.
-        contents (List[Part]): The list of content parts.
+        contents (List["Part"]): The list of content parts.
+        on_usage (Optional[UsageCallback]): Called with the token usage of the call.
+        response_schema (Optional[Dict[str, Any]]): If set, the model is asked for JSON output matching this schema.
     
     Returns:
         Optional[str]: The generated response text, or None if an error occurs.
     """
+    schema = _schema_key(response_schema)
+    cache = get_response_cache()
+    key = _cache_key(model, contents, schema) if cache is not None else None
+    if cache is not None:
+        cached = cache.get(key)
+        if cached is not None:
+            logger.info("Serving response from cache")
+            if on_usage is not None:
+                on_usage(Usage(cached=True))
+            return cached
+
     try:
         logger.info("Generating response from Gemini")
-        response = model.generate_content(
-            contents,
-            generation_config=_create_generation_config(),
-            safety_settings=_create_safety_settings()
-        )
+        response = _call(model, contents, schema)
+        text = _extract_text(response)
+    except Exception as e:
+        logger.error("Error generating response: %s", e)
+        return None
+
+    _report_usage(on_usage, response, contents, text or "")
+    if cache is not None and text is not None:
+        cache.set(key, text)
+    return text
+
+
+async def generate_async(model: "GenerativeModel", contents: List["Part"],
+                         on_usage: Optional[UsageCallback] = None,
+                         response_schema: Optional[Dict[str, Any]] = None) -> Optional[str]:
+    """
+    Generates a response without blocking the event loop while waiting on Gemini.
 
-        if not response.text:
-            logger.error("Empty response from the model")
-            return None
+    Args:
+        model (GenerativeModel): The generative model instance.
+        contents (List["Part"]): The list of content parts.
+        on_usage (Optional[UsageCallback]): Called with the token usage of the call.
+        response_schema (Optional[Dict[str, Any]]): If set, the model is asked for JSON output matching this schema.
+
+    Returns:
+        Optional[str]: The generated response text, or None if an error occurs.
+    """
+    schema = _schema_key(response_schema)
+    cache = get_response_cache()
+    key = _cache_key(model, contents, schema) if cache is not None else None
+    if cache is not None:
+        # SQLite reads and writes run on the shared I/O pool, off the event loop.
+        cached = await run_in_thread(cache.get, key)
+        if cached is not None:
+            logger.info("Serving response from cache")
+            if on_usage is not None:
+                on_usage(Usage(cached=True))
+            return cached
+
+    try:
+        logger.info("Generating response from Gemini (async)")
+        response = await _call_async(model, contents, schema)
+        text = _extract_text(response)
+    except Exception as e:
+        logger.error("Error generating response: %s", e)
+        return None
+
+    await _report_usage_async(on_usage, response, contents, text or "")
+    if cache is not None and text is not None:
+        await run_in_thread(cache.set, key, text)
+    return text
+
+
+def _chunk_text(chunk: "GenerationResponse") -> str:
+    """
+    Returns the text of a streamed chunk; chunks carrying only metadata have none.
+
+    Args:
+        chunk (GenerationResponse): A streamed partial response.
+
+    Returns:
+        str: The chunk's text, or an empty string.
+    """
+    try:
+        return chunk.text
+    except (ValueError, IndexError, AttributeError):
+        return ""
+
+
+async def generate_stream_async(model: "GenerativeModel", contents: List["Part"],
+                                on_usage: Optional[UsageCallback] = None,
+                                response_schema: Optional[Dict[str, Any]] = None) -> AsyncIterator[str]:
+    """
+    Streams a response from Gemini, yielding text chunks as they are generated.
+
+    A cached response is yielded as a single chunk; a fully streamed response is cached.
+    Usage is reported once the stream completes, from the final chunk's metadata, or estimated
+    from the text received if the stream fails partway.
+
+    Args:
+        model (GenerativeModel): The generative model instance.
+        contents (List["Part"]): The list of content parts.
+        on_usage (Optional[UsageCallback]): Called with the token usage of the call.
+        response_schema (Optional[Dict[str, Any]]): If set, the model is asked for JSON output matching this schema.
 
-        logger.info("Successfully generated response")
-        return response.text
+    Yields:
+        str: The response text, chunk by chunk. Nothing is yielded if the request fails up front.
+
+    Raises:
+        StreamInterruptedError: If the stream fails after it was opened; the chunks already
+            yielded are not a complete response.
+    """
+    schema = _schema_key(response_schema)
+    cache = get_response_cache()
+    key = _cache_key(model, contents, schema) if cache is not None else None
+    if cache is not None:
+        cached = await run_in_thread(cache.get, key)
+        if cached is not None:
+            logger.info("Serving response from cache")
+            if on_usage is not None:
+                on_usage(Usage(cached=True))
+            yield cached
+            return
+
+    try:
+        logger.info("Streaming response from Gemini")
+        # Only opening the stream is retried; text already yielded cannot be taken back.
+        stream = await _call_async(model, contents, schema, stream=True)
     except Exception as e:
-        logger.error(f"Error generating response: {e}")
-        return None
\ No newline at end of file
+        logger.error("Error streaming response: %s", e)
+        return
+
+    chunks: List[str] = []
+    last: Any = None
+    try:
+        async for chunk in stream:
+            last = chunk
+            text = _chunk_text(chunk)
+            if text:
+                chunks.append(text)
+                yield text
+    except Exception as e:
+        logger.error("Response stream failed after %d chunks: %s", len(chunks), e)
+        # The prompt was sent and part of the output generated, so the budget is charged an estimate.
+        await _report_usage_async(on_usage, None, contents, "".join(chunks))
+        raise StreamInterruptedError(str(e)) from e
+
+    await _report_usage_async(on_usage, last, contents, "".join(chunks))
+    if not chunks:
+        logger.error("Empty response from the model")
+    elif cache is not None:
+        await run_in_thread(cache.set, key, "".join(chunks))
@@ -0,0 +1,194 @@
+from typing import Sequence
+from typing import Optional
+from typing import Tuple
+from typing import Dict
+from typing import List
+from typing import Any
+import functools
+import json
+import ast
+import re
+
+
+FENCE = re.compile(r"```(?:json|JSON)?\s*(.*?)(?:```|$)", re.DOTALL)
+TRAILING_COMMA = re.compile(r",(\s*[}\]])")
+SMART_QUOTES = str.maketrans({"“": '"', "”": '"', "‘": "'", "’": "'"})
+CLOSERS = {"{": "}", "[": "]"}
+
+
+@functools.lru_cache(maxsize=None)
+def response_schema(tool_names: Tuple[str, ...]) -> Dict[str, Any]:
+    """
+    Builds the response schema for structured output from the thought/action/answer shape.
+
+    Args:
+        tool_names (Tuple[str, ...]): The names the model may put in an action, including "none".
+
+    Returns:
+        Dict[str, Any]: The OpenAPI-style schema accepted by GenerationConfig.response_schema.
+    """
+    action = {
+        "type": "object",
+        "properties": {
+            "name": {"type": "string", "enum": list(tool_names)},
+            "reason": {"type": "string"},
+            "input": {"type": "string"}
+        },
+        "required": ["name", "input"]
+    }
+    return {
+        "type": "object",
+        "properties": {
+            "thought": {"type": "string"},
+            "action": action,
+            "actions": {"type": "array", "items": action},
+            "answer": {"type": "string"}
+        },
+        "required": ["thought"]
+    }
+
+
+def tool_names(names: Sequence[str]) -> Tuple[str, ...]:
+    """
+    Returns the action names allowed by the schema: the registered tools and "none".
+
+    Args:
+        names (Sequence[str]): The registered tool names.
+
+    Returns:
+        Tuple[str, ...]: The names in a stable order, suitable as a cache key.
+    """
+    return tuple(sorted(set(names) | {"none"}))
+
+
+def _extract(text: str) -> str:
+    """
+    Returns the JSON object inside a response, dropping code fences and surrounding prose.
+    """
+    text = text.strip()
+    if "```" in text:
+        match = FENCE.search(text)
+        if match:
+            text = match.group(1).strip()
+    elif text.startswith("json"):
+        text = text[4:].strip()
+    start = text.find("{")
+    return text[start:] if start > 0 else text
+
+
+def _close_truncated(text: str) -> List[str]:
+    """
+    Escapes raw control characters inside strings and closes a response left open by truncation.
+
+    A string cut off mid-value is never closed, since its content is incomplete: a truncated
+    answer or tool input would otherwise be taken at face value. Instead the response is cut
+    back to its last complete top-level member.
+
+    Returns:
+        List[str]: The repaired candidates: the text closed where it ends, if only the top-level
+        object was left open outside a string, and, if it was truncated, the text cut back to its
+        last complete top-level member. Empty if nothing complete can be recovered.
+    """
+    out: List[str] = []
+    stack: List[str] = []
+    in_string = False
+    escape = False
+    last_member: Optional[Tuple[int, List[str]]] = None
+    for char in text:
+        if in_string:
+            if escape:
+                escape = False
+            elif char == "\\":
+                escape = True
+            elif char == '"':
+                in_string = False
+            elif char == "\n":
+                char = "\\n"
+            elif char == "\t":
+                char = "\\t"
+            elif char == "\r":
+                char = "\\r"
+        elif char == '"':
+            in_string = True
+        elif char == "," and len(stack) == 1:
+            # Only top-level members are cut back to, so every member kept is complete.
+            last_member = (len(out), list(stack))
+        elif char in CLOSERS:
+            stack.append(CLOSERS[char])
+        elif char in "}]":
+            if stack and stack[-1] == char:
+                stack.pop()
+            if not stack:
+                # Anything after the top-level object (a second object, trailing prose) is dropped.
+                out.append(char)
+                return ["".join(out)]
+        out.append(char)
+
+    candidates: List[str] = []
+    if not in_string and len(stack) <= 1:
+        candidates.append("".join(out).rstrip().rstrip(",") + "".join(reversed(stack)))
+    if last_member is not None:
+        length, open_stack = last_member
+        candidates.append("".join(out[:length]) + "".join(reversed(open_stack)))
+    return candidates
+
+
+def repair_json(text: str) -> List[str]:
+    """
+    Fixes the defects models commonly produce in JSON output, without any further model call.
+
+    Handles code fences and surrounding prose, smart quotes, raw newlines inside strings,
+    trailing commas, and responses truncated after a complete member.
+
+    Args:
+        text (str): The raw response text.
+
+    Returns:
+        List[str]: The repaired JSON candidates, best first; they may still be invalid if the
+        defects were of another kind, and there are none if a truncated response has no complete member.
+    """
+    text = _extract(text).translate(SMART_QUOTES)
+    return [TRAILING_COMMA.sub(r"\1", candidate) for candidate in _close_truncated(text)]
+
+
+def parse_json(text: str) -> Tuple[Any, bool]:
+    """
+    Parses a model's JSON response, repairing it locally if strict parsing fails.
+
+    Args:
+        text (str): The raw response text.
+
+    Returns:
+        Tuple[Any, bool]: The parsed value, and whether a repair was needed.
+
+    Raises:
+        json.JSONDecodeError: If the response cannot be parsed even after repair, including when
+            it was cut off before any complete member.
+    """
+    stripped = text.strip()
+    try:
+        return json.loads(stripped if stripped.startswith("{") else _extract(stripped)), False
+    except json.JSONDecodeError as e:
+        error = e
+
+    candidates = repair_json(stripped)
+    for candidate in candidates:
+        try:
+            return json.loads(candidate), True
+        except json.JSONDecodeError:
+            pass
+
+    # Single-quoted strings and Python literals (True, None) are valid Python, not JSON.
+    literal = _python_literal(candidates[0]) if candidates else None
+    if literal is not None:
+        return literal, True
+    raise error
+
+
+def _python_literal(text: str) -> Optional[Dict[str, Any]]:
+    try:
+        value = ast.literal_eval(text)
+    except (ValueError, SyntaxError, MemoryError, RecursionError):
+        return None
+    return value if isinstance(value, dict) else None
+
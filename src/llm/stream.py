@@ -0,0 +1,169 @@
+from pydantic import BaseModel
+from typing import Optional
+from pydantic import Field
+from typing import Dict
+from typing import List
+from typing import Any
+import json
+
+
+# Top-level string fields whose text is streamed to callers while it is generated.
+STREAMED_FIELDS = ("thought", "answer")
+
+
+class StreamEvent(BaseModel):
+    """
+    Represents something the incremental parser recognised in a partial model response.
+    """
+    kind: str = Field(..., description="thought or answer for text deltas, action for a completed tool call.")
+    text: Optional[str] = Field(None, description="The newly generated text, for thought and answer deltas.")
+    action: Optional[Dict[str, Any]] = Field(None, description="The completed action object, for action events.")
+
+
+def _decode_partial(raw: str) -> str:
+    """
+    Decodes the body of a JSON string that may end in the middle of an escape sequence.
+
+    Args:
+        raw (str): The raw characters after the opening quote.
+
+    Returns:
+        str: The decoded text, excluding any trailing incomplete escape.
+    """
+    # An escape is at most six characters (\\uXXXX); back off until the prefix decodes.
+    for cut in range(0, min(len(raw), 6) + 1):
+        try:
+            return json.loads('"' + raw[:len(raw) - cut] + '"')
+        except json.JSONDecodeError:
+            continue
+    return ""
+
+
+class IncrementalJSONParser:
+    """
+    Scans a streamed JSON response chunk by chunk.
+
+    It emits the text of the top-level "thought" and "answer" strings as it arrives. It also
+    emits each action object, under "action" or inside the "actions" list, as soon as its
+    closing brace arrives. Anything before the first "{" (such as a code fence) is ignored.
+    """
+
+    def __init__(self) -> None:
+        self.buffer = ""
+        self._pos = 0
+        self._stack: List[str] = []
+        self._started = False
+        self._in_string = False
+        self._escape = False
+        self._expect_key = False
+        self._key: Optional[str] = None
+        self._string_start = 0
+        self._string_role: Optional[str] = None
+        self._emitted = 0
+        self._capture_start: Optional[int] = None
+        self._capture_depth = 0
+
+    @property
+    def done(self) -> bool:
+        """
+        Whether the top-level object has been closed.
+        """
+        return self._started and not self._stack
+
+    def feed(self, chunk: str) -> List[StreamEvent]:
+        """
+        Consumes the next chunk of the response.
+
+        Args:
+            chunk (str): The newly received text.
+
+        Returns:
+            List[StreamEvent]: The events recognised in this chunk, in order.
+        """
+        self.buffer += chunk
+        events: List[StreamEvent] = []
+        buffer = self.buffer
+        for index in range(self._pos, len(buffer)):
+            char = buffer[index]
+            if not self._started:
+                if char == "{":
+                    self._started = True
+                    self._stack.append(char)
+                    self._expect_key = True
+                continue
+            if self.done:
+                break
+
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif char == "\\":
+                    self._escape = True
+                elif char == '"':
+                    self._in_string = False
+                    self._close_string(index, events)
+                continue
+
+            if char == '"':
+                self._in_string = True
+                self._string_start = index
+                self._string_role = self._role_for_string()
+                self._emitted = 0
+            elif char in "{[":
+                self._stack.append(char)
+                self._open_container(char, index)
+            elif char in "}]":
+                if self._capture_start is not None and len(self._stack) == self._capture_depth:
+                    self._emit_action(buffer[self._capture_start:index + 1], events)
+                    self._capture_start = None
+                self._stack.pop()
+            elif len(self._stack) == 1:
+                if char == ":":
+                    self._expect_key = False
+                elif char == ",":
+                    self._expect_key = True
+                    self._key = None
+
+        self._pos = len(buffer)
+        if self._in_string and self._string_role in STREAMED_FIELDS:
+            self._emit_text(buffer[self._string_start + 1:], events)
+        return events
+
+    def _role_for_string(self) -> Optional[str]:
+        if len(self._stack) != 1:
+            return None
+        if self._expect_key:
+            return "key"
+        return self._key if self._key in STREAMED_FIELDS else None
+
+    def _open_container(self, char: str, index: int) -> None:
+        depth = len(self._stack)
+        if self._capture_start is not None:
+            return
+        in_action = char == "{" and depth == 2 and self._key == "action"
+        in_actions = char == "{" and depth == 3 and self._key == "actions" and self._stack[1] == "["
+        if in_action or in_actions:
+            self._capture_start = index
+            self._capture_depth = depth
+
+    def _close_string(self, index: int, events: List[StreamEvent]) -> None:
+        raw = self.buffer[self._string_start + 1:index]
+        if self._string_role == "key":
+            self._key = _decode_partial(raw)
+        elif self._string_role in STREAMED_FIELDS:
+            self._emit_text(raw, events)
+        self._string_role = None
+
+    def _emit_text(self, raw: str, events: List[StreamEvent]) -> None:
+        decoded = _decode_partial(raw)
+        if len(decoded) > self._emitted:
+            events.append(StreamEvent(kind=self._string_role, text=decoded[self._emitted:]))
+            self._emitted = len(decoded)
+
+    def _emit_action(self, raw: str, events: List[StreamEvent]) -> None:
+        try:
+            action = json.loads(raw)
+        except json.JSONDecodeError:
+            return
+        if isinstance(action, dict):
+            events.append(StreamEvent(kind="action", action=action))
@@ -0,0 +1,132 @@
+from pydantic import BaseModel
+from typing import Optional
+from pydantic import Field
+from typing import Any
+import math
+
+
+# Gemini tokenizers average roughly four characters of English text per token.
+CHARS_PER_TOKEN = 4
+
+
+def estimate_tokens(text: str) -> int:
+    """
+    Estimates the number of tokens in a text locally, without a remote count call.
+
+    Args:
+        text (str): The text to measure.
+
+    Returns:
+        int: The estimated token count.
+    """
+    return math.ceil(len(text) / CHARS_PER_TOKEN) if text else 0
+
+
+class Usage(BaseModel):
+    """
+    Represents the token usage of a single model call.
+    """
+    prompt_tokens: int = Field(0, description="The tokens in the prompt.")
+    output_tokens: int = Field(0, description="The tokens in the generated response.")
+    estimated: bool = Field(False, description="Whether the counts are local estimates rather than reported by the API.")
+    cached: bool = Field(False, description="Whether the response was served from the local cache, costing nothing.")
+
+    @property
+    def total_tokens(self) -> int:
+        return self.prompt_tokens + self.output_tokens
+
+
+def usage_from_response(response: Any, prompt: str, text: str) -> Usage:
+    """
+    Reads the token usage reported with a response, estimating it locally if none was reported.
+
+    Args:
+        response (Any): The GenerationResponse or final streamed chunk.
+        prompt (str): The prompt text that was sent.
+        text (str): The full response text.
+
+    Returns:
+        Usage: The usage of the call.
+    """
+    metadata = getattr(response, "usage_metadata", None)
+    prompt_tokens = getattr(metadata, "prompt_token_count", 0) or 0
+    output_tokens = getattr(metadata, "candidates_token_count", 0) or 0
+    if prompt_tokens or output_tokens:
+        return Usage(prompt_tokens=prompt_tokens, output_tokens=output_tokens)
+    return Usage(prompt_tokens=estimate_tokens(prompt), output_tokens=estimate_tokens(text), estimated=True)
+
+
+class RunUsage(BaseModel):
+    """
+    Accumulates the token usage and cost of every model call in a run.
+    """
+    calls: int = Field(0, description="The number of model calls, including cache hits.")
+    prompt_tokens: int = Field(0, description="The total prompt tokens.")
+    output_tokens: int = Field(0, description="The total output tokens.")
+    estimated_calls: int = Field(0, description="The calls whose usage was estimated locally.")
+    cost: float = Field(0.0, description="The total cost in the configured currency.")
+
+    @property
+    def total_tokens(self) -> int:
+        return self.prompt_tokens + self.output_tokens
+
+    def add(self, usage: Usage, input_price: float = 0.0, output_price: float = 0.0) -> None:
+        """
+        Adds the usage of a call.
+
+        Args:
+            usage (Usage): The usage of the call.
+            input_price (float): The price per million prompt tokens.
+            output_price (float): The price per million output tokens.
+        """
+        self.calls += 1
+        self.prompt_tokens += usage.prompt_tokens
+        self.output_tokens += usage.output_tokens
+        self.estimated_calls += int(usage.estimated)
+        self.cost += (usage.prompt_tokens * input_price + usage.output_tokens * output_price) / 1_000_000
+
+
+class Budget:
+    """
+    A per-run limit on tokens and cost, checked before each model call.
+    """
+
+    def __init__(self, max_tokens: Optional[int] = None, max_cost: Optional[float] = None,
+                 input_price: float = 0.0, output_price: float = 0.0):
+        """
+        Initializes the budget.
+
+        Args:
+            max_tokens (Optional[int]): The maximum prompt plus output tokens per run, or None for no limit.
+            max_cost (Optional[float]): The maximum cost per run, or None for no limit.
+            input_price (float): The price per million prompt tokens.
+            output_price (float): The price per million output tokens.
+        """
+        self.max_tokens = max_tokens
+        self.max_cost = max_cost
+        self.input_price = input_price
+        self.output_price = output_price
+
+    def exceeded_by(self, usage: RunUsage, prompt_tokens: int) -> Optional[str]:
+        """
+        Checks whether sending another prompt would exceed the budget.
+
+        The next response is assumed to be as long as the average response so far.
+
+        Args:
+            usage (RunUsage): The usage of the run so far.
+            prompt_tokens (int): The estimated tokens of the next prompt.
+
+        Returns:
+            Optional[str]: A description of the exceeded limit, or None if the call fits.
+        """
+        output_tokens = usage.output_tokens // usage.calls if usage.calls else 0
+        if self.max_tokens is not None:
+            projected = usage.total_tokens + prompt_tokens + output_tokens
+            if projected > self.max_tokens:
+                return f"token budget of {self.max_tokens} (projected {projected})"
+        if self.max_cost is not None:
+            projected_cost = usage.cost + (prompt_tokens * self.input_price + output_tokens * self.output_price) / 1_000_000
+            if projected_cost > self.max_cost:
+                return f"cost budget of {self.max_cost} (projected {projected_cost:.6f})"
+        return None
@@ -1,48 +1,67 @@
-from vertexai.generative_models import GenerativeModel 
-from src.tools.serp import search as google_search
-from src.tools.wiki import search as wiki_search
-from vertexai.generative_models import Part 
-from src.utils.io import write_to_file
+from src.tools.observation import compact_observation
+from src.llm.gemini import StreamInterruptedError
+from src.llm.gemini import generate_stream_async
+from src.llm.stream import IncrementalJSONParser
+from src.react.evidence import EvidenceStore
+from src.tools.registry import get_registry
+from src.react.prompt import PromptTemplate
+from src.react.trace import get_trace_sink
+from src.llm.tokens import estimate_tokens
+from src.llm.gemini import generate_async
+from src.tools.prefetch import Prefetcher
+from src.utils.metrics import get_metrics
+from src.llm.parse import response_schema
+from src.llm.gemini import text_contents
+from src.react.prompt import load_prompt
+from src.config.logging import Truncated
+from src.tools.registry import ToolSpec
+from src.tools.registry import ToolFunc
+from src.llm.stream import StreamEvent
+from src.react.trace import TraceEvent
+from src.utils.metrics import Metrics
+from src.react.trace import TraceSink
+from src.react.history import History
 from src.config.logging import logger
+from src.llm.parse import tool_names
+from src.llm.parse import parse_json
+from src.tools.registry import NONE
+from src.tools.registry import Tool
+from src.llm.tokens import RunUsage
 from src.config.setup import config
-from src.llm.gemini import generate
-from src.utils.io import read_file
+from src.utils.metrics import Span
+from src.config.setup import init
+from src.llm.tokens import Budget
+from src.llm.tokens import Usage
+from typing import TYPE_CHECKING
+from typing import AsyncIterator
 from pydantic import BaseModel
-from typing import Callable
+from typing import Optional
+from typing import Iterator
 from pydantic import Field 
-from typing import Union
+from typing import Tuple
 from typing import List 
 from typing import Dict 
+from typing import Type
+from typing import Any
 from enum import Enum
 from enum import auto
+import contextlib
+import asyncio
 import json
+import time
+import uuid
 
+if TYPE_CHECKING:
+    from vertexai.generative_models import GenerativeModel
 
-Observation = Union[str, Exception]
 
 PROMPT_TEMPLATE_PATH = "./data/input/react.txt"
-OUTPUT_TRACE_PATH = "./data/output/trace.txt"
-
-class Name(Enum):
-    """
-    Enumeration for tool names available to the agent.
-    """
-    WIKIPEDIA = auto()
-    GOOGLE = auto()
-    NONE = auto()
-
-    def __str__(self) -> str:
-        """
-        String representation of the tool name.
-        """
-        return self.name.lower()
-
 
 class Choice(BaseModel):
     """
     Represents a choice of tool with a reason for selection.
     """
-    name: Name = Field(..., description="The name of the tool chosen.")
+    name: str = Field(..., description="The name of the tool chosen.")
     reason: str = Field(..., description="The reason for choosing this tool.")
 
 
@@ -54,180 +73,629 @@ class Message(BaseModel):
     content: str = Field(..., description="The content of the message.")
 
 
-class Tool:
+class Action(BaseModel):
     """
-    A wrapper class for tools used by the agent, executing a function based on tool type.
+    Represents a single tool invocation requested by the model.
     """
+    name: str = Field(..., description="The name of the tool to invoke.")
+    input: str = Field(..., description="The input passed to the tool.")
 
-    def __init__(self, name: Name, func: Callable[[str], str]):
-        """
-        Initializes a Tool with a name and an associated function.
-        
-        Args:
-            name (Name): The name of the tool.
-            func (Callable[[str], str]): The function associated with the tool.
-        """
-        self.name = name
-        self.func = func
 
-    def use(self, query: str) -> Observation:
-        """
-        Executes the tool's function with the provided query.
+class Decision(BaseModel):
+    """
+    Represents the parsed outcome of a thought: tool invocations or a final answer.
+    """
+    actions: List[Action] = Field(default_factory=list, description="The tool invocations to execute.")
+    answer: Optional[str] = Field(None, description="The final answer, if the model provided one.")
 
-        Args:
-            query (str): The input query for the tool.
 
-        Returns:
-            Observation: Result of the tool's function or an error message if an exception occurs.
+class StepType(Enum):
+    """
+    Enumeration of the kinds of steps produced by the agent loop.
+    """
+    THOUGHT = auto()
+    ACTION = auto()
+    OBSERVATION = auto()
+    ANSWER = auto()
+
+    def __str__(self) -> str:
         """
-        try:
-            return self.func(query)
-        except Exception as e:
-            logger.error(f"Error executing tool {self.name}: {e}")
-            return str(e)
+        String representation of the step type.
+        """
+        return self.name.lower()
+
 
+class Step(BaseModel):
+    """
+    Represents a single step of the think/act/observe loop.
+    """
+    type: StepType = Field(..., description="The kind of step.")
+    iteration: int = Field(..., description="The iteration in which the step occurred.")
+    content: str = Field(..., description="The thought, action input, observation or answer text.")
+    action: Optional[Action] = Field(None, description="The action this step belongs to, if any.")
+    partial: bool = Field(False, description="Whether this is a streamed fragment of a thought or answer.")
 
-class Agent:
+
+class AsyncAgent:
     """
     Defines the agent responsible for executing queries and handling tool interactions.
+
+    All model and tool calls are awaited, so a single event loop can drive many agents concurrently.
     """
 
-    def __init__(self, model: GenerativeModel) -> None:
+    def __init__(self, model: "GenerativeModel", sink: Optional[TraceSink] = None, stream: bool = False,
+                 metrics: Optional[Metrics] = None, max_tokens: Optional[int] = None,
+                 max_cost: Optional[float] = None) -> None:
         """
         Initializes the Agent with a generative model, tools dictionary, and a messages log.
 
         Args:
             model (GenerativeModel): The generative model used by the agent.
+            sink (Optional[TraceSink]): Where trace events go; defaults to the configured process-wide sink.
+            stream (bool): Whether to stream responses, yielding partial thoughts and answers and
+                dispatching tool calls as soon as each action is complete.
+            metrics (Optional[Metrics]): Where phase timings and counters go; defaults to the process-wide registry.
+            max_tokens (Optional[int]): The per-run token budget; defaults to the configured budget.
+            max_cost (Optional[float]): The per-run cost budget; defaults to the configured budget.
         """
         self.model = model
-        self.tools: Dict[Name, Tool] = {}
+        self.stream = stream
+        self.sink = sink or get_trace_sink()
+        self.metrics = metrics or get_metrics()
+        self.run_id = ""
+        self.tools: Dict[str, Tool] = {}
+        self.tool_list = ""
         self.messages: List[Message] = []
+        self.history = self.create_history()
+        self.evidence = self.create_evidence()
         self.query = ""
+        self.last_thought = ""
         self.max_iterations = 5
         self.current_iteration = 0
+        self.answer: Optional[str] = None
+        self.gave_up: Optional[str] = None
+        self.structured_output = config.STRUCTURED_OUTPUT
+        self.budget = self.create_budget(max_tokens, max_cost)
+        self.usage = RunUsage()
+        self.last_observations: List[str] = []
+        self.prefetcher: Optional[Prefetcher] = None
         self.template = self.load_template()
 
-    def load_template(self) -> str:
+    def load_template(self) -> PromptTemplate:
+        """
+        Loads the compiled prompt template, shared by every agent in the process.
+
+        Returns:
+            PromptTemplate: The compiled prompt template.
+        """
+        return load_prompt(PROMPT_TEMPLATE_PATH)
+
+    @staticmethod
+    def create_history() -> History:
+        """
+        Creates an empty prompt history using the configured token budget.
+
+        Returns:
+            History: The history for a new run.
+        """
+        settings = config.HISTORY
+        return History(
+            token_budget=settings.get('token_budget'),
+            keep_recent=settings.get('keep_recent', 6),
+            compact_chars=settings.get('compact_chars', 300)
+        )
+
+    @staticmethod
+    def create_evidence() -> Optional[EvidenceStore]:
         """
-        Loads the prompt template from a file.
+        Creates an empty per-run evidence store when observation retrieval is enabled.
 
         Returns:
-            str: The content of the prompt template file.
+            Optional[EvidenceStore]: The store for a new run, or None if observations go into the history verbatim.
         """
-        return read_file(PROMPT_TEMPLATE_PATH)
+        settings = config.EVIDENCE
+        if not settings.get('enabled', False):
+            return None
+        return EvidenceStore(
+            chunk_chars=settings.get('chunk_chars', 400),
+            top_k=settings.get('top_k', 4),
+            summary_chars=settings.get('summary_chars', 160)
+        )
 
-    def register(self, name: Name, func: Callable[[str], str]) -> None:
+    @staticmethod
+    def create_budget(max_tokens: Optional[int] = None, max_cost: Optional[float] = None) -> Budget:
+        """
+        Creates the per-run token and cost budget, falling back to the configured limits and prices.
+
+        Args:
+            max_tokens (Optional[int]): The token limit, overriding the configuration.
+            max_cost (Optional[float]): The cost limit, overriding the configuration.
+
+        Returns:
+            Budget: The budget checked before each model call.
+        """
+        settings = config.BUDGET
+        return Budget(
+            max_tokens=max_tokens if max_tokens is not None else settings.get('max_tokens'),
+            max_cost=max_cost if max_cost is not None else settings.get('max_cost'),
+            input_price=settings.get('input_price_per_million', 0.0),
+            output_price=settings.get('output_price_per_million', 0.0)
+        )
+
+    def register(self, name: str, func: ToolFunc, **settings: Any) -> None:
         """
         Registers a tool to the agent.
 
         Args:
-            name (Name): The name of the tool.
-            func (Callable[[str], str]): The function associated with the tool.
+            name (str): The name of the tool.
+            func (ToolFunc): The function associated with the tool, either blocking or a coroutine function.
+            **settings (Any): Further ToolSpec fields, e.g. description, timeout or max_concurrency.
+        """
+        self.add_tool(Tool(ToolSpec(name=name, **settings), func))
+
+    def add_tool(self, tool: Tool) -> None:
+        """
+        Makes a declared tool available to the agent and lists it in the prompt.
+
+        Args:
+            tool (Tool): The tool, typically shared from the process-wide registry.
         """
-        self.tools[name] = Tool(name, func)
+        self.tools[tool.name] = tool
+        self.tool_list = ', '.join([tool.label() for tool in self.tools.values()])
 
     def trace(self, role: str, content: str) -> None:
         """
-        Logs the message with the specified role and content and writes to file.
+        Logs the message with the specified role and content and emits it to the trace sink.
 
         Args:
             role (str): The role of the message sender.
             content (str): The content of the message.
         """
         if role != "system":
-            self.messages.append(Message(role=role, content=content))
-        write_to_file(path=OUTPUT_TRACE_PATH, content=f"{role}: {content}\n")
+            self.remember(role, content)
+        with self.metrics.span("trace"):
+            self.sink.emit(TraceEvent(run_id=self.run_id, kind="message", iteration=self.current_iteration,
+                                      role=role, content=content))
+
+    @contextlib.contextmanager
+    def span(self, phase: str, **labels: Any) -> Iterator[Span]:
+        """
+        Times a phase of the current iteration, recording it in the metrics and as a span trace event.
+
+        Args:
+            phase (str): The phase name: render, gemini, parse or tool.
+            **labels (Any): Extra labels, such as the tool name.
+
+        Yields:
+            Span: The span, whose duration is set when the block exits.
+        """
+        span: Optional[Span] = None
+        try:
+            with self.metrics.span(phase, **labels) as span:
+                yield span
+        finally:
+            if span is not None:
+                attributes = {key: str(value) for key, value in labels.items()}
+                if span.error:
+                    attributes["error"] = span.error
+                self.sink.emit(TraceEvent(run_id=self.run_id, kind="span", iteration=self.current_iteration,
+                                          name=phase, duration_ms=span.duration * 1000, attributes=attributes))
+
+    def remember(self, role: str, content: str, summary: Optional[str] = None) -> None:
+        """
+        Adds a message to the message log and the prompt history.
+
+        Args:
+            role (str): The role of the message sender.
+            content (str): The content of the message.
+            summary (Optional[str]): What the prompt history keeps instead of the full content, if given.
+        """
+        self.messages.append(Message(role=role, content=content))
+        self.history.append(role, summary if summary is not None else content)
 
     def get_history(self) -> str:
         """
-        Retrieves the conversation history.
+        Retrieves the conversation history, compacted to the configured token budget, followed by
+        the evidence relevant to the next step when observations are kept in the evidence store.
 
         Returns:
             str: Formatted history of messages.
         """
-        return "\n".join([f"{message.role}: {message.content}" for message in self.messages])
+        history = self.history.render()
+        if not self.evidence:
+            return history
+        evidence = self.evidence.render(f"{self.query} {self.last_thought}")
+        return f"{history}\n{evidence}" if evidence else history
 
-    def think(self) -> None:
+    def store_evidence(self, action: Action, observation: str) -> Optional[str]:
         """
-        Processes the current query, decides actions, and iterates until a solution or max iteration limit is reached.
+        Indexes an observation in the evidence store.
+
+        Args:
+            action (Action): The tool invocation that produced the observation.
+            observation (str): The observation text.
+
+        Returns:
+            Optional[str]: The observation's summary for the prompt history, or None if the store is disabled.
         """
-        self.current_iteration += 1
-        logger.info(f"Starting iteration {self.current_iteration}")
-        write_to_file(path=OUTPUT_TRACE_PATH, content=f"\n{'='*50}\nIteration {self.current_iteration}\n{'='*50}\n")
+        if self.evidence is None:
+            return None
+        prefix = f"Observation from {action.name}: "
+        body = observation[len(prefix):] if observation.startswith(prefix) else observation
+        summary = self.evidence.add(f"{action.name} {json.dumps(action.input, ensure_ascii=False)}", body,
+                                    self.current_iteration)
+        return f"{prefix}{summary}"
+
+    def record_usage(self, usage: Usage) -> None:
+        """
+        Adds the token usage of a model call to the run's totals, metrics and trace.
 
-        if self.current_iteration > self.max_iterations:
-            logger.warning("Reached maximum iterations. Stopping.")
-            self.trace("assistant", "I'm sorry, but I couldn't find a satisfactory answer within the allowed number of iterations. Here's what I know so far: " + self.get_history())
-            return
+        Args:
+            usage (Usage): The usage of the call.
+        """
+        self.usage.add(usage, self.budget.input_price, self.budget.output_price)
+        self.metrics.inc("tokens", usage.prompt_tokens, kind="prompt")
+        self.metrics.inc("tokens", usage.output_tokens, kind="output")
+        self.sink.emit(TraceEvent(run_id=self.run_id, kind="usage", iteration=self.current_iteration,
+                                  attributes={key: str(value) for key, value in usage.model_dump().items()}))
+
+    def response_schema(self) -> Optional[Dict[str, Any]]:
+        """
+        Returns the schema the model's JSON output must follow, if structured output is enabled.
 
-        prompt = self.template.format(
-            query=self.query, 
-            history=self.get_history(),
-            tools=', '.join([str(tool.name) for tool in self.tools.values()])
+        Returns:
+            Optional[Dict[str, Any]]: The thought/action/answer schema over the registered tools, or None.
+        """
+        if not self.structured_output:
+            return None
+        return response_schema(tool_names(list(self.tools)))
+
+    def render_prompt(self) -> str:
+        """
+        Renders the prompt for the current iteration.
+
+        Returns:
+            str: The prompt text.
+        """
+        return self.template.render(
+            tools=self.tool_list,
+            query=self.query,
+            history=self.get_history()
         )
 
-        response = self.ask_gemini(prompt)
-        logger.info(f"Thinking => {response}")
+    async def think(self, prompt: str) -> Optional[str]:
+        """
+        Asks the model for its next thought.
+
+        Args:
+            prompt (str): The rendered prompt for the current iteration.
+
+        Returns:
+            Optional[str]: The raw model response, or None if the model could not be reached.
+        """
+        with self.span("gemini"):
+            response = await self.ask_gemini(prompt)
+        if response is None:
+            return None
+        logger.info("Thought received (%d chars)", len(response))
+        logger.debug("Thinking => %s", Truncated(response))
         self.trace("assistant", f"Thought: {response}")
-        self.decide(response)
+        return response
 
-    def decide(self, response: str) -> None:
+    async def think_stream(self, prompt: str) -> AsyncIterator[StreamEvent]:
         """
-        Processes the agent's response, deciding actions or final answers.
+        Streams the model's next thought, parsing it while it is generated.
+
+        Args:
+            prompt (str): The rendered prompt for the current iteration.
+
+        Yields:
+            StreamEvent: Thought and answer text deltas and completed actions as they arrive,
+            followed by a final "response" event carrying the full response text (None if the
+            model could not be reached or the stream broke off).
+        """
+        parser = IncrementalJSONParser()
+        interrupted = False
+        # The span also covers the time the consumer spends on each event between chunks.
+        with self.span("gemini", stream=True):
+            try:
+                async for chunk in self.ask_gemini_stream(prompt):
+                    for event in parser.feed(chunk):
+                        yield event
+            except StreamInterruptedError:
+                # A partial response must not be taken for a complete thought or answer.
+                interrupted = True
+
+        response = None if interrupted else parser.buffer or None
+        if response is not None:
+            logger.info("Thought received (%d chars)", len(response))
+            logger.debug("Thinking => %s", Truncated(response))
+            self.trace("assistant", f"Thought: {response}")
+        yield StreamEvent(kind="response", text=response)
+
+    def to_action(self, action: Dict[str, Any]) -> Action:
+        """
+        Converts an action object from the model's response into an Action.
+
+        Args:
+            action (Dict[str, Any]): The action object with a tool "name" and optional "input".
+
+        Returns:
+            Action: The tool invocation; the input defaults to the query.
+        """
+        return Action(name=str(action["name"]).strip().lower(), input=action.get("input", self.query))
+
+    def decide(self, response: str) -> Optional[Decision]:
+        """
+        Parses the agent's response into the actions to take or the final answer.
+
+        The response may request a single "action" or a list of independent "actions",
+        all of which are executed before the next thought. Common JSON defects (code fences,
+        trailing commas, truncation) are repaired locally rather than costing another thought.
 
         Args:
             response (str): The response generated by the model.
+
+        Returns:
+            Optional[Decision]: The parsed decision, or None if the response could not be processed.
         """
         try:
-            cleaned_response = response.strip().strip('`').strip()
-            if cleaned_response.startswith('json'):
-                cleaned_response = cleaned_response[4:].strip()
-            
-            parsed_response = json.loads(cleaned_response)
-            
-            if "action" in parsed_response:
-                action = parsed_response["action"]
-                tool_name = Name[action["name"].upper()]
-                if tool_name == Name.NONE:
-                    logger.info("No action needed. Proceeding to final answer.")
-                    self.think()
-                else:
-                    self.trace("assistant", f"Action: Using {tool_name} tool")
-                    self.act(tool_name, action.get("input", self.query))
-            elif "answer" in parsed_response:
-                self.trace("assistant", f"Final Answer: {parsed_response['answer']}")
-            else:
-                raise ValueError("Invalid response format")
+            parsed_response, repaired = parse_json(response)
+            if repaired:
+                logger.info("Repaired malformed JSON in the response")
+                self.metrics.inc("parse_repairs")
+            self.last_thought = str(parsed_response.get("thought", ""))
+
+            # Every key but the thought is optional, so an empty "actions" may come with an answer.
+            requested = parsed_response.get("actions") or []
+            if not requested and parsed_response.get("action"):
+                requested = [parsed_response["action"]]
+            answer = parsed_response.get("answer")
+            # A null or blank answer is no answer: the response still needs an action, or a retry.
+            answer = str(answer).strip() if answer is not None else ""
+            if requested:
+                actions = [self.to_action(action) for action in requested]
+                actions = [action for action in actions if action.name != NONE]
+                if actions or not answer:
+                    if not actions:
+                        logger.info("No action needed. Proceeding to final answer.")
+                    return Decision(actions=actions)
+            if answer:
+                return Decision(answer=answer)
+            raise ValueError("Invalid response format")
         except json.JSONDecodeError as e:
-            logger.error(f"Failed to parse response: {response}. Error: {str(e)}")
+            logger.error("Failed to parse response: %s. Error: %s", Truncated(response), e)
+            self.metrics.inc("parse_failures", reason="json")
             self.trace("assistant", "I encountered an error in processing. Let me try again.")
-            self.think()
         except Exception as e:
-            logger.error(f"Error processing response: {str(e)}")
+            logger.error("Error processing response: %s", e)
+            self.metrics.inc("parse_failures", reason="format")
             self.trace("assistant", "I encountered an unexpected error. Let me try a different approach.")
-            self.think()
+        return None
+
+    async def observe(self, action: Action) -> str:
+        """
+        Executes a single action and formats its result as a compact observation.
+
+        Args:
+            action (Action): The tool invocation to execute.
+
+        Returns:
+            str: The observation text for the action.
+        """
+        tool = self.tools.get(action.name)
+        if tool is None:
+            logger.error("No tool registered for choice: %s", action.name)
+            return f"Error: Tool {action.name} not found"
+        with self.span("tool", tool=action.name):
+            prefetched, result = await self.prefetcher.take(action.name, action.input) if self.prefetcher else (False, None)
+            if not prefetched:
+                result = await tool.use_async(action.input)
+        settings = config.OBSERVATION
+        observation = compact_observation(
+            result,
+            action.input,
+            max_tokens=settings.get('max_tokens', 800),
+            max_results=settings.get('max_results', 5)
+        )
+        return f"Observation from {action.name}: {observation}"
+
+    def dispatch(self, action: Dict[str, Any], dispatched: Dict[Tuple[str, str], "asyncio.Task[str]"]) -> None:
+        """
+        Starts a tool call as soon as the streamed response has completed its action object.
+
+        Args:
+            action (Dict[str, Any]): The completed action object.
+            dispatched (Dict[Tuple[str, str], asyncio.Task[str]]): The in-flight calls of this iteration, by tool and input.
+        """
+        try:
+            action = self.to_action(action)
+        except (KeyError, AttributeError, ValueError):
+            return
+        key = (action.name, action.input)
+        if action.name in self.tools and key not in dispatched:
+            logger.info("Dispatching %s early while the response is still streaming", action.name)
+            dispatched[key] = asyncio.ensure_future(self.observe(action))
 
-    def act(self, tool_name: Name, query: str) -> None:
+    async def act(self, actions: List[Action],
+                  dispatched: Optional[Dict[Tuple[str, str], "asyncio.Task[str]"]] = None) -> List[str]:
         """
-        Executes the specified tool's function on the query and logs the result.
+        Executes the requested actions concurrently and logs every result.
 
         Args:
-            tool_name (Name): The tool to be used.
-            query (str): The query for the tool.
+            actions (List[Action]): The tool invocations to execute.
+            dispatched (Optional[Dict[Tuple[str, str], asyncio.Task[str]]]): Calls already started while streaming;
+                matching actions reuse them instead of calling the tool again.
+
+        Returns:
+            List[str]: The observations, in the same order as the actions.
         """
-        tool = self.tools.get(tool_name)
-        if tool:
-            result = tool.use(query)
-            observation = f"Observation from {tool_name}: {result}"
+        dispatched = dispatched if dispatched is not None else {}
+        observations = await asyncio.gather(*[
+            dispatched.pop((action.name, action.input), None) or self.observe(action)
+            for action in actions
+        ])
+        for action, observation in zip(actions, observations):
             self.trace("system", observation)
-            self.messages.append(Message(role="system", content=observation))  # Add observation to message history
-            self.think()
-        else:
-            logger.error(f"No tool registered for choice: {tool_name}")
-            self.trace("system", f"Error: Tool {tool_name} not found")
-            self.think()
+            # With an evidence store, the history keeps a summary and prompts retrieve the relevant chunks.
+            self.remember("system", observation, summary=self.store_evidence(action, observation))
+        self.last_observations = list(observations)
+        return list(observations)
 
-    def execute(self, query: str) -> str:
+    def create_prefetcher(self) -> Optional[Prefetcher]:
+        """
+        Creates the per-run speculative prefetcher when prefetching is enabled.
+
+        Returns:
+            Optional[Prefetcher]: The prefetcher over the configured tools, or None if disabled.
+        """
+        settings = config.PREFETCH
+        if not settings.get('enabled', False):
+            return None
+        tools = settings.get('tools', ['wikipedia'])
+        return Prefetcher(
+            {name: tool.use_async for name, tool in self.tools.items() if name in tools},
+            max_per_step=settings.get('max_per_step', 3),
+            ttl_seconds=settings.get('ttl_seconds', 60),
+            metrics=self.metrics
+        )
+
+    def start(self, query: str) -> None:
+        """
+        Resets the per-run state and records the query.
+
+        Args:
+            query (str): The query to be processed.
+        """
+        self.run_id = uuid.uuid4().hex
+        self.query = query
+        self.messages = []
+        self.history = self.create_history()
+        self.evidence = self.create_evidence()
+        self.last_thought = ""
+        self.current_iteration = 0
+        self.answer = None
+        self.gave_up = None
+        self.usage = RunUsage()
+        self.last_observations = []
+        self.prefetcher = self.create_prefetcher()
+        self.metrics.inc("runs")
+        self.trace(role="user", content=query)
+
+    async def steps(self, query: str) -> AsyncIterator[Step]:
+        """
+        Runs the think/act/observe loop iteratively, yielding each step as it completes.
+
+        The loop runs in constant stack depth and can be driven externally one step at a time;
+        it ends after an answer step, either from the model or when the iteration limit is reached.
+
+        Args:
+            query (str): The query to be processed.
+
+        Yields:
+            Step: The thought, action, observation and answer steps of the run.
+        """
+        self.start(query)
+        started = time.perf_counter()
+        try:
+            while self.answer is None:
+                self.current_iteration += 1
+                self.metrics.inc("iterations")
+                logger.info("Starting iteration %s", self.current_iteration)
+                self.sink.emit(TraceEvent(run_id=self.run_id, kind="iteration", iteration=self.current_iteration))
+
+                if self.current_iteration > self.max_iterations:
+                    logger.warning("Reached maximum iterations. Stopping.")
+                    self.metrics.inc("iteration_limit_reached")
+                    yield self.give_up("I couldn't find a satisfactory answer within the allowed number of iterations")
+                    return
+
+                with self.span("render"):
+                    prompt = self.render_prompt()
+                exceeded = self.budget.exceeded_by(self.usage, estimate_tokens(prompt))
+                if exceeded is not None:
+                    logger.warning("Next call would exceed the %s. Stopping.", exceeded)
+                    self.metrics.inc("budget_exhausted")
+                    yield self.give_up(f"I couldn't find a satisfactory answer within the allowed {exceeded.split(' (')[0]}")
+                    return
+
+                dispatched: Dict[Tuple[str, str], "asyncio.Task[str]"] = {}
+                try:
+                    if self.prefetcher is not None:
+                        # Lookups run on the event loop while the model is thinking.
+                        self.prefetcher.schedule([self.query] + self.last_observations)
+
+                    if self.stream:
+                        response: Optional[str] = None
+                        async for event in self.think_stream(prompt):
+                            if event.kind == "response":
+                                response = event.text
+                            elif event.kind == "action":
+                                self.dispatch(event.action, dispatched)
+                            else:
+                                yield Step(type=StepType[event.kind.upper()], iteration=self.current_iteration,
+                                           content=event.text, partial=True)
+                    else:
+                        response = await self.think(prompt)
+                    if response is None:
+                        # Transient failures were already retried with backoff; thinking again would only
+                        # burn iterations against a backend that is down.
+                        logger.error("No response from Gemini. Stopping.")
+                        self.metrics.inc("model_failures")
+                        yield self.give_up("the language model could not be reached")
+                        return
+                    yield Step(type=StepType.THOUGHT, iteration=self.current_iteration, content=response)
+
+                    with self.span("parse"):
+                        decision = self.decide(response)
+                    if decision is None:
+                        continue
+
+                    if decision.answer is not None:
+                        self.answer = decision.answer
+                        self.trace("assistant", f"Final Answer: {decision.answer}")
+                        yield Step(type=StepType.ANSWER, iteration=self.current_iteration, content=decision.answer)
+                        return
+
+                    if not decision.actions:
+                        continue
+
+                    for action in decision.actions:
+                        self.trace("assistant", f"Action: Using {action.name} tool")
+                        yield Step(type=StepType.ACTION, iteration=self.current_iteration, content=action.input, action=action)
+
+                    observations = await self.act(decision.actions, dispatched)
+                    for action, observation in zip(decision.actions, observations):
+                        yield Step(type=StepType.OBSERVATION, iteration=self.current_iteration, content=observation, action=action)
+                finally:
+                    # Early calls the final response did not confirm are abandoned.
+                    for task in dispatched.values():
+                        task.cancel()
+        finally:
+            self.metrics.observe("run_duration_seconds", time.perf_counter() - started)
+            logger.info("Run usage: %s", self.usage.model_dump())
+            if self.prefetcher is not None:
+                logger.info("Prefetch stats: %s", self.prefetcher.stats())
+                self.prefetcher.close()
+
+    def give_up(self, reason: str) -> Step:
+        """
+        Ends the run early with the best answer available: what is known so far.
+
+        The reason is kept in gave_up, so callers can tell this apology from a real answer.
+
+        Args:
+            reason (str): Why the run is ending, for the answer text.
+
+        Returns:
+            Step: The final answer step.
+        """
+        self.gave_up = reason
+        self.answer = f"I'm sorry, but {reason}. Here's what I know so far: " + self.get_history()
+        self.trace("assistant", self.answer)
+        return Step(type=StepType.ANSWER, iteration=self.current_iteration, content=self.answer)
+
+    async def execute(self, query: str) -> str:
         """
         Executes the agent's query-processing workflow.
 
@@ -237,12 +705,11 @@ class Agent:
         Returns:
             str: The final answer or last recorded message content.
         """
-        self.query = query
-        self.trace(role="user", content=query)
-        self.think()
+        async for _ in self.steps(query):
+            pass
         return self.messages[-1].content
 
-    def ask_gemini(self, prompt: str) -> str:
+    async def ask_gemini(self, prompt: str) -> Optional[str]:
         """
         Queries the generative model with a prompt.
 
@@ -250,33 +717,132 @@ class Agent:
             prompt (str): The prompt text for the model.
 
         Returns:
-            str: The model's response as a string.
+            Optional[str]: The model's response as a string, or None once retries are exhausted or the circuit is open.
+        """
+        contents = text_contents(prompt)
+        response = await generate_async(self.model, contents, on_usage=self.record_usage,
+                                        response_schema=self.response_schema())
+        return str(response) if response is not None else None
+
+    async def ask_gemini_stream(self, prompt: str) -> AsyncIterator[str]:
         """
-        contents = [Part.from_text(prompt)]
-        response = generate(self.model, contents)
-        return str(response) if response is not None else "No response from Gemini"
+        Streams the generative model's response to a prompt.
 
-def run(query: str) -> str:
+        Args:
+            prompt (str): The prompt text for the model.
+
+        Yields:
+            str: The response text, chunk by chunk.
+        """
+        contents = text_contents(prompt)
+        async for chunk in generate_stream_async(self.model, contents, on_usage=self.record_usage,
+                                                 response_schema=self.response_schema()):
+            yield chunk
+
+
+class Agent(AsyncAgent):
     """
-    Sets up the agent, registers tools, and executes a query.
+    Synchronous facade over AsyncAgent for callers that are not running an event loop.
+    """
+
+    def steps(self, query: str) -> Iterator[Step]:
+        """
+        Runs the agent loop on a private event loop, yielding each step as it completes.
+
+        Args:
+            query (str): The query to be processed.
+
+        Yields:
+            Step: The thought, action, observation and answer steps of the run.
+        """
+        loop = asyncio.new_event_loop()
+        agen = super().steps(query)
+        try:
+            while True:
+                try:
+                    step = loop.run_until_complete(agen.__anext__())
+                except StopAsyncIteration:
+                    return
+                yield step
+        finally:
+            loop.run_until_complete(agen.aclose())
+            loop.close()
+
+    def execute(self, query: str) -> str:
+        """
+        Executes the agent's query-processing workflow to completion.
+
+        Args:
+            query (str): The query to be processed.
+
+        Returns:
+            str: The final answer or last recorded message content.
+        """
+        for _ in self.steps(query):
+            pass
+        return self.messages[-1].content
+
+
+def create_agent(agent_cls: Type[AsyncAgent] = Agent, stream: bool = False, max_tokens: Optional[int] = None,
+                 max_cost: Optional[float] = None, model: Optional["GenerativeModel"] = None) -> AsyncAgent:
+    """
+    Creates an agent backed by the configured Gemini model with the default tools registered.
+
+    Args:
+        agent_cls (Type[AsyncAgent]): The agent class to instantiate.
+        stream (bool): Whether the agent streams responses and dispatches tool calls early.
+        max_tokens (Optional[int]): The per-run token budget, overriding the configuration.
+        max_cost (Optional[float]): The per-run cost budget, overriding the configuration.
+        model (Optional[GenerativeModel]): A model client to share, e.g. across a server's agents;
+            a new one for the configured model by default.
+
+    Returns:
+        AsyncAgent: The configured agent.
+    """
+    if model is None:
+        from vertexai.generative_models import GenerativeModel
+
+        model = GenerativeModel(config.MODEL_NAME)
+
+    agent = agent_cls(model=model, stream=stream, max_tokens=max_tokens, max_cost=max_cost)
+    for tool in get_registry().tools():
+        agent.add_tool(tool)
+    return agent
+
+
+async def run_async(query: str, max_tokens: Optional[int] = None, max_cost: Optional[float] = None) -> str:
+    """
+    Sets up an async agent, registers tools, and executes a query on the running event loop.
 
     Args:
         query (str): The query to execute.
+        max_tokens (Optional[int]): The token budget for the run, overriding the configuration.
+        max_cost (Optional[float]): The cost budget for the run, overriding the configuration.
 
     Returns:
         str: The agent's final answer.
     """
-    gemini = GenerativeModel(config.MODEL_NAME)
+    agent = create_agent(AsyncAgent, max_tokens=max_tokens, max_cost=max_cost)
+    return await agent.execute(query)
 
-    agent = Agent(model=gemini)
-    agent.register(Name.WIKIPEDIA, wiki_search)
-    agent.register(Name.GOOGLE, google_search)
 
-    answer = agent.execute(query)
-    return answer
+def run(query: str, max_tokens: Optional[int] = None, max_cost: Optional[float] = None) -> str:
+    """
+    Sets up the agent, registers tools, and executes a query.
+
+    Args:
+        query (str): The query to execute.
+        max_tokens (Optional[int]): The token budget for the run, overriding the configuration.
+        max_cost (Optional[float]): The cost budget for the run, overriding the configuration.
+
+    Returns:
+        str: The agent's final answer.
+    """
+    return asyncio.run(run_async(query, max_tokens=max_tokens, max_cost=max_cost))
 
 
 if __name__ == "__main__":
+    init()
     query = "What is the age of the oldest tree in the country that has won the most FIFA World Cup titles?"
     final_answer = run(query)
     logger.info(final_answer)
@@ -0,0 +1,294 @@
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures import FIRST_COMPLETED
+from src.react.agent import create_agent
+from src.react.agent import AsyncAgent
+from src.config.logging import logger
+from concurrent.futures import Future
+from src.react.agent import StepType
+from concurrent.futures import wait
+from src.config.setup import init
+from src.react.agent import Agent
+from src.react.agent import Step
+from typing import Iterator
+from typing import Optional
+from typing import TextIO
+from typing import Dict
+from typing import List
+from typing import Set
+from typing import Any
+import multiprocessing
+import argparse
+import asyncio
+import json
+import time
+import os
+
+
+EXECUTORS = ("thread", "process", "async")
+
+
+def read_queries(path: str) -> Iterator[Dict[str, Any]]:
+    """
+    Streams query records from a JSONL file.
+
+    Each line must hold a "query"; records without an "id" are identified by their line number.
+
+    Args:
+        path (str): The path to the input JSONL file.
+
+    Yields:
+        Dict[str, Any]: The query records with a string "id".
+    """
+    with open(path, 'r', encoding='utf-8') as file:
+        for line_number, line in enumerate(file, 1):
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError as e:
+                logger.error("Skipping malformed line %s in %s: %s", line_number, path, e)
+                continue
+            record["id"] = str(record.get("id", line_number))
+            yield record
+
+
+def load_completed_ids(path: str) -> Set[str]:
+    """
+    Collects the IDs that already have a successful result in an output JSONL file.
+
+    Args:
+        path (str): The path to the output JSONL file.
+
+    Returns:
+        Set[str]: The completed IDs; failed and given-up results are not included so they are retried.
+    """
+    completed: Set[str] = set()
+    if not os.path.exists(path):
+        return completed
+    with open(path, 'r', encoding='utf-8') as file:
+        for line in file:
+            try:
+                result = json.loads(line)
+            except json.JSONDecodeError:
+                # A crash can leave a truncated last line; that query is simply run again.
+                continue
+            if result.get("status") == "ok":
+                completed.add(str(result["id"]))
+    return completed
+
+
+def _summarize(record: Dict[str, Any], steps: List[Step], answer: Optional[str],
+               error: Optional[Exception], started: float, agent: Optional[AsyncAgent] = None) -> Dict[str, Any]:
+    """
+    Builds the output record for a finished query.
+
+    Args:
+        record (Dict[str, Any]): The input query record.
+        steps (List[Step]): The steps produced by the run.
+        answer (Optional[str]): The final answer, if the run completed.
+        error (Optional[Exception]): The error raised by the run, if any.
+        started (float): The wall-clock start time of the run.
+        agent (Optional[AsyncAgent]): The agent that ran the query, for its token usage and whether it gave up.
+
+    Returns:
+        Dict[str, Any]: The result record with per-query stats. The status is "ok" for a real answer,
+        "gave_up" if the agent stopped early (model unreachable, budget or iteration limit) and
+        "error" if the run raised.
+    """
+    finished = time.time()
+    gave_up = agent.gave_up if agent is not None and error is None else None
+    if error is not None:
+        status = "error"
+    elif gave_up is not None:
+        status = "gave_up"
+    else:
+        status = "ok"
+    return {
+        "id": record["id"],
+        "query": record["query"],
+        "status": status,
+        "answer": answer,
+        "error": str(error) if error is not None else gave_up,
+        "iterations": max((step.iteration for step in steps), default=0),
+        "tool_calls": sum(1 for step in steps if step.type == StepType.ACTION),
+        "usage": agent.usage.model_dump() if agent is not None else None,
+        "latency_seconds": round(finished - started, 3),
+        "started_at": started,
+        "finished_at": finished
+    }
+
+
+def run_query(record: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Runs one query with a fresh synchronous agent; used by the thread and process executors.
+
+    Args:
+        record (Dict[str, Any]): The query record.
+
+    Returns:
+        Dict[str, Any]: The result record.
+    """
+    started = time.time()
+    steps: List[Step] = []
+    agent: Optional[AsyncAgent] = None
+    try:
+        agent = create_agent(Agent)
+        steps.extend(agent.steps(record["query"]))
+        return _summarize(record, steps, agent.answer, None, started, agent)
+    except Exception as e:
+        logger.error("Query %s failed: %s", record['id'], e)
+        return _summarize(record, steps, None, e, started, agent)
+
+
+async def run_query_async(record: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Runs one query with a fresh async agent on the running event loop.
+
+    Args:
+        record (Dict[str, Any]): The query record.
+
+    Returns:
+        Dict[str, Any]: The result record.
+    """
+    started = time.time()
+    steps: List[Step] = []
+    agent: Optional[AsyncAgent] = None
+    try:
+        agent = create_agent(AsyncAgent)
+        async for step in agent.steps(record["query"]):
+            steps.append(step)
+        return _summarize(record, steps, agent.answer, None, started, agent)
+    except Exception as e:
+        logger.error("Query %s failed: %s", record['id'], e)
+        return _summarize(record, steps, None, e, started, agent)
+
+
+def _write_result(out: TextIO, result: Dict[str, Any], counts: Dict[str, int]) -> None:
+    """
+    Appends a result to the output file immediately so progress survives a crash.
+
+    Args:
+        out (TextIO): The open output file.
+        result (Dict[str, Any]): The result record.
+        counts (Dict[str, int]): The running status counts to update.
+    """
+    out.write(json.dumps(result, ensure_ascii=False) + "\n")
+    out.flush()
+    counts[result["status"]] = counts.get(result["status"], 0) + 1
+    logger.info("Query %s finished with status %s in %ss", result['id'], result['status'], result['latency_seconds'])
+
+
+def _run_pooled(records: Iterator[Dict[str, Any]], out: TextIO, workers: int, executor: str,
+                max_in_flight: int, counts: Dict[str, int]) -> None:
+    """
+    Runs queries on a thread or process pool, keeping at most max_in_flight submitted at once.
+    """
+    if executor == "thread":
+        pool = ThreadPoolExecutor(max_workers=workers)
+    else:
+        # gRPC and the shared I/O pool are not fork-safe, so worker processes are spawned fresh.
+        pool = ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn"))
+    with pool:
+        in_flight: Set[Future] = set()
+        for record in records:
+            if len(in_flight) >= max_in_flight:
+                done, in_flight = wait(in_flight, return_when=FIRST_COMPLETED)
+                for future in done:
+                    _write_result(out, future.result(), counts)
+            in_flight.add(pool.submit(run_query, record))
+        for future in wait(in_flight).done:
+            _write_result(out, future.result(), counts)
+
+
+async def _run_async(records: Iterator[Dict[str, Any]], out: TextIO, workers: int,
+                     max_in_flight: int, counts: Dict[str, int]) -> None:
+    """
+    Runs queries as coroutines on one event loop, with at most `workers` agents running at once.
+    """
+    semaphore = asyncio.Semaphore(workers)
+
+    async def bounded(record: Dict[str, Any]) -> Dict[str, Any]:
+        async with semaphore:
+            return await run_query_async(record)
+
+    in_flight: Set[asyncio.Task] = set()
+    for record in records:
+        if len(in_flight) >= max_in_flight:
+            done, in_flight = await asyncio.wait(in_flight, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                _write_result(out, task.result(), counts)
+        in_flight.add(asyncio.ensure_future(bounded(record)))
+    if in_flight:
+        done, _ = await asyncio.wait(in_flight)
+        for task in done:
+            _write_result(out, task.result(), counts)
+
+
+def run_batch(input_path: str, output_path: str, workers: int = 4, executor: str = "thread",
+              max_in_flight: Optional[int] = None) -> Dict[str, int]:
+    """
+    Runs every query in an input JSONL file and streams results to an output JSONL file.
+
+    Results are appended as they complete; on restart, IDs that already have a real answer are skipped.
+
+    Args:
+        input_path (str): The path to the input JSONL file.
+        output_path (str): The path to the output JSONL file.
+        workers (int): The number of queries that may run concurrently.
+        executor (str): One of "thread", "process" or "async".
+        max_in_flight (Optional[int]): The maximum number of queued and running queries (default 2 * workers).
+
+    Returns:
+        Dict[str, int]: Counts of results by status, plus the number of skipped queries.
+    """
+    if executor not in EXECUTORS:
+        raise ValueError(f"Unsupported executor {executor}. Use one of {', '.join(EXECUTORS)}.")
+    max_in_flight = max_in_flight or 2 * workers
+
+    completed = load_completed_ids(output_path)
+    counts: Dict[str, int] = {"ok": 0, "gave_up": 0, "error": 0, "skipped": 0}
+
+    def pending() -> Iterator[Dict[str, Any]]:
+        for record in read_queries(input_path):
+            if record["id"] in completed:
+                counts["skipped"] += 1
+                continue
+            yield record
+
+    directory = os.path.dirname(output_path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+
+    logger.info("Running batch %s -> %s with %s %s workers", input_path, output_path, workers, executor)
+    with open(output_path, 'a', encoding='utf-8') as out:
+        if executor == "async":
+            asyncio.run(_run_async(pending(), out, workers, max_in_flight, counts))
+        else:
+            _run_pooled(pending(), out, workers, executor, max_in_flight, counts)
+
+    logger.info("Batch finished: %s", counts)
+    return counts
+
+
+def main() -> None:
+    """
+    Command-line entry point for batch runs.
+    """
+    parser = argparse.ArgumentParser(description="Run ReAct queries from a JSONL file.")
+    parser.add_argument("--input", required=True, help="Input JSONL file with one {\"id\", \"query\"} per line.")
+    parser.add_argument("--output", required=True, help="Output JSONL file; existing successful IDs are skipped.")
+    parser.add_argument("--workers", type=int, default=4, help="Number of queries run concurrently.")
+    parser.add_argument("--executor", choices=EXECUTORS, default="thread", help="How queries are run concurrently.")
+    parser.add_argument("--max-in-flight", type=int, default=None, help="Maximum queued and running queries.")
+    args = parser.parse_args()
+
+    # A batch is long-running, so pay every initialization cost before the workers start.
+    init(warm=True)
+    run_batch(args.input, args.output, workers=args.workers, executor=args.executor,
+              max_in_flight=args.max_in_flight)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,237 @@
+from src.tools.observation import SENTENCE_BOUNDARY
+from src.tools.observation import STOPWORDS
+from src.tools.observation import WORD
+from typing import Optional
+from typing import Counter
+from typing import Dict
+from typing import List
+from typing import Set
+from typing import Any
+import collections
+import json
+import math
+
+
+def _tokens(text: str) -> List[str]:
+    """
+    Extracts the lower-cased content words of a text, keeping repeats for term frequencies.
+    """
+    return [word for word in WORD.findall(text.lower()) if word not in STOPWORDS]
+
+
+def _units(text: str) -> List[str]:
+    """
+    Splits an observation into the smallest passages worth retrieving on their own.
+
+    Search results become one unit each and Wikipedia summaries (and plain text) one per sentence.
+
+    Args:
+        text (str): The observation text, usually compact JSON.
+
+    Returns:
+        List[str]: The units, in their original order.
+    """
+    try:
+        parsed: Any = json.loads(text)
+    except json.JSONDecodeError:
+        parsed = None
+
+    if isinstance(parsed, dict) and isinstance(parsed.get("top_results"), list):
+        units = []
+        for result in parsed["top_results"]:
+            if not isinstance(result, dict):
+                continue
+            unit = f"{result.get('title', '')}: {result.get('snippet', '')}".strip(": ")
+            if result.get("link"):
+                unit = f"{unit} ({result['link']})"
+            units.append(unit)
+        return units
+    if isinstance(parsed, dict) and isinstance(parsed.get("summary"), str):
+        sentences = SENTENCE_BOUNDARY.split(" ".join(parsed["summary"].split()))
+        if parsed.get("title"):
+            sentences[0] = f"{parsed['title']}: {sentences[0]}"
+        return sentences
+    return SENTENCE_BOUNDARY.split(" ".join(text.split()))
+
+
+def _pack(units: List[str], max_chars: int) -> List[str]:
+    """
+    Packs consecutive units into chunks of at most max_chars, splitting any unit that is longer.
+    """
+    chunks: List[str] = []
+    current = ""
+    for unit in units:
+        while len(unit) > max_chars:
+            cut = unit.rfind(" ", 0, max_chars)
+            cut = cut if cut > 0 else max_chars
+            if current:
+                chunks.append(current)
+                current = ""
+            chunks.append(unit[:cut])
+            unit = unit[cut:].lstrip()
+        if not unit:
+            continue
+        if current and len(current) + len(unit) + 1 > max_chars:
+            chunks.append(current)
+            current = unit
+        else:
+            current = f"{current} {unit}" if current else unit
+    if current:
+        chunks.append(current)
+    return chunks
+
+
+def _leading(units: List[str], max_chars: int) -> str:
+    """
+    Returns the leading units of an observation that fit within max_chars, as its one-line summary.
+    """
+    summary = ""
+    for unit in units:
+        if len(summary) + len(unit) + 1 > max_chars:
+            break
+        summary = f"{summary} {unit}" if summary else unit
+    if summary:
+        return summary
+    return units[0][:max_chars].rstrip() + "..." if units else ""
+
+
+class Chunk:
+    """
+    An indexed passage of an observation, with its term frequencies.
+    """
+
+    def __init__(self, chunk_id: int, source: str, text: str, step: int):
+        self.id = chunk_id
+        self.source = source
+        self.text = text
+        self.step = step
+        self.terms: Counter[str] = collections.Counter(_tokens(text))
+        self.length = sum(self.terms.values())
+
+    def render(self) -> str:
+        return f"[{self.id}] {self.source}: {self.text}"
+
+
+class EvidenceStore:
+    """
+    Per-run index of tool observations, so each prompt carries only the evidence relevant to the next step.
+
+    Observations are split into chunks and indexed with BM25 as they arrive. The history keeps a
+    one-line summary of each observation; the prompt gets the latest step's chunks in full plus
+    the top_k earlier chunks most relevant to the query and the current thought. Prompt size thus
+    stays roughly constant however many lookups a run makes.
+    """
+
+    def __init__(self, chunk_chars: int = 400, top_k: int = 4, summary_chars: int = 160,
+                 k1: float = 1.5, b: float = 0.75):
+        """
+        Initializes an empty store.
+
+        Args:
+            chunk_chars (int): The maximum length of a chunk.
+            top_k (int): The number of earlier chunks retrieved into each prompt.
+            summary_chars (int): The maximum length of an observation's summary in the history.
+            k1 (float): The BM25 term frequency saturation.
+            b (float): The BM25 document length normalization.
+        """
+        self.chunk_chars = chunk_chars
+        self.top_k = top_k
+        self.summary_chars = summary_chars
+        self.k1 = k1
+        self.b = b
+        self.chunks: List[Chunk] = []
+        self.doc_freq: Counter[str] = collections.Counter()
+        self.total_length = 0
+        self.latest_step = 0
+        self._seen: Set[str] = set()
+
+    def add(self, source: str, text: str, step: int) -> str:
+        """
+        Chunks and indexes an observation.
+
+        Chunks identical to ones already stored, e.g. from a repeated lookup, are not indexed again.
+
+        Args:
+            source (str): Where the observation came from, e.g. the tool and its input.
+            text (str): The observation text.
+            step (int): The iteration in which the observation was made.
+
+        Returns:
+            str: The observation's summary for the history, referencing its chunks by id.
+        """
+        units = [unit for unit in _units(text) if unit]
+        ids: List[int] = []
+        for passage in _pack(units, self.chunk_chars):
+            fingerprint = " ".join(passage.lower().split())
+            if fingerprint in self._seen:
+                continue
+            self._seen.add(fingerprint)
+            chunk = Chunk(len(self.chunks) + 1, source, passage, step)
+            self.chunks.append(chunk)
+            self.doc_freq.update(chunk.terms.keys())
+            self.total_length += chunk.length
+            ids.append(chunk.id)
+        self.latest_step = max(self.latest_step, step)
+
+        summary = _leading(units, self.summary_chars)
+        if not ids:
+            return f"[no new evidence] {summary}"
+        reference = f"[evidence {ids[0]}]" if len(ids) == 1 else f"[evidence {ids[0]}-{ids[-1]}]"
+        return f"{reference} {summary}"
+
+    def search(self, query: str, k: int, exclude: Optional[Set[int]] = None) -> List[Chunk]:
+        """
+        Ranks the stored chunks against a query with BM25.
+
+        Args:
+            query (str): The text to match, e.g. the user's query and the current thought.
+            k (int): The maximum number of chunks to return.
+            exclude (Optional[Set[int]]): Chunk ids not to return.
+
+        Returns:
+            List[Chunk]: The best matching chunks, best first; chunks sharing no term are never returned.
+        """
+        if not self.chunks or k <= 0:
+            return []
+        count = len(self.chunks)
+        average_length = self.total_length / count or 1.0
+        idf: Dict[str, float] = {
+            term: math.log(1 + (count - self.doc_freq[term] + 0.5) / (self.doc_freq[term] + 0.5))
+            for term in set(_tokens(query)) if term in self.doc_freq
+        }
+        if not idf:
+            return []
+
+        scored = []
+        for chunk in self.chunks:
+            if exclude and chunk.id in exclude:
+                continue
+            norm = self.k1 * (1 - self.b + self.b * chunk.length / average_length)
+            score = sum(
+                weight * chunk.terms[term] * (self.k1 + 1) / (chunk.terms[term] + norm)
+                for term, weight in idf.items() if term in chunk.terms
+            )
+            if score > 0:
+                scored.append((score, chunk))
+        scored.sort(key=lambda item: (-item[0], item[1].id))
+        return [chunk for _, chunk in scored[:k]]
+
+    def render(self, query: str) -> str:
+        """
+        Renders the evidence for the next prompt: the latest step's chunks and the most relevant earlier ones.
+
+        Args:
+            query (str): The text to retrieve for, e.g. the user's query and the current thought.
+
+        Returns:
+            str: The evidence lines in the order they were observed, or an empty string if nothing is stored.
+        """
+        latest = [chunk for chunk in self.chunks if chunk.step == self.latest_step]
+        relevant = self.search(query, self.top_k, exclude={chunk.id for chunk in latest})
+        selected = sorted(relevant + latest, key=lambda chunk: chunk.id)
+        if not selected:
+            return ""
+        return "\n".join(["Evidence:"] + [chunk.render() for chunk in selected])
+
+    def __len__(self) -> int:
+        return len(self.chunks)
@@ -0,0 +1,140 @@
+from src.llm.tokens import estimate_tokens
+from src.llm.parse import parse_json
+from typing import Optional
+from typing import List
+import json
+import re
+
+
+SENTENCE_BOUNDARY = re.compile(r"(?<=[.!?])\s+")
+
+
+def _key_facts(text: str, max_chars: int) -> str:
+    """
+    Shortens a text to its leading sentences, staying within a character limit.
+
+    Args:
+        text (str): The text to shorten.
+        max_chars (int): The maximum length of the result.
+
+    Returns:
+        str: The leading sentences of the text, or a truncated prefix if the first sentence is too long.
+    """
+    text = " ".join(text.split())
+    if len(text) <= max_chars:
+        return text
+    facts = ""
+    for sentence in SENTENCE_BOUNDARY.split(text):
+        if len(facts) + len(sentence) + 1 > max_chars:
+            break
+        facts = f"{facts} {sentence}" if facts else sentence
+    return facts or text[:max_chars].rstrip() + "..."
+
+
+class Entry:
+    """
+    A rendered history line together with its token estimate.
+    """
+
+    def __init__(self, role: str, content: str):
+        self.role = role
+        self.content = content
+        self.text = f"{role}: {content}"
+        self.tokens = estimate_tokens(self.text)
+        self.compacted = False
+
+
+class History:
+    """
+    Keeps the rendered conversation history incrementally and within a token budget.
+
+    Lines are rendered once when appended. When the estimated size exceeds the budget, older
+    entries are compacted (raw JSON thoughts reduced to their reasoning, observations to their
+    leading sentences) and, if that is not enough, dropped; the most recent entries stay verbatim.
+    """
+
+    def __init__(self, token_budget: Optional[int] = None, keep_recent: int = 6, compact_chars: int = 300):
+        """
+        Initializes an empty history.
+
+        Args:
+            token_budget (Optional[int]): The maximum estimated tokens of the rendered history, or None for no limit.
+            keep_recent (int): The number of most recent entries that are never compacted.
+            compact_chars (int): The maximum length of a compacted entry's content.
+        """
+        self.token_budget = token_budget
+        self.keep_recent = keep_recent
+        self.compact_chars = compact_chars
+        self.entries: List[Entry] = []
+        self.omitted = 0
+        self.tokens = 0
+        self._rendered: Optional[str] = ""
+
+    def append(self, role: str, content: str) -> None:
+        """
+        Adds a message, compacting older entries if the budget is exceeded.
+
+        Args:
+            role (str): The role of the message sender.
+            content (str): The content of the message.
+        """
+        entry = Entry(role, content)
+        self.entries.append(entry)
+        self.tokens += entry.tokens
+        if self._rendered is not None:
+            self._rendered = f"{self._rendered}\n{entry.text}" if self._rendered else entry.text
+        if self.token_budget is not None and self.tokens > self.token_budget:
+            self.compact()
+
+    def render(self) -> str:
+        """
+        Returns the rendered history, re-joining lines only after a compaction.
+
+        Returns:
+            str: The history as newline-separated "role: content" lines.
+        """
+        if self._rendered is None:
+            lines = [entry.text for entry in self.entries]
+            if self.omitted:
+                lines.insert(1, f"[{self.omitted} earlier steps omitted]")
+            self._rendered = "\n".join(lines)
+        return self._rendered
+
+    def _compact_content(self, entry: Entry) -> str:
+        """
+        Reduces an entry's content to its key facts.
+        """
+        content = entry.content
+        if content.startswith("Thought: "):
+            try:
+                thought = parse_json(content[len("Thought: "):])[0].get("thought", "")
+                return f"Thought: {_key_facts(str(thought), self.compact_chars)}"
+            except (json.JSONDecodeError, AttributeError):
+                pass
+        return _key_facts(content, self.compact_chars)
+
+    def compact(self) -> None:
+        """
+        Compacts, then drops, the oldest entries until the history fits the token budget.
+        """
+        # The first entry is the user's query and always stays.
+        for index in range(1, max(1, len(self.entries) - self.keep_recent)):
+            if self.tokens <= self.token_budget:
+                break
+            entry = self.entries[index]
+            if entry.compacted:
+                continue
+            compacted = Entry(entry.role, self._compact_content(entry))
+            compacted.compacted = True
+            self.tokens += compacted.tokens - entry.tokens
+            self.entries[index] = compacted
+
+        while self.tokens > self.token_budget and len(self.entries) > self.keep_recent + 1:
+            dropped = self.entries.pop(1)
+            self.tokens -= dropped.tokens
+            self.omitted += 1
+
+        self._rendered = None
+
+    def __len__(self) -> int:
+        return len(self.entries)
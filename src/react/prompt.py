@@ -0,0 +1,105 @@
+from src.utils.io import read_file
+from typing import Optional
+from typing import Tuple
+from typing import Dict
+from typing import List
+import functools
+import threading
+import string
+
+
+# Fields that change on every call; everything before the first of them is static per tool set.
+DYNAMIC_FIELDS = ("query", "history")
+
+
+class PromptTemplate:
+    """
+    A prompt template parsed once into a static prefix and a dynamic suffix.
+
+    The prefix (instructions and tool list) is rendered once per tool set and cached; each call
+    only concatenates the suffix's literal segments with the query and history. The stable prefix
+    is also what a provider-side context cache would key on.
+    """
+
+    def __init__(self, template: str):
+        """
+        Parses the template.
+
+        Args:
+            template (str): The template text, using str.format placeholders and {{ }} escapes.
+        """
+        segments: List[Tuple[str, Optional[str]]] = [
+            (literal, field) for literal, field, _, _ in string.Formatter().parse(template)
+        ]
+        split = next((i for i, (_, field) in enumerate(segments) if field in DYNAMIC_FIELDS), len(segments))
+        self._prefix_segments = segments[:split]
+        # The literal before the first dynamic field belongs to the prefix.
+        if split < len(segments):
+            self._prefix_segments.append((segments[split][0], None))
+            self._suffix_segments = [("", segments[split][1])] + segments[split + 1:]
+        else:
+            self._suffix_segments = []
+        self._prefixes: Dict[str, str] = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _render(segments: List[Tuple[str, Optional[str]]], values: Dict[str, str]) -> str:
+        return "".join(literal + (values[field] if field is not None else "") for literal, field in segments)
+
+    def prefix(self, tools: str) -> str:
+        """
+        Returns the static part of the prompt for a tool list, rendering it only once.
+
+        Args:
+            tools (str): The comma-separated tool names.
+
+        Returns:
+            str: The rendered static prefix.
+        """
+        prefix = self._prefixes.get(tools)
+        if prefix is None:
+            prefix = self._render(self._prefix_segments, {"tools": tools})
+            with self._lock:
+                self._prefixes[tools] = prefix
+        return prefix
+
+    def suffix(self, query: str, history: str) -> str:
+        """
+        Renders the dynamic part of the prompt.
+
+        Args:
+            query (str): The user's query.
+            history (str): The rendered conversation history.
+
+        Returns:
+            str: The rendered dynamic suffix.
+        """
+        return self._render(self._suffix_segments, {"query": query, "history": history})
+
+    def render(self, tools: str, query: str, history: str) -> str:
+        """
+        Renders the full prompt.
+
+        Args:
+            tools (str): The comma-separated tool names.
+            query (str): The user's query.
+            history (str): The rendered conversation history.
+
+        Returns:
+            str: The prompt text.
+        """
+        return self.prefix(tools) + self.suffix(query, history)
+
+
+@functools.lru_cache(maxsize=None)
+def load_prompt(path: str) -> PromptTemplate:
+    """
+    Loads and compiles a prompt template file once per process.
+
+    Args:
+        path (str): The path to the template file.
+
+    Returns:
+        PromptTemplate: The compiled template shared by all agents.
+    """
+    return PromptTemplate(read_file(path))
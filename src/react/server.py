@@ -0,0 +1,433 @@
+from http.server import BaseHTTPRequestHandler
+from http.server import ThreadingHTTPServer
+from src.utils.ratelimit import RateLimiter
+from src.utils.ratelimit import set_limiter
+from src.utils.metrics import get_metrics
+from src.react.agent import create_agent
+from src.react.agent import AsyncAgent
+from src.config.logging import logger
+from src.config.setup import config
+from src.config.setup import init
+from src.react.agent import Step
+from collections import deque
+from typing import Callable
+from typing import Optional
+from typing import Iterator
+from typing import Tuple
+from typing import Deque
+from typing import Dict
+from typing import Any
+import threading
+import argparse
+import asyncio
+import queue
+import json
+import time
+
+
+# Requests larger than this are rejected before the body is read.
+MAX_BODY_BYTES = 64 * 1024
+
+AgentFactory = Callable[[], AsyncAgent]
+
+
+def step_to_dict(step: Step) -> Dict[str, Any]:
+    """
+    Converts a step into the JSON object sent to clients.
+
+    Args:
+        step (Step): The step to convert.
+
+    Returns:
+        Dict[str, Any]: The step's type, iteration, content, action and partial flag.
+    """
+    return {
+        "type": str(step.type),
+        "iteration": step.iteration,
+        "content": step.content,
+        "action": step.action.model_dump() if step.action else None,
+        "partial": step.partial
+    }
+
+
+class AgentPool:
+    """
+    A fixed set of warm agents driven by one background event loop.
+
+    Agents are created once, with their model client, template and tools loaded, and reused
+    across requests; each run resets the agent's per-run state. When every agent is busy, up to
+    max_waiting requests wait up to queue_timeout seconds for one to free up; the rest are
+    turned away immediately so an overloaded server fails fast instead of queueing unboundedly.
+    """
+
+    def __init__(self, factory: AgentFactory, size: int = 8, max_waiting: int = 16, queue_timeout: float = 5.0):
+        """
+        Creates the agents and starts the event loop thread.
+
+        Args:
+            factory (AgentFactory): Creates one ready-to-run agent.
+            size (int): The number of agents, i.e. the maximum number of concurrent runs.
+            max_waiting (int): The maximum number of requests waiting for an agent.
+            queue_timeout (float): How long a request may wait for an agent before it is rejected.
+        """
+        self.size = size
+        self.max_waiting = max_waiting
+        self.queue_timeout = queue_timeout
+        self.waiting = 0
+        self._idle: Deque[AsyncAgent] = deque(factory() for _ in range(size))
+        self._slots = threading.Semaphore(size)
+        self._lock = threading.Lock()
+        self.loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self.loop.run_forever, name="agent-pool", daemon=True)
+        self._thread.start()
+
+    def stats(self) -> Dict[str, int]:
+        """
+        Returns the number of idle, busy and waiting requests.
+        """
+        with self._lock:
+            idle = len(self._idle)
+            return {"size": self.size, "idle": idle, "busy": self.size - idle, "waiting": self.waiting}
+
+    def acquire(self) -> Optional[AsyncAgent]:
+        """
+        Takes an idle agent, waiting for one if the wait queue has room.
+
+        Returns:
+            Optional[AsyncAgent]: The agent, or None if the request should be rejected.
+        """
+        if not self._slots.acquire(blocking=False):
+            with self._lock:
+                if self.waiting >= self.max_waiting:
+                    get_metrics().inc("server_rejected", reason="queue_full")
+                    return None
+                self.waiting += 1
+            started = time.perf_counter()
+            try:
+                admitted = self._slots.acquire(timeout=self.queue_timeout)
+            finally:
+                with self._lock:
+                    self.waiting -= 1
+            get_metrics().observe("server_queue_seconds", time.perf_counter() - started)
+            if not admitted:
+                get_metrics().inc("server_rejected", reason="timeout")
+                return None
+        with self._lock:
+            return self._idle.popleft()
+
+    def release(self, agent: AsyncAgent) -> None:
+        """
+        Returns an agent to the pool.
+
+        Args:
+            agent (AsyncAgent): The agent taken with acquire, whose run has finished.
+        """
+        with self._lock:
+            self._idle.append(agent)
+        self._slots.release()
+
+    def run(self, agent: AsyncAgent, query: str) -> Iterator[Step]:
+        """
+        Runs a query on the pool's event loop, yielding steps to the calling thread as they complete.
+
+        If the caller stops iterating early (e.g. the client disconnected), the run is cancelled and
+        this returns only once it has stopped, so the agent is safe to reuse.
+
+        Args:
+            agent (AsyncAgent): The agent taken with acquire.
+            query (str): The query to run.
+
+        Yields:
+            Step: The run's steps.
+        """
+        steps: "queue.Queue[Any]" = queue.Queue()
+        finished = object()
+
+        async def drive() -> None:
+            try:
+                async for step in agent.steps(query):
+                    steps.put(step)
+            except Exception as e:
+                steps.put(e)
+            finally:
+                steps.put(finished)
+
+        future = asyncio.run_coroutine_threadsafe(drive(), self.loop)
+        done = False
+        try:
+            while True:
+                item = steps.get()
+                if item is finished:
+                    done = True
+                    return
+                if isinstance(item, Exception):
+                    raise item
+                yield item
+        finally:
+            if not done:
+                future.cancel()
+                while steps.get() is not finished:
+                    pass
+
+    def close(self) -> None:
+        """
+        Stops the event loop thread.
+        """
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self._thread.join(timeout=5)
+
+
+class AgentRequestHandler(BaseHTTPRequestHandler):
+    """
+    Serves POST /query (JSON or server-sent events), GET /health and GET /metrics.
+    """
+    server: "AgentServer"
+
+    def log_message(self, format: str, *args: Any) -> None:
+        logger.info("%s - " + format, self.address_string(), *args)
+
+    def _send_json(self, status: int, body: Dict[str, Any], headers: Optional[Dict[str, str]] = None) -> None:
+        payload = json.dumps(body, ensure_ascii=False).encode('utf-8')
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def do_GET(self) -> None:
+        if self.path == "/health":
+            self._send_json(200, {"status": "ok", **self.server.pool.stats()})
+        elif self.path == "/metrics":
+            payload = get_metrics().to_prometheus().encode('utf-8')
+            self.send_response(200)
+            self.send_header("Content-Type", "text/plain; version=0.0.4")
+            self.send_header("Content-Length", str(len(payload)))
+            self.end_headers()
+            self.wfile.write(payload)
+        else:
+            self._send_json(404, {"error": f"Unknown path {self.path}"})
+
+    def _read_request(self) -> Tuple[Optional[Dict[str, Any]], Optional[Tuple[int, str]]]:
+        """
+        Reads and validates the JSON body of a query request.
+
+        Returns:
+            Tuple[Optional[Dict[str, Any]], Optional[Tuple[int, str]]]: The body, or the error status and message.
+        """
+        try:
+            length = int(self.headers.get("Content-Length", 0))
+        except ValueError:
+            return None, (400, "Invalid Content-Length")
+        if length > MAX_BODY_BYTES:
+            return None, (413, f"Request body exceeds {MAX_BODY_BYTES} bytes")
+        try:
+            body = json.loads(self.rfile.read(length) or b"{}")
+        except json.JSONDecodeError as e:
+            return None, (400, f"Invalid JSON: {e}")
+        if not isinstance(body, dict) or not str(body.get("query", "")).strip():
+            return None, (400, "Expected a JSON object with a non-empty \"query\"")
+        return body, None
+
+    def do_POST(self) -> None:
+        if self.path != "/query":
+            self._send_json(404, {"error": f"Unknown path {self.path}"})
+            return
+        body, error = self._read_request()
+        if error is not None:
+            self._send_json(error[0], {"error": error[1]})
+            return
+
+        pool = self.server.pool
+        agent = pool.acquire()
+        if agent is None:
+            logger.warning("Rejecting query: all %s agents are busy", pool.size)
+            self._send_json(503, {"error": "Server is at capacity; retry later", **pool.stats()},
+                            headers={"Retry-After": str(max(1, round(pool.queue_timeout)))})
+            return
+
+        stream = body.get("stream", "text/event-stream" in self.headers.get("Accept", ""))
+        try:
+            if stream:
+                self._stream(pool, agent, str(body["query"]))
+            else:
+                self._respond(pool, agent, str(body["query"]))
+        finally:
+            pool.release(agent)
+
+    def _respond(self, pool: AgentPool, agent: AsyncAgent, query: str) -> None:
+        """
+        Runs the query to completion and returns the answer and every step as one JSON response.
+        """
+        try:
+            steps = [step_to_dict(step) for step in pool.run(agent, query) if not step.partial]
+        except Exception as e:
+            logger.error("Query failed: %s", e)
+            self._send_json(500, {"error": str(e), "run_id": agent.run_id})
+            return
+        self._send_json(200, {
+            "run_id": agent.run_id,
+            "answer": steps[-1]["content"] if steps else None,
+            "steps": steps,
+            "usage": agent.usage.model_dump()
+        })
+
+    def _stream(self, pool: AgentPool, agent: AsyncAgent, query: str) -> None:
+        """
+        Streams each step as a server-sent event named after its type, then a final "done" event.
+        """
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Cache-Control", "no-cache")
+        self.send_header("Connection", "close")
+        self.end_headers()
+        self.close_connection = True
+        try:
+            for step in pool.run(agent, query):
+                self._send_event(str(step.type), step_to_dict(step))
+            self._send_event("done", {"run_id": agent.run_id, "usage": agent.usage.model_dump()})
+        except (BrokenPipeError, ConnectionResetError):
+            # Leaving the step iterator cancels the run.
+            logger.info("Client disconnected; cancelled run %s", agent.run_id)
+            get_metrics().inc("server_disconnects")
+        except Exception as e:
+            logger.error("Query failed: %s", e)
+            self._send_event("error", {"error": str(e), "run_id": agent.run_id})
+
+    def _send_event(self, event: str, data: Dict[str, Any]) -> None:
+        self.wfile.write(f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n".encode('utf-8'))
+        self.wfile.flush()
+
+
+class AgentServer(ThreadingHTTPServer):
+    """
+    A threaded HTTP server whose handler threads share one pool of warm agents.
+    """
+    daemon_threads = True
+
+    def __init__(self, address: Tuple[str, int], pool: AgentPool):
+        super().__init__(address, AgentRequestHandler)
+        self.pool = pool
+
+    def server_close(self) -> None:
+        super().server_close()
+        self.pool.close()
+
+
+def default_factory(stream: bool = False) -> AgentFactory:
+    """
+    Returns a factory for agents that share one Gemini client and the registry's tools.
+
+    Args:
+        stream (bool): Whether agents stream model responses, yielding partial thought and answer steps.
+
+    Returns:
+        AgentFactory: The agent factory.
+    """
+    from vertexai.generative_models import GenerativeModel
+
+    model = GenerativeModel(config.MODEL_NAME)
+    return lambda: create_agent(AsyncAgent, stream=stream, model=model)
+
+
+def fake_factory(iterations: int = 3, model_latency: float = 0.0, tool_latency: float = 0.0,
+                 stream: bool = False) -> AgentFactory:
+    """
+    Returns a factory for agents backed by the offline fake model and fake tools, for local testing.
+
+    As in the loop benchmark, the on-disk response cache is disabled and the Gemini rate limit
+    lifted for the rest of the process, so fake runs neither write to ./data/cache nor wait on
+    (or share) the real model's budget.
+
+    Args:
+        iterations (int): The number of model calls per run, including the final answer.
+        model_latency (float): The simulated model response time in seconds.
+        tool_latency (float): The simulated tool lookup time in seconds.
+        stream (bool): Whether agents stream model responses.
+
+    Returns:
+        AgentFactory: The agent factory.
+    """
+    from src.bench.fakes import FakeGenerativeModel
+    from src.bench.fakes import build_script
+    from src.bench.fakes import fake_wiki
+    from src.bench.fakes import fake_serp
+
+    config.LLM_CACHE['enabled'] = False
+    set_limiter("gemini", RateLimiter("gemini"))
+
+    def factory() -> AsyncAgent:
+        model = FakeGenerativeModel(build_script(iterations), latency=model_latency, cycle=True)
+        agent = AsyncAgent(model=model, stream=stream)
+        agent.register("wikipedia", fake_wiki(tool_latency))
+        agent.register("google", fake_serp(tool_latency))
+        agent.max_iterations = iterations
+        return agent
+    return factory
+
+
+def create_server(factory: AgentFactory, host: Optional[str] = None, port: Optional[int] = None,
+                  workers: Optional[int] = None, max_waiting: Optional[int] = None,
+                  queue_timeout: Optional[float] = None) -> AgentServer:
+    """
+    Creates the HTTP server and its warm agent pool, falling back to the server settings in the configuration.
+
+    Args:
+        factory (AgentFactory): Creates one ready-to-run agent.
+        host (Optional[str]): The interface to bind.
+        port (Optional[int]): The port to bind; 0 picks a free one.
+        workers (Optional[int]): The number of warm agents.
+        max_waiting (Optional[int]): The maximum number of requests waiting for an agent.
+        queue_timeout (Optional[float]): How long a request may wait for an agent.
+
+    Returns:
+        AgentServer: The bound server, not yet serving.
+    """
+    settings = config.SERVER
+    pool = AgentPool(
+        factory,
+        size=workers if workers is not None else settings.get('workers', 8),
+        max_waiting=max_waiting if max_waiting is not None else settings.get('max_waiting', 16),
+        queue_timeout=queue_timeout if queue_timeout is not None else settings.get('queue_timeout', 5.0)
+    )
+    address = (host or settings.get('host', '127.0.0.1'), port if port is not None else settings.get('port', 8080))
+    return AgentServer(address, pool)
+
+
+def main() -> None:
+    """
+    Command-line entry point for the HTTP server.
+    """
+    parser = argparse.ArgumentParser(description="Serve the ReAct agent over HTTP.")
+    parser.add_argument("--host", default=None, help="Interface to bind.")
+    parser.add_argument("--port", type=int, default=None, help="Port to bind.")
+    parser.add_argument("--workers", type=int, default=None, help="Number of warm agents, i.e. concurrent runs.")
+    parser.add_argument("--max-waiting", type=int, default=None, help="Requests allowed to wait for a free agent.")
+    parser.add_argument("--queue-timeout", type=float, default=None, help="Seconds a request may wait for an agent.")
+    parser.add_argument("--stream", action="store_true", help="Stream model responses, sending partial steps.")
+    parser.add_argument("--fake", action="store_true", help="Use the offline fake model and tools.")
+    parser.add_argument("--fake-iterations", type=int, default=3, help="Model calls per run with --fake.")
+    parser.add_argument("--fake-latency", type=float, default=0.0, help="Simulated model and tool latency with --fake.")
+    args = parser.parse_args()
+
+    init(warm=not args.fake)
+    if args.fake:
+        factory = fake_factory(args.fake_iterations, args.fake_latency, args.fake_latency, stream=args.stream)
+    else:
+        factory = default_factory(stream=args.stream)
+
+    server = create_server(factory, host=args.host, port=args.port, workers=args.workers,
+                           max_waiting=args.max_waiting, queue_timeout=args.queue_timeout)
+    host, port = server.server_address[:2]
+    logger.info("Serving %s agents on http://%s:%s", server.pool.size, host, port)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
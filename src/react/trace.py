@@ -0,0 +1,197 @@
+from src.config.logging import logger
+from src.config.setup import config
+from pydantic import BaseModel
+from typing import Optional
+from pydantic import Field
+from typing import Dict
+from typing import List
+import threading
+import atexit
+import queue
+import json
+import time
+import os
+
+
+class TraceEvent(BaseModel):
+    """
+    Represents one structured trace record of an agent run.
+    """
+    run_id: str = Field(..., description="The identifier of the run that produced the event.")
+    kind: str = Field(..., description="The event kind, e.g. message, iteration or span.")
+    iteration: int = Field(..., description="The iteration in which the event occurred.")
+    role: Optional[str] = Field(None, description="The role of the message sender, for message events.")
+    content: Optional[str] = Field(None, description="The message content, for message events.")
+    name: Optional[str] = Field(None, description="The phase name, for span events.")
+    duration_ms: Optional[float] = Field(None, description="The phase duration in milliseconds, for span events.")
+    attributes: Optional[Dict[str, str]] = Field(None, description="Extra span labels, such as the tool name or error.")
+    timestamp: float = Field(default_factory=time.time, description="The Unix time at which the event was emitted.")
+
+
+class TraceSink:
+    """
+    Receives trace events from agents. Subclasses decide where (and whether) they are stored.
+    """
+
+    def emit(self, event: TraceEvent) -> None:
+        """
+        Records an event. Implementations must not block on I/O.
+
+        Args:
+            event (TraceEvent): The event to record.
+        """
+        raise NotImplementedError
+
+    def flush(self) -> None:
+        """
+        Blocks until every event emitted so far has been persisted.
+        """
+
+    def close(self) -> None:
+        """
+        Flushes outstanding events and releases resources.
+        """
+
+
+class NullTraceSink(TraceSink):
+    """
+    Discards every event; used for benchmark runs.
+    """
+
+    def emit(self, event: TraceEvent) -> None:
+        pass
+
+
+class FileTraceSink(TraceSink):
+    """
+    Writes events as JSONL from a background thread, batching writes so agents never wait on file I/O.
+
+    Events go either to one file per run (`<directory>/<run_id>.jsonl`) or to a single shared
+    `trace.jsonl` that is rotated once it exceeds `max_bytes`.
+    """
+
+    def __init__(self, directory: str, per_run: bool = True, max_bytes: int = 10 * 1024 * 1024,
+                 backups: int = 5, flush_interval: float = 0.5):
+        """
+        Starts the background writer.
+
+        Args:
+            directory (str): The directory that receives trace files.
+            per_run (bool): Whether each run gets its own file instead of a shared rotated file.
+            max_bytes (int): The size at which the shared file is rotated.
+            backups (int): The number of rotated shared files to keep.
+            flush_interval (float): The maximum time, in seconds, an event waits before being written.
+        """
+        os.makedirs(directory, exist_ok=True)
+        self.directory = directory
+        self.per_run = per_run
+        self.max_bytes = max_bytes
+        self.backups = backups
+        self.flush_interval = flush_interval
+        self._queue: "queue.Queue[Optional[TraceEvent]]" = queue.Queue()
+        self._closed = False
+        self._writer = threading.Thread(target=self._run, name="trace-writer", daemon=True)
+        self._writer.start()
+
+    def emit(self, event: TraceEvent) -> None:
+        if not self._closed:
+            self._queue.put(event)
+
+    def flush(self) -> None:
+        self._queue.join()
+
+    def close(self) -> None:
+        if self._closed:
+            return
+        self._closed = True
+        self._queue.put(None)
+        self._writer.join()
+
+    def _path_for(self, event: TraceEvent) -> str:
+        if self.per_run:
+            return os.path.join(self.directory, f"{event.run_id}.jsonl")
+        return os.path.join(self.directory, "trace.jsonl")
+
+    def _rotate(self, path: str) -> None:
+        """
+        Shifts `path` to `path.1`, `path.1` to `path.2`, ... dropping the oldest backup.
+        """
+        for index in range(self.backups - 1, 0, -1):
+            source = f"{path}.{index}"
+            if os.path.exists(source):
+                os.replace(source, f"{path}.{index + 1}")
+        if self.backups > 0:
+            os.replace(path, f"{path}.1")
+        else:
+            os.remove(path)
+
+    def _write(self, batch: List[TraceEvent]) -> None:
+        """
+        Appends a batch of events, opening each target file once per batch.
+        """
+        by_path: Dict[str, List[str]] = {}
+        for event in batch:
+            by_path.setdefault(self._path_for(event), []).append(json.dumps(event.model_dump(), ensure_ascii=False))
+        for path, lines in by_path.items():
+            try:
+                if not self.per_run and os.path.exists(path) and os.path.getsize(path) >= self.max_bytes:
+                    self._rotate(path)
+                with open(path, 'a', encoding='utf-8') as file:
+                    file.write("\n".join(lines) + "\n")
+            except Exception as e:
+                logger.error("Error writing trace file '%s': %s", path, e)
+
+    def _run(self) -> None:
+        """
+        Drains the queue in batches until a close sentinel arrives.
+        """
+        running = True
+        while running:
+            batch: List[TraceEvent] = []
+            taken = 0
+            try:
+                item = self._queue.get(timeout=self.flush_interval)
+                taken += 1
+                while True:
+                    if item is None:
+                        running = False
+                        break
+                    batch.append(item)
+                    item = self._queue.get_nowait()
+                    taken += 1
+            except queue.Empty:
+                pass
+            if batch:
+                self._write(batch)
+            for _ in range(taken):
+                self._queue.task_done()
+
+
+_trace_sink: Optional[TraceSink] = None
+_trace_sink_lock = threading.Lock()
+
+
+def get_trace_sink() -> TraceSink:
+    """
+    Returns the process-wide trace sink, creating it from the configuration on first use.
+
+    Returns:
+        TraceSink: A FileTraceSink, or a NullTraceSink when tracing is disabled.
+    """
+    global _trace_sink
+    if _trace_sink is None:
+        with _trace_sink_lock:
+            if _trace_sink is None:
+                settings = config.TRACE
+                if settings.get('sink', 'file') == 'file':
+                    _trace_sink = FileTraceSink(
+                        directory=settings.get('directory', './data/output/traces'),
+                        per_run=settings.get('per_run', True),
+                        max_bytes=settings.get('max_bytes', 10 * 1024 * 1024),
+                        backups=settings.get('backups', 5),
+                        flush_interval=settings.get('flush_interval', 0.5)
+                    )
+                    atexit.register(_trace_sink.close)
+                else:
+                    _trace_sink = NullTraceSink()
+    return _trace_sink
@@ -0,0 +1,216 @@
+from concurrent.futures import Future
+from src.utils.cache import SQLiteCache
+from src.utils.cache import MemoryCache
+from src.utils.cache import CacheStats
+from src.config.setup import config
+from src.utils.cache import make_key
+from typing import Optional
+from typing import Callable
+from typing import TypeVar
+from typing import Dict
+from typing import Any
+import functools
+import threading
+
+
+F = TypeVar("F", bound=Callable[..., Optional[str]])
+
+DEFAULT_TTL_SECONDS = 3600
+
+
+class ToolCache:
+    """
+    A shared cache for tool results: an in-memory LRU in front of an optional SQLite spill,
+    with per-tool TTLs and single-flight coalescing of identical in-flight lookups.
+    """
+
+    def __init__(self, max_entries: int = 1024, ttl_seconds: Optional[Dict[str, float]] = None,
+                 spill_path: Optional[str] = None, spill_max_entries: int = 100000):
+        """
+        Initializes the cache.
+
+        Args:
+            max_entries (int): The maximum number of results held in memory.
+            ttl_seconds (Optional[Dict[str, float]]): Per-tool TTLs; tools not listed use DEFAULT_TTL_SECONDS.
+            spill_path (Optional[str]): Path to a SQLite file for results evicted from or missing in memory.
+            spill_max_entries (int): The maximum number of results kept per tool in the spill file.
+        """
+        self.memory = MemoryCache(max_entries=max_entries)
+        self.ttl_seconds = ttl_seconds or {}
+        self.spill_path = spill_path
+        self.spill_max_entries = spill_max_entries
+        self._spills: Dict[str, SQLiteCache] = {}
+        self._stats: Dict[str, CacheStats] = {}
+        self._inflight: Dict[str, Future] = {}
+        self._lock = threading.Lock()
+
+    def ttl_for(self, tool: str) -> float:
+        """
+        Returns the TTL configured for a tool.
+
+        Args:
+            tool (str): The tool name.
+
+        Returns:
+            float: The TTL in seconds.
+        """
+        return self.ttl_seconds.get(tool, DEFAULT_TTL_SECONDS)
+
+    def _tool_stats(self, tool: str) -> CacheStats:
+        with self._lock:
+            if tool not in self._stats:
+                self._stats[tool] = CacheStats()
+            return self._stats[tool]
+
+    def _spill(self, tool: str) -> Optional[SQLiteCache]:
+        if not self.spill_path:
+            return None
+        with self._lock:
+            if tool not in self._spills:
+                self._spills[tool] = SQLiteCache(
+                    path=self.spill_path,
+                    max_entries=self.spill_max_entries,
+                    ttl_seconds=self.ttl_for(tool),
+                    table=f"tool_{tool}"
+                )
+            return self._spills[tool]
+
+    def get_or_call(self, tool: str, key: str, func: Callable[[], Optional[str]],
+                    cache_if: Callable[[Optional[str]], bool]) -> Optional[str]:
+        """
+        Returns a cached result or computes it, coalescing concurrent identical lookups into one call.
+
+        Args:
+            tool (str): The tool name, used for TTLs, spill tables and stats.
+            key (str): The cache key for the lookup.
+            func (Callable[[], Optional[str]]): Computes the result on a miss.
+            cache_if (Callable[[Optional[str]], bool]): Decides whether a computed result may be cached.
+
+        Returns:
+            Optional[str]: The tool result.
+        """
+        stats = self._tool_stats(tool)
+        cached = self.memory.get(key)
+        if cached is not None:
+            stats.record("hits")
+            return cached
+
+        with self._lock:
+            flight = self._inflight.get(key)
+            leader = flight is None
+            if leader:
+                flight = Future()
+                self._inflight[key] = flight
+
+        if not leader:
+            stats.record("coalesced")
+            return flight.result()
+
+        try:
+            # A previous leader may have stored the result between our miss and taking the lock.
+            result = self.memory.get(key)
+            if result is not None:
+                stats.record("hits")
+                flight.set_result(result)
+                return result
+
+            spill = self._spill(tool)
+            result = spill.get(key) if spill is not None else None
+            if result is not None:
+                stats.record("hits")
+                stats.record("spill_hits")
+                self.memory.set(key, result, ttl_seconds=self.ttl_for(tool))
+            else:
+                stats.record("misses")
+                result = func()
+                if cache_if(result):
+                    self.memory.set(key, result, ttl_seconds=self.ttl_for(tool))
+                    if spill is not None:
+                        spill.set(key, result)
+                else:
+                    stats.record("uncacheable")
+            flight.set_result(result)
+            return result
+        except BaseException as e:
+            flight.set_exception(e)
+            raise
+        finally:
+            with self._lock:
+                self._inflight.pop(key, None)
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Returns per-tool hit/miss/coalescing counters plus memory cache counters.
+
+        Returns:
+            Dict[str, Any]: The stats keyed by tool name, with the memory LRU under "memory".
+        """
+        with self._lock:
+            tools = dict(self._stats)
+        snapshot = {tool: stats.snapshot() for tool, stats in tools.items()}
+        snapshot["memory"] = dict(self.memory.stats.snapshot(), size=len(self.memory))
+        return snapshot
+
+    def clear(self) -> None:
+        """
+        Drops every cached result from memory and the spill file.
+        """
+        self.memory.clear()
+        with self._lock:
+            spills = list(self._spills.values())
+        for spill in spills:
+            spill.clear()
+
+
+_tool_cache: Optional[ToolCache] = None
+_tool_cache_lock = threading.Lock()
+
+
+def get_tool_cache() -> Optional[ToolCache]:
+    """
+    Returns the process-wide tool cache, creating it from the configuration on first use.
+
+    Returns:
+        Optional[ToolCache]: The tool cache, or None if caching is disabled in the configuration.
+    """
+    global _tool_cache
+    settings = config.TOOL_CACHE
+    if not settings.get('enabled', False):
+        return None
+    if _tool_cache is None:
+        with _tool_cache_lock:
+            if _tool_cache is None:
+                _tool_cache = ToolCache(
+                    max_entries=settings.get('max_entries', 1024),
+                    ttl_seconds=settings.get('ttl_seconds', {}),
+                    spill_path=settings.get('spill_path'),
+                    spill_max_entries=settings.get('spill_max_entries', 100000)
+                )
+    return _tool_cache
+
+
+def _has_result(result: Optional[str]) -> bool:
+    return result is not None
+
+
+def cached_tool(tool: str, cache_if: Callable[[Optional[str]], bool] = _has_result) -> Callable[[F], F]:
+    """
+    Decorates a tool search function so its results go through the shared tool cache.
+
+    Args:
+        tool (str): The tool name, used for TTLs, spill tables and stats.
+        cache_if (Callable[[Optional[str]], bool]): Decides whether a result may be cached; errors should not be.
+
+    Returns:
+        Callable[[F], F]: The decorator.
+    """
+    def decorator(func: F) -> F:
+        @functools.wraps(func)
+        def wrapper(*args: Any, **kwargs: Any) -> Optional[str]:
+            cache = get_tool_cache()
+            if cache is None:
+                return func(*args, **kwargs)
+            key = make_key(tool, args, kwargs)
+            return cache.get_or_call(tool, key, lambda: func(*args, **kwargs), cache_if)
+        return wrapper
+    return decorator
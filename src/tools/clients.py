@@ -0,0 +1,117 @@
+from requests.adapters import HTTPAdapter
+from src.config.logging import logger
+from src.config.setup import config
+from typing import Optional
+from typing import Callable
+from typing import TypeVar
+from typing import Dict
+from typing import Any
+import threading
+import requests
+
+
+T = TypeVar("T")
+
+DEFAULT_POOL_SIZE = 32
+DEFAULT_TIMEOUT = 10.0
+
+
+class ClientRegistry:
+    """
+    Process-wide registry of long-lived upstream clients shared across agents and threads.
+
+    Each upstream gets one keep-alive `requests.Session` with a connection pool, and every
+    client (with its credentials) is built once on first use.
+    """
+
+    def __init__(self, pool_size: int = DEFAULT_POOL_SIZE, timeout: float = DEFAULT_TIMEOUT):
+        """
+        Initializes an empty registry.
+
+        Args:
+            pool_size (int): The maximum number of pooled connections kept per upstream host.
+            timeout (float): The request timeout, in seconds, applied by clients built from this registry.
+        """
+        self.pool_size = pool_size
+        self.timeout = timeout
+        self._sessions: Dict[str, requests.Session] = {}
+        self._clients: Dict[str, Any] = {}
+        self._lock = threading.RLock()
+
+    def session(self, name: str) -> requests.Session:
+        """
+        Returns the pooled keep-alive session for an upstream, creating it on first use.
+
+        Args:
+            name (str): The upstream name, e.g. "serp" or "wikipedia".
+
+        Returns:
+            requests.Session: The shared session.
+        """
+        with self._lock:
+            if name not in self._sessions:
+                session = requests.Session()
+                self.mount(session)
+                self._sessions[name] = session
+                logger.info("Created pooled HTTP session for %s (pool size %s)", name, self.pool_size)
+            return self._sessions[name]
+
+    def mount(self, session: requests.Session) -> None:
+        """
+        Mounts connection-pooling adapters sized for this registry onto a session.
+
+        Args:
+            session (requests.Session): The session to configure.
+        """
+        adapter = HTTPAdapter(pool_connections=self.pool_size, pool_maxsize=self.pool_size)
+        session.mount("https://", adapter)
+        session.mount("http://", adapter)
+
+    def get(self, name: str, factory: Callable[[], T]) -> T:
+        """
+        Returns the client registered under a name, building it with the factory on first use.
+
+        Args:
+            name (str): The client name.
+            factory (Callable[[], T]): Builds the client; called at most once per name.
+
+        Returns:
+            T: The shared client.
+        """
+        with self._lock:
+            if name not in self._clients:
+                self._clients[name] = factory()
+            return self._clients[name]
+
+    def close(self) -> None:
+        """
+        Closes every pooled session and forgets all clients.
+        """
+        with self._lock:
+            for session in self._sessions.values():
+                session.close()
+            self._sessions.clear()
+            self._clients.clear()
+
+
+_registry: Optional[ClientRegistry] = None
+_registry_lock = threading.Lock()
+
+
+def get_registry() -> ClientRegistry:
+    """
+    Returns the process-wide client registry, creating it from the configuration on first use.
+
+    Returns:
+        ClientRegistry: The shared registry.
+    """
+    global _registry
+    if _registry is None:
+        with _registry_lock:
+            if _registry is None:
+                settings = config.HTTP
+                _registry = ClientRegistry(
+                    pool_size=settings.get('pool_size', DEFAULT_POOL_SIZE),
+                    timeout=settings.get('timeout', DEFAULT_TIMEOUT)
+                )
+    return _registry
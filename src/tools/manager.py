@@ -1,74 +1,44 @@
-from src.tools.serp import search as google_search
-from src.tools.wiki import search as wiki_search
+from src.tools.registry import get_registry
+from src.tools.registry import Observation
+from src.config.logging import Truncated
+from src.tools.registry import Registry
+from src.tools.registry import ToolSpec
 from src.config.logging import logger
+from src.tools.registry import Tool
 from pydantic import BaseModel
 from typing import Callable
+from typing import Optional
 from pydantic import Field 
-from typing import Union 
 from typing import Dict 
-from enum import Enum
-from enum import auto 
-
-
-Observation = Union[str, Exception]
-
-class Name(Enum):
-    """
-    Enumeration of available tools.
-    """
-    WIKIPEDIA = auto()
-    GOOGLE = auto()
-
-    def __str__(self) -> str:
-        return self.name.lower()
 
 
 class Choice(BaseModel):
     """
     Represents a tool choice with a reason.
     """
-    name: Name = Field(..., description="Name of the selected tool")
+    name: str = Field(..., description="Name of the selected tool")
     reason: str = Field(..., description="Reason for selecting this tool")
 
 
-class Tool:
-    """
-    Represents a tool with its execution function.
-    """
-    def __init__(self, name: Name, func: Callable[[str], str]):
-        self.name = name
-        self.func = func
-    
-    def use(self, query: str) -> Observation:
-        """
-        Execute the tool's function for a given query and handle exceptions.
-        """
-        try:
-            return self.func(query)
-        except Exception as e:
-            logger.error(f"Error executing tool {self.name}: {e}")
-            return e
-
-
 class Manager:
     """
     Manages tool registration, selection, and execution.
     """
-    def __init__(self) -> None:
-        self.tools: Dict[Name, Tool] = {} 
+    def __init__(self, registry: Optional[Registry] = None) -> None:
+        self.tools: Dict[str, Tool] = {tool.name: tool for tool in registry.tools()} if registry else {}
     
-    def register(self, name: Name, func: Callable[[str], str]) -> None:
+    def register(self, name: str, func: Callable[[str], str]) -> None:
         """
         Register a new tool.
         """
-        self.tools[name] = Tool(name, func)
+        self.tools[name] = Tool(ToolSpec(name=name), func)
     
-    def act(self, name: Name, query: str) -> Observation:
+    def act(self, name: str, query: str) -> Observation:
         """
         Retrieve and use a registered tool to process the given query.
 
         Parameters:
-            name (Name): The name of the tool to use.
+            name (str): The name of the tool to use.
             query (str): The input query string.
 
         Returns:
@@ -86,12 +56,12 @@ class Manager:
         """
         if query.startswith("/people"):
             return Choice(
-                name=Name.WIKIPEDIA, 
+                name="wikipedia", 
                 reason="Query starts with /people, using Wikipedia for biographical information."
             )
         elif query.startswith("/location"):
             return Choice(
-                name=Name.GOOGLE, 
+                name="google", 
                 reason="Query starts with /location, using Google for location-specific information."
             )
         else:
@@ -102,10 +72,7 @@ def run() -> None:
     """
     Initialize manager, register tools, and process test queries.
     """
-    manager = Manager()
-    
-    manager.register(Name.WIKIPEDIA, wiki_search)
-    manager.register(Name.GOOGLE, google_search)
+    manager = Manager(get_registry())
     
     test_cases = [
     "/people kamala harris",
@@ -118,15 +85,15 @@ def run() -> None:
             choice = manager.choose(query)
             result = manager.act(choice.name, query)
             
-            logger.info(f"Test Case {i}:")
-            logger.info(f"Query: {query}")
-            logger.info(f"Tool used: {choice.name}")
-            logger.info(f"Reason: {choice.reason}")
-            logger.info(f"Result: {result}")
+            logger.info("Test Case %s:", i)
+            logger.info("Query: %s", query)
+            logger.info("Tool used: %s", choice.name)
+            logger.info("Reason: %s", choice.reason)
+            logger.info("Result: %s", Truncated(result))
         except ValueError as e:
-            logger.error(f"Test Case {i}:")
-            logger.error(f"Query: {query}")
-            logger.error(f"Error: {str(e)}")
+            logger.error("Test Case %s:", i)
+            logger.error("Query: %s", query)
+            logger.error("Error: %s", e)
         logger.info("")  # Empty line for readability
 
 
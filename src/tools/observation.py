@@ -0,0 +1,165 @@
+from src.llm.tokens import CHARS_PER_TOKEN
+from typing import Optional
+from typing import Dict
+from typing import List
+from typing import Set
+from typing import Any
+import json
+import re
+
+
+WORD = re.compile(r"\w+")
+SENTENCE_BOUNDARY = re.compile(r"(?<=[.!?])\s+")
+STOPWORDS = {
+    "a", "an", "the", "of", "in", "on", "for", "to", "and", "or", "is", "are", "was", "were",
+    "what", "which", "who", "whom", "how", "when", "where", "with", "by", "at", "from", "that", "this"
+}
+
+
+def _terms(text: str) -> Set[str]:
+    """
+    Extracts the lower-cased content words of a text.
+
+    Args:
+        text (str): The text to tokenize.
+
+    Returns:
+        Set[str]: The distinct words, without stopwords.
+    """
+    return {word for word in WORD.findall(text.lower()) if word not in STOPWORDS}
+
+
+def _relevance(text: str, query_terms: Set[str]) -> int:
+    """
+    Scores a text by how many of the query's terms it contains.
+
+    Args:
+        text (str): The candidate text.
+        query_terms (Set[str]): The terms of the action input.
+
+    Returns:
+        int: The number of query terms present in the text.
+    """
+    return len(query_terms & _terms(text))
+
+
+def _dumps(value: Any) -> str:
+    """
+    Encodes a value as JSON without pretty-printing whitespace.
+    """
+    return json.dumps(value, ensure_ascii=False, separators=(",", ":"))
+
+
+def _trim_sentences(text: str, query_terms: Set[str], max_chars: int) -> str:
+    """
+    Keeps the most relevant sentences of a text that fit within max_chars, in their original order.
+
+    Args:
+        text (str): The text to trim.
+        query_terms (Set[str]): The terms of the action input.
+        max_chars (int): The maximum length of the result.
+
+    Returns:
+        str: The trimmed text.
+    """
+    text = " ".join(text.split())
+    if len(text) <= max_chars:
+        return text
+    sentences = SENTENCE_BOUNDARY.split(text)
+    # The opening sentence usually defines the subject, so it ranks first on ties.
+    ranked = sorted(range(len(sentences)), key=lambda i: (-_relevance(sentences[i], query_terms), i))
+    kept: List[int] = []
+    used = 0
+    for index in ranked:
+        length = len(sentences[index]) + 1
+        if used + length > max_chars:
+            continue
+        kept.append(index)
+        used += length
+    if not kept:
+        return text[:max_chars].rstrip() + "..."
+    return " ".join(sentences[i] for i in sorted(kept))
+
+
+def _compact_results(results: List[Dict[str, Any]], query_terms: Set[str], max_chars: int,
+                     max_results: int) -> List[Dict[str, Any]]:
+    """
+    Deduplicates, ranks and truncates search results to fit within max_chars.
+
+    Args:
+        results (List[Dict[str, Any]]): The search results, in engine order.
+        query_terms (Set[str]): The terms of the action input.
+        max_chars (int): The maximum encoded length of the kept results.
+        max_results (int): The maximum number of results to keep.
+
+    Returns:
+        List[Dict[str, Any]]: The kept results without positions (implied by list order).
+    """
+    seen: Set[str] = set()
+    unique: List[Dict[str, Any]] = []
+    for result in results:
+        snippet = result.get("snippet") or ""
+        fingerprint = " ".join(snippet.lower().split()) or str(result.get("title"))
+        if fingerprint in seen:
+            continue
+        seen.add(fingerprint)
+        unique.append({key: value for key, value in result.items() if key != "position" and value})
+
+    ranked = sorted(
+        range(len(unique)),
+        key=lambda i: (-_relevance(f"{unique[i].get('title', '')} {unique[i].get('snippet', '')}", query_terms), i)
+    )
+    kept: List[int] = []
+    used = 2
+    for index in ranked[:max_results]:
+        length = len(_dumps(unique[index])) + 1
+        if used + length > max_chars and kept:
+            break
+        kept.append(index)
+        used += length
+    return [unique[i] for i in sorted(kept)]
+
+
+def compact_observation(result: Any, query: str, max_tokens: int = 800, max_results: int = 5) -> str:
+    """
+    Re-encodes a tool result compactly and trims it to the content most relevant to the action input.
+
+    Search results are deduplicated, stripped of positions and ranked; Wikipedia summaries and
+    plain text are trimmed sentence by sentence. Everything is emitted as whitespace-free JSON
+    (or plain text) within roughly max_tokens tokens.
+
+    Args:
+        result (Any): The raw tool result, usually a JSON string.
+        query (str): The action input the tool was called with.
+        max_tokens (int): The approximate token cap for the observation.
+        max_results (int): The maximum number of search results to keep.
+
+    Returns:
+        str: The compact observation.
+    """
+    max_chars = max_tokens * CHARS_PER_TOKEN
+    query_terms = _terms(query)
+    text = str(result)
+
+    parsed: Optional[Any] = None
+    if isinstance(result, str):
+        try:
+            parsed = json.loads(result)
+        except json.JSONDecodeError:
+            parsed = None
+
+    if isinstance(parsed, dict):
+        if isinstance(parsed.get("top_results"), list):
+            parsed["top_results"] = _compact_results(parsed["top_results"], query_terms, max_chars, max_results)
+        elif isinstance(parsed.get("summary"), str):
+            # The query echo is redundant: the action input is already in the history.
+            parsed.pop("query", None)
+            budget = max_chars - len(_dumps({key: value for key, value in parsed.items() if key != "summary"}))
+            parsed["summary"] = _trim_sentences(parsed["summary"], query_terms, max(budget, 0))
+        text = _dumps(parsed)
+    elif parsed is not None:
+        text = _dumps(parsed)
+
+    if len(text) > max_chars:
+        text = _trim_sentences(text, query_terms, max_chars)
+    return text
@@ -0,0 +1,169 @@
+from src.utils.metrics import get_metrics
+from src.config.logging import logger
+from src.utils.metrics import Metrics
+from typing import Awaitable
+from typing import Hashable
+from typing import Iterable
+from typing import Callable
+from typing import Optional
+from typing import Tuple
+from typing import Dict
+from typing import List
+from typing import Set
+from typing import Any
+import asyncio
+import time
+import re
+
+
+# Runs of capitalised words ("FIFA World Cup", "Demis Hassabis"), optionally joined by of/de/the,
+# and short quoted phrases (but not JSON keys) are treated as candidate entities.
+ENTITY = re.compile(r"\b[A-Z][\w'\-]*(?:\s+(?:(?:of|de|da|the|and)\s+)?[A-Z][\w'\-]*)*")
+QUOTED = re.compile(r'"([^"]{2,80})"(?!\s*:)')
+LEADING_WORDS = {"What", "Which", "Who", "Whom", "How", "When", "Where", "Why", "The", "A", "An", "In", "On", "Is",
+                 "Are", "Was", "Were", "Observation", "Error", "I", "It", "This", "That"}
+
+Fetcher = Callable[[str], Awaitable[Any]]
+
+
+def _normalize(text: str) -> str:
+    return " ".join(text.casefold().split())
+
+
+def extract_entities(text: str) -> List[str]:
+    """
+    Extracts likely lookup targets from a text, in order of appearance.
+
+    Args:
+        text (str): The query or observation text.
+
+    Returns:
+        List[str]: The distinct candidate entities.
+    """
+    candidates = QUOTED.findall(text)
+    for match in ENTITY.findall(text):
+        words = match.split()
+        while words and words[0] in LEADING_WORDS:
+            words = words[1:]
+        if words:
+            candidates.append(" ".join(words))
+
+    seen = set()
+    entities = []
+    for candidate in candidates:
+        key = _normalize(candidate)
+        if len(key) > 2 and key not in seen:
+            seen.add(key)
+            entities.append(candidate)
+    return entities
+
+
+class Prefetcher:
+    """
+    Speculatively runs likely tool lookups while the model is thinking.
+
+    Each step, candidate entities from the query and the newest observations are fetched with the
+    configured tools, up to a per-step cap, into a short-lived per-run store. When the model then
+    requests one of them, `take` returns the (possibly already finished) prefetched call. Each
+    lookup is prefetched at most once per run, even after it has been taken.
+    """
+
+    def __init__(self, fetchers: Dict[Hashable, Fetcher], max_per_step: int = 3, ttl_seconds: float = 60.0,
+                 metrics: Optional[Metrics] = None):
+        """
+        Initializes an empty prefetch store for one run.
+
+        Args:
+            fetchers (Dict[Hashable, Fetcher]): The async lookup functions to prefetch with, keyed by tool name.
+            max_per_step (int): The maximum number of speculative requests started per step.
+            ttl_seconds (float): How long a prefetched result may be used after it was started.
+            metrics (Optional[Metrics]): Where issued, hit, miss and unused counts go; defaults to the process-wide registry.
+        """
+        self.fetchers = fetchers
+        self.max_per_step = max_per_step
+        self.ttl_seconds = ttl_seconds
+        self.metrics = metrics or get_metrics()
+        self._store: Dict[Tuple[Hashable, str], Tuple["asyncio.Task[Any]", float]] = {}
+        self._scheduled: Set[Tuple[Hashable, str]] = set()
+        self.issued = 0
+        self.hits = 0
+        self.misses = 0
+
+    def schedule(self, texts: Iterable[str]) -> int:
+        """
+        Starts speculative lookups for new candidate entities found in the texts.
+
+        Args:
+            texts (Iterable[str]): The texts to mine, most important first.
+
+        Returns:
+            int: The number of lookups started.
+        """
+        started = 0
+        for text in texts:
+            for entity in extract_entities(text):
+                for tool, fetch in self.fetchers.items():
+                    if started >= self.max_per_step:
+                        return started
+                    key = (tool, _normalize(entity))
+                    if key in self._scheduled:
+                        continue
+                    self._scheduled.add(key)
+                    self._store[key] = (asyncio.ensure_future(fetch(entity)), time.monotonic())
+                    self.issued += 1
+                    started += 1
+                    self.metrics.inc("prefetch_issued", tool=tool)
+                    logger.info("Prefetching %s for: %s", tool, entity)
+        return started
+
+    async def take(self, tool: Hashable, query: str) -> Tuple[bool, Any]:
+        """
+        Returns the prefetched result for a lookup, if one is available and fresh.
+
+        Args:
+            tool (Hashable): The tool name.
+            query (str): The tool input requested by the model.
+
+        Returns:
+            Tuple[bool, Any]: Whether the lookup was prefetched, and its result. A prefetched result
+            may itself be None (e.g. no such page) and is then used as is rather than fetched again.
+        """
+        if tool not in self.fetchers:
+            return False, None
+        entry = self._store.pop((tool, _normalize(query)), None)
+        if entry is None or time.monotonic() - entry[1] > self.ttl_seconds:
+            if entry is not None:
+                entry[0].cancel()
+            self.misses += 1
+            self.metrics.inc("prefetch_misses", tool=tool)
+            return False, None
+        self.hits += 1
+        self.metrics.inc("prefetch_hits", tool=tool)
+        logger.info("Prefetch hit for %s: %s", tool, query)
+        return True, await entry[0]
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Returns prefetch counters for this run.
+
+        Returns:
+            Dict[str, Any]: Issued, hit, miss and unused counts and the hit rates.
+        """
+        lookups = self.hits + self.misses
+        return {
+            "issued": self.issued,
+            "hits": self.hits,
+            "misses": self.misses,
+            "unused": len(self._store),
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "precision": self.hits / self.issued if self.issued else 0.0
+        }
+
+    def close(self) -> None:
+        """
+        Cancels speculative lookups that were never used.
+        """
+        for (tool, _), (task, _) in self._store.items():
+            self.metrics.inc("prefetch_unused", tool=tool)
+            task.cancel()
+        self._store.clear()
@@ -0,0 +1,304 @@
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures import Executor as Pool
+from src.utils.metrics import get_metrics
+from concurrent.futures import Future
+from src.config.logging import logger
+from src.config.setup import config
+from pydantic import BaseModel
+from typing import Awaitable
+from typing import Callable
+from typing import Optional
+from pydantic import Field
+from typing import Union
+from typing import Dict
+from typing import List
+from typing import Set
+from typing import Any
+from enum import Enum
+from enum import auto
+import importlib
+import threading
+import functools
+import asyncio
+import inspect
+import weakref
+
+
+Observation = Union[str, Exception]
+ToolFunc = Union[Callable[[str], str], Callable[[str], Awaitable[str]]]
+
+# The action name the model uses when no tool is needed.
+NONE = "none"
+
+
+class Executor(Enum):
+    """
+    Enumeration of the ways a tool's function can be run.
+    """
+    ASYNC = auto()
+    THREAD = auto()
+    PROCESS = auto()
+
+    def __str__(self) -> str:
+        return self.name.lower()
+
+
+class ToolSpec(BaseModel):
+    """
+    Declares a tool: what the model sees, where its function lives and how it is run.
+    """
+    name: str = Field(..., description="The name the model uses in actions.")
+    description: str = Field("", description="What the tool is for, shown to the model in the prompt.")
+    target: Optional[str] = Field(None, description="The function's import path as 'module:attribute', loaded on first use.")
+    timeout: Optional[float] = Field(None, description="Seconds before a call is abandoned, or None for no limit.")
+    max_concurrency: int = Field(8, description="The maximum number of calls running at once across the process.")
+    executor: Optional[Executor] = Field(None, description="How the function is run; inferred from the function if unset.")
+
+
+def _load(target: str) -> ToolFunc:
+    """
+    Imports a tool function from a 'module:attribute' path.
+    """
+    module_name, _, attribute = target.partition(":")
+    return getattr(importlib.import_module(module_name), attribute)
+
+
+class Tool:
+    """
+    A declared tool, executed on a managed pool with a concurrency limit and a timeout.
+
+    The function is imported on first use. Blocking functions run on a pool private to the tool,
+    sized to its concurrency limit, so a hung tool can only exhaust its own workers; coroutine
+    functions run on the event loop behind a semaphore. Calls that exceed the timeout are cancelled
+    and return an error observation instead of stalling the agent.
+    """
+
+    def __init__(self, spec: ToolSpec, func: Optional[ToolFunc] = None):
+        """
+        Initializes a Tool from its declaration.
+
+        Args:
+            spec (ToolSpec): The tool's declaration.
+            func (Optional[ToolFunc]): The function, if already loaded; otherwise it is imported from spec.target.
+        """
+        if func is None and spec.target is None:
+            raise ValueError(f"Tool {spec.name} needs either a function or an import target")
+        self.spec = spec
+        self._func = func
+        self._pool: Optional[Pool] = None
+        self._pending: Set[Future] = set()
+        self._semaphores: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, asyncio.Semaphore]" = weakref.WeakKeyDictionary()
+        self._lock = threading.Lock()
+
+    @property
+    def name(self) -> str:
+        return self.spec.name
+
+    @property
+    def func(self) -> ToolFunc:
+        """
+        The tool's function, imported on first access.
+        """
+        if self._func is None:
+            with self._lock:
+                if self._func is None:
+                    logger.info("Loading tool %s from %s", self.name, self.spec.target)
+                    self._func = _load(self.spec.target)
+        return self._func
+
+    @property
+    def executor(self) -> Executor:
+        """
+        How the function is run: as declared, else ASYNC for coroutine functions and THREAD otherwise.
+        """
+        if self.spec.executor is not None:
+            return self.spec.executor
+        return Executor.ASYNC if inspect.iscoroutinefunction(self.func) else Executor.THREAD
+
+    def label(self) -> str:
+        """
+        Returns the tool as listed in the prompt: its name and, if declared, its description.
+        """
+        return f"{self.name} ({self.spec.description})" if self.spec.description else self.name
+
+    def _get_pool(self) -> Pool:
+        if self._pool is None:
+            with self._lock:
+                if self._pool is None:
+                    workers = max(1, self.spec.max_concurrency)
+                    if self.executor == Executor.PROCESS:
+                        self._pool = ProcessPoolExecutor(max_workers=workers)
+                    else:
+                        self._pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix=f"tool-{self.name}")
+        return self._pool
+
+    def _get_semaphore(self) -> asyncio.Semaphore:
+        # Semaphores belong to one event loop, and sync agents run each query on a fresh loop.
+        loop = asyncio.get_running_loop()
+        semaphore = self._semaphores.get(loop)
+        if semaphore is None:
+            semaphore = self._semaphores[loop] = asyncio.Semaphore(max(1, self.spec.max_concurrency))
+        return semaphore
+
+    async def _call(self, query: str) -> str:
+        if self.executor == Executor.ASYNC:
+            async with self._get_semaphore():
+                return await self.func(query)
+        # The pool size is the concurrency limit; queued calls are cancelled if they time out.
+        future = self._get_pool().submit(functools.partial(self.func, query))
+        with self._lock:
+            self._pending.add(future)
+        future.add_done_callback(self._done)
+        return await asyncio.wrap_future(future)
+
+    def _done(self, future: Future) -> None:
+        with self._lock:
+            self._pending.discard(future)
+
+    def use(self, query: str) -> Observation:
+        """
+        Executes the tool's function with the provided query, blocking until it completes or times out.
+
+        Args:
+            query (str): The input query for the tool.
+
+        Returns:
+            Observation: Result of the tool's function or an error message if an exception occurs.
+        """
+        return asyncio.run(self.use_async(query))
+
+    async def use_async(self, query: str) -> Observation:
+        """
+        Executes the tool's function without blocking the event loop.
+
+        Args:
+            query (str): The input query for the tool.
+
+        Returns:
+            Observation: Result of the tool's function or an error message if an exception occurs or it times out.
+        """
+        try:
+            return await asyncio.wait_for(self._call(query), timeout=self.spec.timeout)
+        except asyncio.TimeoutError:
+            logger.error("Tool %s timed out after %ss", self.name, self.spec.timeout)
+            get_metrics().inc("tool_timeouts", tool=self.name)
+            return f"Error: {self.name} did not respond within {self.spec.timeout} seconds"
+        except Exception as e:
+            logger.error("Error executing tool %s: %s", self.name, e)
+            get_metrics().inc("tool_errors", tool=self.name)
+            return str(e)
+
+    def close(self) -> None:
+        """
+        Shuts down the tool's pool without waiting for running calls; queued calls are cancelled.
+        """
+        with self._lock:
+            pool, self._pool = self._pool, None
+            pending, self._pending = self._pending, set()
+        # Executor.shutdown only cancels queued calls itself from Python 3.9 on.
+        for future in pending:
+            future.cancel()
+        if pool is not None:
+            pool.shutdown(wait=False)
+
+
+class Registry:
+    """
+    The set of tools available to agents, keyed by the name the model uses.
+    """
+
+    def __init__(self) -> None:
+        self._tools: Dict[str, Tool] = {}
+        self._lock = threading.Lock()
+
+    def declare(self, spec: ToolSpec, func: Optional[ToolFunc] = None) -> Tool:
+        """
+        Adds (or replaces) a tool.
+
+        Args:
+            spec (ToolSpec): The tool's declaration.
+            func (Optional[ToolFunc]): The function, if already loaded; otherwise it is imported on first use.
+
+        Returns:
+            Tool: The registered tool.
+        """
+        if spec.name == NONE:
+            raise ValueError(f"'{NONE}' is reserved for responses that need no tool")
+        tool = Tool(spec, func)
+        with self._lock:
+            previous = self._tools.get(spec.name)
+            self._tools[spec.name] = tool
+        if previous is not None:
+            previous.close()
+        return tool
+
+    def register(self, name: str, func: ToolFunc, **settings: Any) -> Tool:
+        """
+        Adds a tool from an already loaded function.
+
+        Args:
+            name (str): The name the model uses in actions.
+            func (ToolFunc): The tool's function, either blocking or a coroutine function.
+            **settings (Any): Further ToolSpec fields, e.g. description or timeout.
+
+        Returns:
+            Tool: The registered tool.
+        """
+        return self.declare(ToolSpec(name=name, **settings), func)
+
+    def get(self, name: str) -> Optional[Tool]:
+        return self._tools.get(name)
+
+    def names(self) -> List[str]:
+        return list(self._tools)
+
+    def tools(self) -> List[Tool]:
+        return list(self._tools.values())
+
+    def __contains__(self, name: object) -> bool:
+        return name in self._tools
+
+    def close(self) -> None:
+        for tool in self.tools():
+            tool.close()
+
+
+def create_registry(settings: Dict[str, Dict[str, Any]]) -> Registry:
+    """
+    Builds a registry from tool declarations keyed by name, as in the tools section of the configuration.
+
+    Args:
+        settings (Dict[str, Dict[str, Any]]): The ToolSpec fields of each tool.
+
+    Returns:
+        Registry: The registry; no tool module is imported until the tool is first used.
+    """
+    registry = Registry()
+    for name, fields in settings.items():
+        fields = dict(fields or {})
+        if fields.get('executor'):
+            fields['executor'] = Executor[str(fields['executor']).upper()]
+        registry.declare(ToolSpec(name=name, **fields))
+    return registry
+
+
+_registry: Optional[Registry] = None
+_registry_lock = threading.Lock()
+
+
+def get_registry() -> Registry:
+    """
+    Returns the process-wide tool registry, created from the configuration on first use.
+
+    Tools are shared by every agent in the process, so concurrency limits apply process-wide.
+
+    Returns:
+        Registry: The shared registry.
+    """
+    global _registry
+    if _registry is None:
+        with _registry_lock:
+            if _registry is None:
+                _registry = create_registry(config.TOOLS)
+    return _registry
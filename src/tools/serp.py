@@ -1,5 +1,11 @@
+from src.utils.resilience import CircuitOpenError
+from src.utils.resilience import get_upstream
+from src.utils.ratelimit import get_limiter
+from src.tools.clients import get_registry
+from src.tools.cache import cached_tool
 from src.config.logging import logger
 from src.utils.io import load_yaml
+from typing import Optional
 from typing import Tuple
 from typing import Union
 from typing import Dict
@@ -17,7 +23,7 @@ class SerpAPIClient:
     A client for interacting with the SERP API for performing search queries.
     """
 
-    def __init__(self, api_key: str):
+    def __init__(self, api_key: str, session: Optional[requests.Session] = None, timeout: Optional[float] = None):
         """
         Initialize the SerpAPIClient with the provided API key.
 
@@ -25,11 +31,17 @@ class SerpAPIClient:
         -----------
         api_key : str
             The API key for authenticating with the SERP API.
+        session : requests.Session, optional
+            A keep-alive session to reuse connections across calls (default is a new session).
+        timeout : float, optional
+            The request timeout in seconds (default is no timeout).
         """
         self.api_key = api_key
         self.base_url = "https://serpapi.com/search.json"
+        self.session = session or requests.Session()
+        self.timeout = timeout
 
-    def __call__(self, query: str, engine: str = "google", location: str = "") -> Union[Dict[str, Any], Tuple[int, str]]:
+    def __call__(self, query: str, engine: str = "google", location: str = "") -> Union[Dict[str, Any], Tuple[Optional[int], str]]:
         """
         Perform Google search using the SERP API.
 
@@ -44,9 +56,9 @@ class SerpAPIClient:
 
         Returns:
         --------
-        Union[Dict[str, Any], Tuple[int, str]]
+        Union[Dict[str, Any], Tuple[Optional[int], str]]
             The search results as a JSON dictionary if successful, or a tuple containing the HTTP status code
-            and error message if the request fails.
+            (None if no response was received) and error message if the request fails.
         """
         params = {
             "engine": engine,
@@ -56,12 +68,40 @@ class SerpAPIClient:
         }
 
         try:
-            response = requests.get(self.base_url, params=params)
-            response.raise_for_status()
-            return response.json()
+            # Transient failures are retried with backoff; a failing API trips the shared circuit breaker.
+            return get_upstream("serp").call(self._get, params)
         except requests.exceptions.RequestException as e:
-            logger.error(f"Request to SERP API failed: {e}")
-            return response.status_code, str(e)
+            logger.error("Request to SERP API failed: %s", e)
+            status_code = e.response.status_code if e.response is not None else None
+            return status_code, str(e)
+        except CircuitOpenError as e:
+            logger.error("Request to SERP API skipped: %s", e)
+            return None, str(e)
+
+    def _get(self, params: Dict[str, str]) -> Dict[str, Any]:
+        """
+        Send a single search request.
+
+        Parameters:
+        -----------
+        params : Dict[str, str]
+            The query parameters.
+
+        Returns:
+        --------
+        Dict[str, Any]
+            The decoded JSON response.
+
+        Raises:
+        -------
+        requests.exceptions.RequestException
+            If the request fails or returns an error status.
+        """
+        # Every attempt waits for its turn against the shared request rate and monthly quota pacing
+        get_limiter("serp").acquire()
+        response = self.session.get(self.base_url, params=params, timeout=self.timeout)
+        response.raise_for_status()
+        return response.json()
 
 
 def load_api_key(credentials_path: str) -> str:
@@ -87,6 +127,23 @@ def load_api_key(credentials_path: str) -> str:
     return config['serp']['key']
 
 
+def get_client() -> SerpAPIClient:
+    """
+    Return the shared SERP API client, loading the API key and creating its pooled session once.
+
+    Returns:
+    --------
+    SerpAPIClient
+        The client shared by all agents and threads in this process.
+    """
+    registry = get_registry()
+    return registry.get("serp", lambda: SerpAPIClient(
+        load_api_key(CREDENTIALS_PATH),
+        session=registry.session("serp"),
+        timeout=registry.timeout
+    ))
+
+
 def format_top_search_results(results: Dict[str, Any], top_n: int = 10) -> List[Dict[str, Any]]:
     """
     Format the top N search results into a list of dictionaries with updated key names.
@@ -114,6 +171,24 @@ def format_top_search_results(results: Dict[str, Any], top_n: int = 10) -> List[
     ]
 
 
+def _is_successful(result: Optional[str]) -> bool:
+    """
+    Returns whether a search result is worth caching, i.e. it is not an error payload.
+
+    Parameters:
+    -----------
+    result : Optional[str]
+        The JSON string returned by `search`.
+
+    Returns:
+    --------
+    bool
+        True if the result holds search results rather than an error.
+    """
+    return result is not None and not result.startswith('{"error"')
+
+
+@cached_tool("google", cache_if=_is_successful)
 def search(search_query: str, location: str = "") -> str:
     """
     Main function to execute the Google search using SERP API and return the top results as a JSON string.
@@ -130,11 +205,8 @@ def search(search_query: str, location: str = "") -> str:
     str
         A JSON string containing the top search results or an error message, with updated key names.
     """
-    # Load the API key
-    api_key = load_api_key(CREDENTIALS_PATH)
-
-    # Initialize the SERP API client
-    serp_client = SerpAPIClient(api_key)
+    # Reuse the shared client (credentials and connection pool are set up once)
+    serp_client = get_client()
 
     # Perform the search
     results = serp_client(search_query, location=location)
@@ -1,12 +1,109 @@
+from src.utils.resilience import get_upstream
+from src.utils.ratelimit import get_limiter
+from src.tools.clients import get_registry
+from src.tools.wiki_index import get_index
+from src.tools.cache import cached_tool
 from src.config.logging import logger
+from src.config.setup import config
+from typing import TYPE_CHECKING
 from typing import Optional
-import wikipediaapi
+from typing import Dict
 import json
 
+if TYPE_CHECKING:
+    import wikipediaapi
 
-def search(query: str) -> Optional[str]:
+
+def _create_client() -> "wikipediaapi.Wikipedia":
+    """
+    Create a Wikipedia API client whose session uses the registry's connection pool and timeout.
+
+    Returns:
+        wikipediaapi.Wikipedia: The configured client.
     """
-    Fetch Wikipedia information for a given search query using Wikipedia-API and return as JSON.
+    import wikipediaapi
+
+    registry = get_registry()
+    wiki = wikipediaapi.Wikipedia(user_agent='ReAct Agents (shankar.arunp@gmail.com)',
+                                  language='en',
+                                  timeout=registry.timeout)
+    # Wikipedia-API owns its session; mount the pooled adapters on it rather than replacing it
+    registry.mount(wiki._session)
+    return wiki
+
+
+def get_client() -> "wikipediaapi.Wikipedia":
+    """
+    Return the Wikipedia API client shared by all agents and threads in this process.
+
+    Returns:
+        wikipediaapi.Wikipedia: The shared client.
+    """
+    return get_registry().get("wikipedia", _create_client)
+
+
+def _fetch(wiki: "wikipediaapi.Wikipedia", query: str) -> Optional[Dict[str, str]]:
+    """
+    Fetch a page's title and summary; both are loaded lazily, so this is where requests happen.
+
+    Args:
+        wiki (wikipediaapi.Wikipedia): The client.
+        query (str): The page title to look up.
+
+    Returns:
+        Optional[Dict[str, str]]: The title and summary, or None if the page does not exist.
+    """
+    get_limiter("wikipedia").acquire()
+    page = wiki.page(query)
+    if not page.exists():
+        return None
+    return {"title": page.title, "summary": page.summary}
+
+
+def _lookup_local(query: str) -> Optional[Dict[str, str]]:
+    """
+    Look up a page in the offline index, matching exact, prefix, full-text or misspelled titles.
+
+    Args:
+        query (str): The page title to look up.
+
+    Returns:
+        Optional[Dict[str, str]]: The title and summary, or None if no indexed page matches.
+    """
+    page = get_index(config.WIKIPEDIA.get('index_path', './data/wiki/index.sqlite')).lookup(query)
+    if page is not None and page["match"] != "exact":
+        logger.info("Matched %s to indexed page %s (%s)", query, page["title"], page["match"])
+    return page
+
+
+def _to_json(query: str, page: Optional[Dict[str, str]]) -> Optional[str]:
+    """
+    Format a page as the tool's JSON result.
+
+    Args:
+        query (str): The search query string.
+        page (Optional[Dict[str, str]]): The page's title and summary, if one was found.
+
+    Returns:
+        Optional[str]: A JSON string containing the query, title, and summary, or None if no page was found.
+    """
+    if page is None:
+        logger.info("No results found for query: %s", query)
+        return None
+    # Create a dictionary with query, title, and summary
+    result = {
+        "query": query,
+        "title": page["title"],
+        "summary": page["summary"]
+    }
+    logger.info("Successfully retrieved summary for: %s", query)
+    return json.dumps(result, ensure_ascii=False, indent=2)
+
+
+@cached_tool("wikipedia")
+def _search_live(query: str) -> Optional[str]:
+    """
+    Fetch a page from the live API through Wikipedia-API; results go through the shared tool cache.
 
     Args:
         query (str): The search query string.
@@ -14,29 +111,34 @@ def search(query: str) -> Optional[str]:
     Returns:
         Optional[str]: A JSON string containing the query, title, and summary, or None if no result is found.
     """
-    # Initialize Wikipedia API with a user agent
-    wiki = wikipediaapi.Wikipedia(user_agent='ReAct Agents (shankar.arunp@gmail.com)',
-                                  language='en')
+    # Reuse the shared Wikipedia API client and its connection pool
+    wiki = get_client()
+    # Transient failures are retried with backoff; a failing API trips the shared circuit breaker.
+    return _to_json(query, get_upstream("wikipedia").call(_fetch, wiki, query))
 
-    try:
-        logger.info(f"Searching Wikipedia for: {query}")
-        page = wiki.page(query)
-
-        if page.exists():
-            # Create a dictionary with query, title, and summary
-            result = {
-                "query": query,
-                "title": page.title,
-                "summary": page.summary
-            }
-            logger.info(f"Successfully retrieved summary for: {query}")
-            return json.dumps(result, ensure_ascii=False, indent=2)
-        else:
-            logger.info(f"No results found for query: {query}")
-            return None
 
+def search(query: str) -> Optional[str]:
+    """
+    Fetch Wikipedia information for a given search query and return as JSON.
+
+    Pages come from the live API through Wikipedia-API, or from the offline index when the
+    wikipedia backend is set to local in the configuration. Only live results are cached, so
+    switching the backend never serves the other backend's results.
+
+    Args:
+        query (str): The search query string.
+
+    Returns:
+        Optional[str]: A JSON string containing the query, title, and summary, or None if no result is found.
+    """
+    try:
+        logger.info("Searching Wikipedia for: %s", query)
+        if config.WIKIPEDIA.get('backend', 'live') == 'local':
+            # The index answers in well under a millisecond; caching it would only cost a spill write.
+            return _to_json(query, _lookup_local(query))
+        return _search_live(query)
     except Exception as e:
-        logger.exception(f"An error occurred while processing the Wikipedia query: {e}")
+        logger.exception("An error occurred while processing the Wikipedia query: %s", e)
         return None
 
 
@@ -0,0 +1,338 @@
+from xml.etree.ElementTree import iterparse
+from src.config.logging import logger
+from typing import Iterator
+from typing import Optional
+from typing import Tuple
+from typing import Dict
+from typing import List
+import threading
+import argparse
+import difflib
+import sqlite3
+import json
+import time
+import gzip
+import bz2
+import os
+import re
+
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS pages (
+    id INTEGER PRIMARY KEY,
+    title TEXT NOT NULL,
+    norm_title TEXT NOT NULL UNIQUE,
+    summary TEXT NOT NULL
+);
+CREATE VIRTUAL TABLE IF NOT EXISTS pages_fts USING fts5(
+    title, summary, content='pages', content_rowid='id'
+);
+CREATE VIRTUAL TABLE IF NOT EXISTS titles_trigram USING fts5(
+    norm_title, content='pages', content_rowid='id', tokenize='trigram'
+);
+"""
+
+# The abstracts dump prefixes every title with this.
+ABSTRACT_TITLE_PREFIX = "Wikipedia: "
+
+# Fuzzy matches less similar to the query than this are not returned.
+MIN_SIMILARITY = 0.6
+
+TOKEN = re.compile(r"\w+", re.UNICODE)
+
+
+def normalize_title(title: str) -> str:
+    """
+    Normalizes a title for exact and prefix matching: case-folded, underscores as spaces, single-spaced.
+
+    Args:
+        title (str): The page title or query.
+
+    Returns:
+        str: The normalized title.
+    """
+    return " ".join(title.replace("_", " ").casefold().split())
+
+
+def _open(path: str):
+    if path.endswith(".gz"):
+        return gzip.open(path, "rb")
+    if path.endswith(".bz2"):
+        return bz2.open(path, "rb")
+    return open(path, "rb")
+
+
+def read_jsonl(path: str) -> Iterator[Tuple[str, str]]:
+    """
+    Reads pages from a JSONL file with a "title" and a "summary" (or "abstract" or "text") per line.
+
+    Args:
+        path (str): The file path; .gz and .bz2 files are decompressed on the fly.
+
+    Yields:
+        Tuple[str, str]: The title and summary of each page.
+    """
+    with _open(path) as file:
+        for line_number, line in enumerate(file, 1):
+            if not line.strip():
+                continue
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError as e:
+                logger.error("Skipping malformed line %s in %s: %s", line_number, path, e)
+                continue
+            title = record.get("title")
+            summary = record.get("summary") or record.get("abstract") or record.get("text")
+            if title and summary:
+                yield title, summary
+
+
+def read_abstracts_xml(path: str) -> Iterator[Tuple[str, str]]:
+    """
+    Reads pages from a Wikipedia abstracts dump (enwiki-latest-abstract.xml), streaming it element by element.
+
+    Args:
+        path (str): The file path; .gz and .bz2 files are decompressed on the fly.
+
+    Yields:
+        Tuple[str, str]: The title and abstract of each page.
+    """
+    with _open(path) as file:
+        title: Optional[str] = None
+        for _, element in iterparse(file, events=("end",)):
+            if element.tag == "title":
+                title = element.text or ""
+                if title.startswith(ABSTRACT_TITLE_PREFIX):
+                    title = title[len(ABSTRACT_TITLE_PREFIX):]
+            elif element.tag == "abstract":
+                abstract = (element.text or "").strip()
+                if title and abstract:
+                    yield title, abstract
+            elif element.tag == "doc":
+                title = None
+                # Drop parsed documents so memory stays flat on multi-gigabyte dumps.
+                element.clear()
+
+
+def read_dump(path: str) -> Iterator[Tuple[str, str]]:
+    """
+    Reads pages from a dump, choosing the reader from the file name (.xml or .jsonl, optionally compressed).
+
+    Args:
+        path (str): The file path.
+
+    Yields:
+        Tuple[str, str]: The title and summary of each page.
+    """
+    name = path[:-len(".gz")] if path.endswith(".gz") else path[:-len(".bz2")] if path.endswith(".bz2") else path
+    return read_abstracts_xml(path) if name.endswith(".xml") else read_jsonl(path)
+
+
+def build_index(pages: Iterator[Tuple[str, str]], path: str, batch_size: int = 10000) -> int:
+    """
+    Builds an on-disk index from pages, replacing any existing index at the path once complete.
+
+    The index is written to a temporary file and moved into place, so readers never see a
+    half-built index. When a title appears more than once, the last occurrence wins.
+
+    Args:
+        pages (Iterator[Tuple[str, str]]): The titles and summaries to index.
+        path (str): The index path.
+        batch_size (int): The number of pages inserted per statement batch.
+
+    Returns:
+        int: The number of pages indexed.
+    """
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    tmp_path = f"{path}.tmp"
+    if os.path.exists(tmp_path):
+        os.remove(tmp_path)
+
+    conn = sqlite3.connect(tmp_path)
+    try:
+        conn.executescript("PRAGMA journal_mode=OFF; PRAGMA synchronous=OFF;" + SCHEMA)
+        started = time.perf_counter()
+        batch: List[Tuple[str, str, str]] = []
+        for title, summary in pages:
+            batch.append((title, normalize_title(title), summary))
+            if len(batch) >= batch_size:
+                conn.executemany("INSERT OR REPLACE INTO pages (title, norm_title, summary) VALUES (?, ?, ?)", batch)
+                batch = []
+        if batch:
+            conn.executemany("INSERT OR REPLACE INTO pages (title, norm_title, summary) VALUES (?, ?, ?)", batch)
+        conn.execute("INSERT INTO pages_fts(pages_fts) VALUES ('rebuild')")
+        conn.execute("INSERT INTO titles_trigram(titles_trigram) VALUES ('rebuild')")
+        conn.commit()
+        count = conn.execute("SELECT COUNT(*) FROM pages").fetchone()[0]
+        conn.execute("VACUUM")
+    finally:
+        conn.close()
+    os.replace(tmp_path, path)
+    logger.info("Indexed %s pages into %s in %.1fs", count, path, time.perf_counter() - started)
+    return count
+
+
+def _fts_phrase(text: str) -> str:
+    # Quote each term so FTS5 operators and punctuation in queries are taken literally.
+    return '"' + text.replace('"', '""') + '"'
+
+
+class WikiIndex:
+    """
+    Read-only lookups against an index built by build_index.
+
+    A query is resolved by, in order: exact (normalized) title, shortest title starting with the
+    query, full-text match on title words, and trigram similarity for misspelled titles.
+    Each thread gets its own connection, so lookups from the tool pool never contend on a lock.
+    """
+
+    def __init__(self, path: str, prefix_candidates: int = 50, fuzzy_candidates: int = 20):
+        """
+        Opens the index.
+
+        Args:
+            path (str): The index path.
+            prefix_candidates (int): How many prefix matches are considered when picking the shortest.
+            fuzzy_candidates (int): How many full-text or trigram matches are scored for similarity.
+
+        Raises:
+            FileNotFoundError: If no index exists at the path.
+        """
+        if not os.path.exists(path):
+            raise FileNotFoundError(f"No Wikipedia index at {path}; build one with python -m src.tools.wiki_index ingest")
+        self.path = path
+        self.prefix_candidates = prefix_candidates
+        self.fuzzy_candidates = fuzzy_candidates
+        self._local = threading.local()
+
+    def _connection(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(f"file:{self.path}?mode=ro", uri=True, check_same_thread=False)
+            conn.execute("PRAGMA mmap_size=268435456")
+            self._local.conn = conn
+        return conn
+
+    def _best(self, query: str, rows: List[Tuple[str, str]]) -> Optional[Tuple[str, str]]:
+        """
+        Returns the candidate whose title is most similar to the query, if similar enough.
+        """
+        best: Optional[Tuple[str, str]] = None
+        best_score = MIN_SIMILARITY
+        for title, summary in rows:
+            score = difflib.SequenceMatcher(None, query, normalize_title(title)).ratio()
+            if score > best_score:
+                best, best_score = (title, summary), score
+        return best
+
+    def lookup(self, query: str) -> Optional[Dict[str, str]]:
+        """
+        Finds the page best matching a query.
+
+        Args:
+            query (str): The page title or a close variant of it.
+
+        Returns:
+            Optional[Dict[str, str]]: The title, summary and match kind (exact, prefix, fulltext or fuzzy),
+            or None if nothing matches closely enough.
+        """
+        norm = normalize_title(query)
+        if not norm:
+            return None
+        conn = self._connection()
+
+        row = conn.execute("SELECT title, summary FROM pages WHERE norm_title = ?", (norm,)).fetchone()
+        if row is not None:
+            return {"title": row[0], "summary": row[1], "match": "exact"}
+
+        rows = conn.execute(
+            "SELECT title, summary FROM pages WHERE norm_title >= ? AND norm_title < ? ORDER BY norm_title LIMIT ?",
+            (norm, norm + "\U0010ffff", self.prefix_candidates)
+        ).fetchall()
+        if rows:
+            title, summary = min(rows, key=lambda item: len(item[0]))
+            return {"title": title, "summary": summary, "match": "prefix"}
+
+        terms = TOKEN.findall(norm)
+        if terms:
+            rows = conn.execute(
+                "SELECT title, summary FROM pages_fts WHERE pages_fts MATCH ? ORDER BY bm25(pages_fts, 10.0, 1.0) LIMIT ?",
+                ("title : (" + " AND ".join(_fts_phrase(term) for term in terms) + ")", self.fuzzy_candidates)
+            ).fetchall()
+            best = self._best(norm, rows)
+            if best is not None:
+                return {"title": best[0], "summary": best[1], "match": "fulltext"}
+
+        trigrams = {norm[i:i + 3] for i in range(len(norm) - 2)}
+        if trigrams:
+            rows = conn.execute(
+                "SELECT p.title, p.summary FROM titles_trigram t JOIN pages p ON p.id = t.rowid "
+                "WHERE titles_trigram MATCH ? ORDER BY t.rank LIMIT ?",
+                (" OR ".join(_fts_phrase(trigram) for trigram in sorted(trigrams)), self.fuzzy_candidates)
+            ).fetchall()
+            best = self._best(norm, rows)
+            if best is not None:
+                return {"title": best[0], "summary": best[1], "match": "fuzzy"}
+        return None
+
+    def count(self) -> int:
+        """
+        Returns the number of indexed pages.
+        """
+        return self._connection().execute("SELECT COUNT(*) FROM pages").fetchone()[0]
+
+
+_index: Optional[WikiIndex] = None
+_index_lock = threading.Lock()
+
+
+def get_index(path: str) -> WikiIndex:
+    """
+    Returns the process-wide index, opening it on first use.
+
+    Args:
+        path (str): The index path.
+
+    Returns:
+        WikiIndex: The shared index.
+    """
+    global _index
+    if _index is None or _index.path != path:
+        with _index_lock:
+            if _index is None or _index.path != path:
+                _index = WikiIndex(path)
+    return _index
+
+
+def main() -> None:
+    """
+    Command-line entry point: build the index from a dump, or look up titles in it.
+    """
+    from src.config.setup import config
+
+    parser = argparse.ArgumentParser(description="Build and query the offline Wikipedia index.")
+    parser.add_argument("--index", default=None, help="Index path; defaults to wikipedia.index_path in the configuration.")
+    commands = parser.add_subparsers(dest="command", required=True)
+    ingest = commands.add_parser("ingest", help="Index an abstracts XML dump or a JSONL file of titles and summaries.")
+    ingest.add_argument("dump", help="The dump file (.xml or .jsonl, optionally .gz or .bz2).")
+    lookup = commands.add_parser("lookup", help="Look up titles and print the JSON results.")
+    lookup.add_argument("queries", nargs="+", help="Titles to look up.")
+    args = parser.parse_args()
+
+    path = args.index or config.WIKIPEDIA.get('index_path', './data/wiki/index.sqlite')
+    if args.command == "ingest":
+        build_index(read_dump(args.dump), path)
+        return
+
+    index = WikiIndex(path)
+    for query in args.queries:
+        started = time.perf_counter()
+        result = index.lookup(query)
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        print(json.dumps({"query": query, "result": result, "ms": round(elapsed_ms, 3)}, ensure_ascii=False))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,50 @@
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional
+from typing import Callable
+from typing import TypeVar
+from typing import Any
+import functools
+import threading
+import asyncio
+
+
+T = TypeVar("T")
+
+# Blocking calls made from coroutines (rate limiter waits, response cache I/O) are offloaded to a
+# dedicated pool so that many concurrent agents are not capped by the loop's default executor.
+# Tools run on their own pools (see src.tools.registry).
+MAX_WORKERS = 64
+
+_executor: Optional[ThreadPoolExecutor] = None
+_executor_lock = threading.Lock()
+
+
+def get_executor() -> ThreadPoolExecutor:
+    """
+    Returns the shared thread pool used to run blocking calls from coroutines.
+
+    Returns:
+        ThreadPoolExecutor: The lazily created shared executor.
+    """
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                _executor = ThreadPoolExecutor(max_workers=MAX_WORKERS, thread_name_prefix="react-io")
+    return _executor
+
+
+async def run_in_thread(func: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+    """
+    Runs a blocking callable on the shared executor without blocking the event loop.
+
+    Args:
+        func (Callable[..., T]): The blocking function to call.
+        *args (Any): Positional arguments for the function.
+        **kwargs (Any): Keyword arguments for the function.
+
+    Returns:
+        T: The function's return value.
+    """
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(get_executor(), functools.partial(func, *args, **kwargs))
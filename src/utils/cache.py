@@ -0,0 +1,247 @@
+from src.config.logging import logger
+from collections import OrderedDict
+from typing import Optional
+from typing import Tuple
+from typing import Dict
+from typing import Any
+import threading
+import hashlib
+import sqlite3
+import json
+import time
+import os
+
+
+def make_key(*parts: Any) -> str:
+    """
+    Builds a stable cache key from arbitrary JSON-serialisable parts.
+
+    Args:
+        *parts (Any): The values that identify a cached entry.
+
+    Returns:
+        str: The hex SHA-256 digest of the canonical JSON encoding of the parts.
+    """
+    payload = json.dumps(parts, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class CacheStats:
+    """
+    Thread-safe counters (hits, misses, evictions, ...) for a cache.
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._counts: Dict[str, int] = {"hits": 0, "misses": 0, "evictions": 0, "expirations": 0}
+
+    def record(self, counter: str, amount: int = 1) -> None:
+        """
+        Increments a counter, creating it if needed.
+
+        Args:
+            counter (str): The counter name, e.g. hits, misses, evictions or expirations.
+            amount (int): The increment.
+        """
+        with self._lock:
+            self._counts[counter] = self._counts.get(counter, 0) + amount
+
+    def snapshot(self) -> Dict[str, Any]:
+        """
+        Returns the current counters and the derived hit rate.
+
+        Returns:
+            Dict[str, Any]: The counter values keyed by name.
+        """
+        with self._lock:
+            counts: Dict[str, Any] = dict(self._counts)
+        lookups = counts["hits"] + counts["misses"]
+        counts["hit_rate"] = counts["hits"] / lookups if lookups else 0.0
+        return counts
+
+
+class MemoryCache:
+    """
+    A thread-safe in-memory LRU cache with a per-entry TTL.
+    """
+
+    def __init__(self, max_entries: int = 1024):
+        """
+        Initializes an empty cache.
+
+        Args:
+            max_entries (int): The maximum number of entries kept before evicting the least recently used.
+        """
+        self.max_entries = max_entries
+        self.stats = CacheStats()
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[str, Tuple[Any, Optional[float]]]" = OrderedDict()
+
+    def get(self, key: str) -> Optional[Any]:
+        """
+        Looks up a value, refreshing its recency on a hit.
+
+        Args:
+            key (str): The cache key.
+
+        Returns:
+            Optional[Any]: The cached value, or None on a miss or expired entry.
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[1] is not None and entry[1] < time.monotonic():
+                del self._entries[key]
+                self.stats.record("expirations")
+                entry = None
+            if entry is not None:
+                self._entries.move_to_end(key)
+
+        self.stats.record("hits" if entry is not None else "misses")
+        return entry[0] if entry is not None else None
+
+    def set(self, key: str, value: Any, ttl_seconds: Optional[float] = None) -> None:
+        """
+        Stores a value and evicts the least recently used entries beyond the size bound.
+
+        Args:
+            key (str): The cache key.
+            value (Any): The value to store.
+            ttl_seconds (Optional[float]): How long the entry stays valid, or None for no expiry.
+        """
+        expires_at = time.monotonic() + ttl_seconds if ttl_seconds is not None else None
+        with self._lock:
+            self._entries[key] = (value, expires_at)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.stats.record("evictions")
+
+    def clear(self) -> None:
+        """
+        Removes every entry from the cache.
+        """
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._entries)
+
+
+class SQLiteCache:
+    """
+    A persistent string cache backed by SQLite with size-bounded LRU eviction and a TTL.
+
+    The database runs in WAL mode so several processes can share one cache file. The size bound
+    is enforced every evict_every writes rather than on each one, so a write never scans the table;
+    the cache may briefly hold up to evict_every - 1 entries beyond max_entries.
+    """
+
+    def __init__(self, path: str, max_entries: int = 10000, ttl_seconds: Optional[float] = None, table: str = "entries",
+                 evict_every: Optional[int] = None):
+        """
+        Opens (or creates) the cache database.
+
+        Args:
+            path (str): The path to the SQLite file.
+            max_entries (int): The maximum number of entries kept before evicting the least recently used.
+            ttl_seconds (Optional[float]): How long an entry stays valid, or None for no expiry.
+            table (str): The table holding this cache's entries, so several caches can share one file.
+            evict_every (Optional[int]): The number of writes between size checks; defaults to 1% of max_entries.
+        """
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        self.path = path
+        self.table = table
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.evict_every = evict_every if evict_every is not None else max(1, max_entries // 100)
+        self.stats = CacheStats()
+        self._lock = threading.Lock()
+        # Start due for a check, since other processes may have filled the file.
+        self._writes = self.evict_every - 1
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None, timeout=30)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            f"CREATE TABLE IF NOT EXISTS {table} ("
+            "key TEXT PRIMARY KEY, value TEXT NOT NULL, created_at REAL NOT NULL, accessed_at REAL NOT NULL)"
+        )
+        self._conn.execute(f"CREATE INDEX IF NOT EXISTS {table}_accessed_at ON {table} (accessed_at)")
+
+    def _expired(self, created_at: float, now: float) -> bool:
+        return self.ttl_seconds is not None and now - created_at > self.ttl_seconds
+
+    def get(self, key: str) -> Optional[str]:
+        """
+        Looks up a value, refreshing its recency on a hit.
+
+        Args:
+            key (str): The cache key.
+
+        Returns:
+            Optional[str]: The cached value, or None on a miss or expired entry.
+        """
+        now = time.time()
+        try:
+            with self._lock:
+                row = self._conn.execute(f"SELECT value, created_at FROM {self.table} WHERE key = ?", (key,)).fetchone()
+                if row is not None and self._expired(row[1], now):
+                    self._conn.execute(f"DELETE FROM {self.table} WHERE key = ?", (key,))
+                    self.stats.record("expirations")
+                    row = None
+                if row is not None:
+                    self._conn.execute(f"UPDATE {self.table} SET accessed_at = ? WHERE key = ?", (now, key))
+        except sqlite3.Error as e:
+            logger.error("Cache lookup failed for %s: %s", self.path, e)
+            row = None
+
+        self.stats.record("hits" if row is not None else "misses")
+        return row[0] if row is not None else None
+
+    def set(self, key: str, value: str) -> None:
+        """
+        Stores a value and evicts the least recently used entries beyond the size bound.
+
+        Args:
+            key (str): The cache key.
+            value (str): The value to store.
+        """
+        now = time.time()
+        try:
+            with self._lock:
+                self._conn.execute(
+                    f"INSERT OR REPLACE INTO {self.table} (key, value, created_at, accessed_at) VALUES (?, ?, ?, ?)",
+                    (key, value, now, now)
+                )
+                self._writes += 1
+                if self._writes >= self.evict_every:
+                    self._writes = 0
+                    self._evict()
+        except sqlite3.Error as e:
+            logger.error("Cache write failed for %s: %s", self.path, e)
+
+    def _evict(self) -> None:
+        """
+        Evicts the least recently used entries beyond the size bound; the caller holds the lock.
+        """
+        overflow = self._conn.execute(f"SELECT COUNT(*) FROM {self.table}").fetchone()[0] - self.max_entries
+        if overflow > 0:
+            self._conn.execute(
+                f"DELETE FROM {self.table} WHERE key IN (SELECT key FROM {self.table} ORDER BY accessed_at LIMIT ?)",
+                (overflow,)
+            )
+            self.stats.record("evictions", overflow)
+
+    def clear(self) -> None:
+        """
+        Removes every entry from the cache.
+        """
+        with self._lock:
+            self._conn.execute(f"DELETE FROM {self.table}")
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._conn.execute(f"SELECT COUNT(*) FROM {self.table}").fetchone()[0]
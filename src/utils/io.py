@@ -3,7 +3,6 @@ from typing import Optional
 from typing import Dict 
 from typing import Any 
 import json 
-import yaml
 
 
 def read_file(path: str) -> Optional[str]:
@@ -21,10 +20,10 @@ def read_file(path: str) -> Optional[str]:
             content: str = file.read()
         return content
     except FileNotFoundError:
-        logger.info(f"File not found: {path}")
+        logger.info("File not found: %s", path)
         return None
     except Exception as e:
-        logger.info(f"Error reading file: {e}")
+        logger.info("Error reading file: %s", e)
         return None
 
 
@@ -43,17 +42,19 @@ def load_yaml(filename: str) -> Dict[str, Any]:
         yaml.YAMLError: If there is an error parsing the YAML file.
         Exception: For any other exceptions.
     """
+    import yaml
+
     try:
         with open(filename, 'r') as file:
             return yaml.safe_load(file)
     except FileNotFoundError:
-        logger.error(f"File '{filename}' not found.")
+        logger.error("File '%s' not found.", filename)
         raise
     except yaml.YAMLError as e:
-        logger.error(f"Error parsing YAML file '{filename}': {e}")
+        logger.error("Error parsing YAML file '%s': %s", filename, e)
         raise
     except Exception as e:
-        logger.error(f"Error loading YAML file: {e}")
+        logger.error("Error loading YAML file: %s", e)
         raise
 
 
@@ -76,13 +77,13 @@ def load_json(filename: str) -> Optional[Dict[str, Any]]:
         with open(filename, 'r') as file:
             return json.load(file)
     except FileNotFoundError:
-        logger.error(f"File '{filename}' not found.")
+        logger.error("File '%s' not found.", filename)
         return None
     except json.JSONDecodeError:
-        logger.error(f"File '{filename}' contains invalid JSON.")
+        logger.error("File '%s' contains invalid JSON.", filename)
         return None
     except Exception as e:
-        logger.error(f"Error loading JSON file: {e}")
+        logger.error("Error loading JSON file: %s", e)
         raise
 
 
@@ -100,10 +101,10 @@ def write_to_file(path: str, content: str) -> None:
     try:
         with open(path, 'a', encoding='utf-8') as file:
             file.write(content)
-        logger.info(f"Content written to file: {path}")
+        logger.info("Content written to file: %s", path)
     except FileNotFoundError:
-        logger.error(f"File not found: {path}")
+        logger.error("File not found: %s", path)
         raise
     except Exception as e:
-        logger.error(f"Error writing to file '{path}': {e}")
+        logger.error("Error writing to file '%s': %s", path, e)
         raise
@@ -0,0 +1,273 @@
+from src.config.logging import logger
+from src.config.setup import config
+from collections import deque
+from typing import Iterator
+from typing import Optional
+from typing import Tuple
+from typing import Deque
+from typing import Dict
+from typing import List
+from typing import Any
+import contextlib
+import threading
+import atexit
+import json
+import time
+import os
+
+
+QUANTILES = (0.5, 0.95, 0.99)
+
+Labels = Tuple[Tuple[str, str], ...]
+
+
+def _labels(labels: Dict[str, Any]) -> Labels:
+    return tuple(sorted((key, str(value)) for key, value in labels.items()))
+
+
+def _format_labels(labels: Labels, extra: Optional[Tuple[str, str]] = None) -> str:
+    pairs = list(labels) + ([extra] if extra else [])
+    if not pairs:
+        return ""
+    escaped = [(key, value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")) for key, value in pairs]
+    return "{" + ",".join(f'{key}="{value}"' for key, value in escaped) + "}"
+
+
+class Summary:
+    """
+    A latency distribution: total count and sum, and quantiles over a sliding window of recent samples.
+    """
+
+    def __init__(self, max_samples: int = 2048):
+        """
+        Initializes an empty summary.
+
+        Args:
+            max_samples (int): The number of most recent observations kept for quantiles.
+        """
+        self.count = 0
+        self.sum = 0.0
+        self.samples: Deque[float] = deque(maxlen=max_samples)
+
+    def observe(self, value: float) -> None:
+        self.count += 1
+        self.sum += value
+        self.samples.append(value)
+
+    def quantiles(self) -> Dict[float, float]:
+        """
+        Returns the configured quantiles of the recent samples.
+
+        Returns:
+            Dict[float, float]: The value at each quantile, or an empty dict before the first sample.
+        """
+        ordered = sorted(self.samples)
+        if not ordered:
+            return {}
+        return {q: ordered[min(len(ordered) - 1, int(q * len(ordered)))] for q in QUANTILES}
+
+
+class Span:
+    """
+    The timing of one phase, available once its block has finished.
+    """
+
+    def __init__(self, phase: str, labels: Dict[str, Any]):
+        self.phase = phase
+        self.labels = labels
+        self.started = time.perf_counter()
+        self.duration = 0.0
+        self.error: Optional[str] = None
+
+
+class Metrics:
+    """
+    A thread-safe, in-process registry of counters and phase-duration summaries.
+
+    Everything can be rendered in the Prometheus text exposition format or as a JSON snapshot.
+    """
+
+    def __init__(self, namespace: str = "react", max_samples: int = 2048):
+        """
+        Initializes an empty registry.
+
+        Args:
+            namespace (str): The prefix of every exported metric name.
+            max_samples (int): The sliding window size of each summary.
+        """
+        self.namespace = namespace
+        self.max_samples = max_samples
+        self._lock = threading.Lock()
+        self._counters: Dict[str, Dict[Labels, float]] = {}
+        self._summaries: Dict[str, Dict[Labels, Summary]] = {}
+
+    def inc(self, name: str, amount: float = 1, **labels: Any) -> None:
+        """
+        Increments a counter.
+
+        Args:
+            name (str): The counter name without namespace or _total suffix, e.g. iterations.
+            amount (float): The increment.
+            **labels (Any): The label values identifying the series.
+        """
+        key = _labels(labels)
+        with self._lock:
+            series = self._counters.setdefault(name, {})
+            series[key] = series.get(key, 0) + amount
+
+    def observe(self, name: str, value: float, **labels: Any) -> None:
+        """
+        Records an observation in a summary.
+
+        Args:
+            name (str): The summary name without namespace, e.g. phase_duration_seconds.
+            value (float): The observed value.
+            **labels (Any): The label values identifying the series.
+        """
+        key = _labels(labels)
+        with self._lock:
+            series = self._summaries.setdefault(name, {})
+            summary = series.get(key)
+            if summary is None:
+                summary = series[key] = Summary(self.max_samples)
+            summary.observe(value)
+
+    @contextlib.contextmanager
+    def span(self, phase: str, **labels: Any) -> Iterator[Span]:
+        """
+        Times a block and records its duration under phase_duration_seconds.
+
+        Exceptions propagate; their type is recorded on the span and counted under errors.
+        Cancellation is timed but not counted as an error.
+
+        Args:
+            phase (str): The phase name, e.g. render, gemini, parse or tool.
+            **labels (Any): Extra label values, such as the tool name.
+
+        Yields:
+            Span: The span, whose duration is set when the block exits.
+        """
+        span = Span(phase, labels)
+        try:
+            yield span
+        except Exception as e:
+            span.error = type(e).__name__
+            self.inc("errors", phase=phase, error=span.error, **labels)
+            raise
+        finally:
+            span.duration = time.perf_counter() - span.started
+            self.observe("phase_duration_seconds", span.duration, phase=phase, **labels)
+
+    def snapshot(self) -> Dict[str, Any]:
+        """
+        Returns the current counters and summaries.
+
+        Returns:
+            Dict[str, Any]: Counters and summaries (count, sum, p50, p95, p99) keyed by name and label set.
+        """
+        with self._lock:
+            counters = {
+                name: [{"labels": dict(key), "value": value} for key, value in series.items()]
+                for name, series in self._counters.items()
+            }
+            summaries = {
+                name: [
+                    {
+                        "labels": dict(key),
+                        "count": summary.count,
+                        "sum": summary.sum,
+                        **{f"p{int(q * 100)}": value for q, value in summary.quantiles().items()}
+                    }
+                    for key, summary in series.items()
+                ]
+                for name, series in self._summaries.items()
+            }
+        return {"counters": counters, "summaries": summaries}
+
+    def to_prometheus(self) -> str:
+        """
+        Renders every metric in the Prometheus text exposition format.
+
+        Returns:
+            str: The exposition text.
+        """
+        lines: List[str] = []
+        with self._lock:
+            for name, series in sorted(self._counters.items()):
+                metric = f"{self.namespace}_{name}_total"
+                lines.append(f"# TYPE {metric} counter")
+                for key, value in series.items():
+                    lines.append(f"{metric}{_format_labels(key)} {value}")
+            for name, series in sorted(self._summaries.items()):
+                metric = f"{self.namespace}_{name}"
+                lines.append(f"# TYPE {metric} summary")
+                for key, summary in series.items():
+                    for q, value in summary.quantiles().items():
+                        lines.append(f"{metric}{_format_labels(key, ('quantile', str(q)))} {value}")
+                    lines.append(f"{metric}_sum{_format_labels(key)} {summary.sum}")
+                    lines.append(f"{metric}_count{_format_labels(key)} {summary.count}")
+        return "\n".join(lines) + "\n"
+
+    def dump(self, path: str) -> None:
+        """
+        Writes the metrics to a file: JSON for a .json path, Prometheus text otherwise.
+
+        Args:
+            path (str): The output file path.
+        """
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        if path.endswith(".json"):
+            text = json.dumps(self.snapshot(), indent=2)
+        else:
+            text = self.to_prometheus()
+        # Write then rename so a scraper never reads a half-written file.
+        temp_path = f"{path}.tmp"
+        with open(temp_path, 'w', encoding='utf-8') as file:
+            file.write(text)
+        os.replace(temp_path, path)
+
+    def reset(self) -> None:
+        """
+        Clears every counter and summary.
+        """
+        with self._lock:
+            self._counters.clear()
+            self._summaries.clear()
+
+
+_metrics: Optional[Metrics] = None
+_metrics_lock = threading.Lock()
+
+
+def _dump_at_exit(metrics: Metrics, path: str) -> None:
+    try:
+        metrics.dump(path)
+    except OSError as e:
+        logger.error("Failed to write metrics to %s: %s", path, e)
+
+
+def get_metrics() -> Metrics:
+    """
+    Returns the process-wide metrics registry, creating it from the configuration on first use.
+
+    If a metrics path is configured, the metrics are written there when the process exits.
+
+    Returns:
+        Metrics: The shared registry.
+    """
+    global _metrics
+    if _metrics is None:
+        with _metrics_lock:
+            if _metrics is None:
+                settings = config.METRICS
+                metrics = Metrics(
+                    namespace=settings.get('namespace', 'react'),
+                    max_samples=settings.get('max_samples', 2048)
+                )
+                path = settings.get('path')
+                if path:
+                    atexit.register(_dump_at_exit, metrics, path)
+                _metrics = metrics
+    return _metrics
@@ -0,0 +1,273 @@
+from src.utils.aio import run_in_thread
+from src.utils.metrics import get_metrics
+from src.config.logging import logger
+from src.config.setup import config
+from typing import Optional
+from typing import Dict
+from typing import List
+from typing import Any
+import threading
+import asyncio
+import sqlite3
+import time
+import os
+
+
+SECONDS_PER_MONTH = 30 * 24 * 3600
+
+
+class TokenBucket:
+    """
+    A thread-safe token bucket that hands out reservations in arrival order.
+
+    A reservation deducts its tokens immediately, even into a deficit, and returns how long
+    the caller must wait for them to be refilled. Later callers queue behind that deficit,
+    so waiting callers are served first come, first served instead of racing on wake-up.
+    """
+
+    # Reservations are cheap and never block, so async callers can make them on the event loop.
+    blocking = False
+
+    def __init__(self, rate: float, capacity: float):
+        """
+        Initializes a full bucket.
+
+        Args:
+            rate (float): The tokens added per second.
+            capacity (float): The maximum number of tokens, i.e. the allowed burst.
+        """
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def reserve(self, amount: float) -> float:
+        """
+        Takes tokens from the bucket.
+
+        Args:
+            amount (float): The tokens needed.
+
+        Returns:
+            float: The seconds to wait before the tokens are available.
+        """
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate) - amount
+            self._updated = now
+            return max(0.0, -self._tokens / self.rate)
+
+
+class SQLiteTokenBucket(TokenBucket):
+    """
+    A token bucket whose state lives in a SQLite file, shared by every process that opens it.
+
+    Each reservation runs in an immediate (write-locked) transaction, so processes are served
+    in the order they obtain the lock.
+    """
+
+    blocking = True
+
+    def __init__(self, path: str, key: str, rate: float, capacity: float):
+        """
+        Opens (or creates) the shared bucket.
+
+        Args:
+            path (str): The path to the SQLite file.
+            key (str): The bucket's name within the file.
+            rate (float): The tokens added per second.
+            capacity (float): The maximum number of tokens, i.e. the allowed burst.
+        """
+        super().__init__(rate, capacity)
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.path = path
+        self.key = key
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None, timeout=30)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS buckets (key TEXT PRIMARY KEY, tokens REAL NOT NULL, updated_at REAL NOT NULL)"
+        )
+
+    def reserve(self, amount: float) -> float:
+        try:
+            with self._lock:
+                # Wall-clock time, since monotonic clocks are not comparable across processes.
+                now = time.time()
+                self._conn.execute("BEGIN IMMEDIATE")
+                try:
+                    row = self._conn.execute("SELECT tokens, updated_at FROM buckets WHERE key = ?", (self.key,)).fetchone()
+                    tokens = self.capacity if row is None else min(self.capacity, row[0] + max(0.0, now - row[1]) * self.rate)
+                    tokens -= amount
+                    self._conn.execute("INSERT OR REPLACE INTO buckets (key, tokens, updated_at) VALUES (?, ?, ?)",
+                                       (self.key, tokens, now))
+                    self._conn.execute("COMMIT")
+                except BaseException:
+                    self._conn.execute("ROLLBACK")
+                    raise
+        except sqlite3.Error as e:
+            # Pace this process alone rather than failing the call.
+            logger.error("Shared rate limit bucket %s in %s is unavailable: %s", self.key, self.path, e)
+            return super().reserve(amount)
+        return max(0.0, -tokens / self.rate)
+
+
+class RateLimiter:
+    """
+    Paces calls to one upstream against a request-rate bucket and, optionally, a token-rate bucket.
+
+    Calls wait for their turn rather than failing, so bursts from many agents are smoothed out
+    instead of turning into 429s.
+    """
+
+    def __init__(self, name: str, requests: Optional[TokenBucket] = None, tokens: Optional[TokenBucket] = None,
+                 extra: Optional[List[TokenBucket]] = None):
+        """
+        Initializes the limiter.
+
+        Args:
+            name (str): The upstream name, for logs and metrics.
+            requests (Optional[TokenBucket]): Charged one token per call, or None for no request limit.
+            tokens (Optional[TokenBucket]): Charged the call's estimated model tokens, or None for no token limit.
+            extra (Optional[List[TokenBucket]]): Further per-call buckets, e.g. monthly quota pacing.
+        """
+        self.name = name
+        self.request_buckets = [bucket for bucket in [requests] + (extra or []) if bucket is not None]
+        self.tokens = tokens
+
+    def _reserve(self, tokens: int) -> float:
+        waits = [bucket.reserve(1) for bucket in self.request_buckets]
+        if self.tokens is not None and tokens:
+            waits.append(self.tokens.reserve(tokens))
+        wait = max(waits, default=0.0)
+        if wait > 0:
+            get_metrics().inc("rate_limited", upstream=self.name)
+            get_metrics().observe("rate_limit_wait_seconds", wait, upstream=self.name)
+        return wait
+
+    @property
+    def _blocking(self) -> bool:
+        return any(bucket.blocking for bucket in self.request_buckets + ([self.tokens] if self.tokens else []))
+
+    def acquire(self, tokens: int = 0) -> float:
+        """
+        Waits until a call may be made.
+
+        Args:
+            tokens (int): The estimated model tokens the call will consume.
+
+        Returns:
+            float: The seconds spent waiting.
+        """
+        wait = self._reserve(tokens)
+        if wait > 0:
+            time.sleep(wait)
+        return wait
+
+    async def acquire_async(self, tokens: int = 0) -> float:
+        """
+        Waits until a call may be made, without blocking the event loop.
+
+        Args:
+            tokens (int): The estimated model tokens the call will consume.
+
+        Returns:
+            float: The seconds spent waiting.
+        """
+        wait = await run_in_thread(self._reserve, tokens) if self._blocking else self._reserve(tokens)
+        if wait > 0:
+            await asyncio.sleep(wait)
+        return wait
+
+    def debit(self, tokens: int) -> None:
+        """
+        Charges tokens after the fact, e.g. output tokens known only once a call completes.
+
+        Args:
+            tokens (int): The tokens to charge; later callers wait for them to be refilled.
+        """
+        if self.tokens is not None and tokens:
+            self.tokens.reserve(tokens)
+
+    async def debit_async(self, tokens: int) -> None:
+        """
+        Charges tokens after the fact, without blocking the event loop on a shared bucket.
+
+        Args:
+            tokens (int): The tokens to charge; later callers wait for them to be refilled.
+        """
+        if self._blocking:
+            await run_in_thread(self.debit, tokens)
+        else:
+            self.debit(tokens)
+
+
+_limiters: Dict[str, RateLimiter] = {}
+_limiters_lock = threading.Lock()
+
+
+def _bucket(settings: Dict[str, Any], key: str, rate: float, capacity: float) -> TokenBucket:
+    if settings.get('backend', 'memory') == 'sqlite':
+        return SQLiteTokenBucket(settings.get('path', './data/cache/ratelimit.sqlite'), key, rate, capacity)
+    return TokenBucket(rate, capacity)
+
+
+def _create_limiter(name: str) -> RateLimiter:
+    """
+    Builds a limiter from the upstream's rate_limit settings; unset limits are not enforced.
+    """
+    shared = config.RATE_LIMIT
+    settings = {**shared, **shared.get(name, {})}
+    requests_bucket = tokens_bucket = None
+    extra: List[TokenBucket] = []
+
+    per_second = settings.get('requests_per_second')
+    if per_second:
+        requests_bucket = _bucket(settings, f"{name}:requests", per_second, settings.get('burst', max(1.0, per_second)))
+    per_minute = settings.get('tokens_per_minute')
+    if per_minute:
+        tokens_bucket = _bucket(settings, f"{name}:tokens", per_minute / 60, per_minute)
+    per_month = settings.get('requests_per_month')
+    if per_month:
+        # Spread the monthly quota evenly, allowing a small burst.
+        extra.append(_bucket(settings, f"{name}:monthly", per_month / SECONDS_PER_MONTH, settings.get('monthly_burst', 10)))
+    return RateLimiter(name, requests=requests_bucket, tokens=tokens_bucket, extra=extra)
+
+
+def get_limiter(name: str) -> RateLimiter:
+    """
+    Returns the process-wide rate limiter for an upstream, creating it from the configuration on first use.
+
+    Args:
+        name (str): The upstream name: gemini, serp or wikipedia.
+
+    Returns:
+        RateLimiter: The shared limiter; it never waits if no limits are configured.
+    """
+    limiter = _limiters.get(name)
+    if limiter is None:
+        with _limiters_lock:
+            limiter = _limiters.get(name)
+            if limiter is None:
+                limiter = _limiters[name] = _create_limiter(name)
+    return limiter
+
+
+def set_limiter(name: str, limiter: Optional[RateLimiter]) -> Optional[RateLimiter]:
+    """
+    Replaces the process-wide rate limiter for an upstream, e.g. to lift limits for offline benchmarks.
+
+    Args:
+        name (str): The upstream name.
+        limiter (Optional[RateLimiter]): The limiter to use from now on, or None to rebuild it from the configuration.
+
+    Returns:
+        Optional[RateLimiter]: The limiter it replaced, if one had been created.
+    """
+    with _limiters_lock:
+        previous = _limiters.pop(name, None)
+        if limiter is not None:
+            _limiters[name] = limiter
+    return previous
@@ -0,0 +1,365 @@
+from src.utils.metrics import get_metrics
+from src.config.logging import logger
+from src.config.setup import config
+from typing import Awaitable
+from typing import Callable
+from typing import Optional
+from typing import TypeVar
+from typing import Dict
+from typing import Any
+import threading
+import asyncio
+import random
+import time
+import sys
+
+
+T = TypeVar("T")
+
+# HTTP statuses worth retrying: rate limiting and transient server-side failures.
+TRANSIENT_STATUSES = {408, 429, 500, 502, 503, 504}
+
+
+class CircuitOpenError(Exception):
+    """
+    Raised instead of calling an upstream whose circuit breaker is open.
+    """
+
+
+def _status_code(error: BaseException) -> Optional[int]:
+    """
+    Returns the HTTP status carried by a requests or google.api_core error, if any.
+    """
+    response = getattr(error, "response", None)
+    status = getattr(response, "status_code", None)
+    if isinstance(status, int):
+        return status
+    code = getattr(error, "code", None)
+    return code if isinstance(code, int) else None
+
+
+def is_transient(error: BaseException) -> bool:
+    """
+    Classifies an error as transient (worth retrying) or permanent.
+
+    Connection failures, timeouts, rate limiting and 5xx responses are transient;
+    other client errors (bad request, authentication, not found) are not.
+
+    Args:
+        error (BaseException): The error raised by the upstream call.
+
+    Returns:
+        bool: True if the call may succeed when retried.
+    """
+    if isinstance(error, CircuitOpenError):
+        return False
+    if isinstance(error, (ConnectionError, TimeoutError, asyncio.TimeoutError)):
+        return True
+    # requests is only loaded by the HTTP tools; if it was never imported, this cannot be one of its errors.
+    requests = sys.modules.get("requests")
+    if requests is not None and isinstance(error, (requests.exceptions.ConnectionError, requests.exceptions.Timeout)):
+        return True
+    status = _status_code(error)
+    return status in TRANSIENT_STATUSES if status is not None else False
+
+
+def _retry_after(error: BaseException) -> Optional[float]:
+    """
+    Returns the delay requested by a Retry-After header, if the error carries one in seconds.
+    """
+    headers = getattr(getattr(error, "response", None), "headers", None) or {}
+    try:
+        return float(headers.get("Retry-After"))
+    except (TypeError, ValueError):
+        return None
+
+
+class CircuitBreaker:
+    """
+    Tracks an upstream's health and fails fast while it is down.
+
+    After failure_threshold consecutive transient failures the circuit opens and calls are
+    rejected for reset_timeout seconds. Then a limited number of trial calls are let through
+    (half-open); a success closes the circuit again and a failure re-opens it.
+    """
+
+    def __init__(self, name: str, failure_threshold: int = 5, reset_timeout: float = 30.0, half_open_max: int = 1):
+        """
+        Initializes a closed circuit.
+
+        Args:
+            name (str): The upstream name, for logs and metrics.
+            failure_threshold (int): The consecutive failures that open the circuit.
+            reset_timeout (float): How long the circuit stays open before allowing trial calls.
+            half_open_max (int): The number of concurrent trial calls while half-open.
+        """
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.half_open_max = half_open_max
+        self._lock = threading.Lock()
+        self._failures = 0
+        self._opened_at: Optional[float] = None
+        self._trials = 0
+
+    @property
+    def state(self) -> str:
+        """
+        The current state: closed, open or half_open.
+        """
+        with self._lock:
+            return self._state()
+
+    def _state(self) -> str:
+        if self._opened_at is None:
+            return "closed"
+        if time.monotonic() - self._opened_at >= self.reset_timeout:
+            return "half_open"
+        return "open"
+
+    def allow(self) -> bool:
+        """
+        Admits a call, or raises if the circuit is open.
+
+        Returns:
+            bool: Whether the call is a half-open trial, whose slot must be released if it ends without
+            a verdict (see release).
+
+        Raises:
+            CircuitOpenError: If the upstream is considered down.
+        """
+        with self._lock:
+            state = self._state()
+            if state == "closed":
+                return False
+            if state == "half_open" and self._trials < self.half_open_max:
+                self._trials += 1
+                return True
+        get_metrics().inc("circuit_rejections", upstream=self.name)
+        raise CircuitOpenError(f"Circuit for {self.name} is open; failing fast")
+
+    def release(self) -> None:
+        """
+        Frees a trial slot after a call that ended without a verdict, e.g. because it was cancelled.
+        """
+        with self._lock:
+            self._trials = max(0, self._trials - 1)
+
+    def record_success(self) -> None:
+        with self._lock:
+            if self._opened_at is not None:
+                logger.info("Circuit for %s closed", self.name)
+            self._failures = 0
+            self._opened_at = None
+            self._trials = 0
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self._failures += 1
+            half_open = self._opened_at is not None
+            if half_open or self._failures >= self.failure_threshold:
+                if not half_open:
+                    logger.warning("Circuit for %s opened after %s consecutive failures", self.name, self._failures)
+                    get_metrics().inc("circuit_opened", upstream=self.name)
+                self._opened_at = time.monotonic()
+                self._trials = 0
+
+
+class Upstream:
+    """
+    Calls an upstream service with classified retries, exponential backoff with full jitter,
+    optional hedging and a circuit breaker.
+    """
+
+    def __init__(self, name: str, max_attempts: int = 3, base_delay: float = 0.5, max_delay: float = 8.0,
+                 hedge_after: Optional[float] = None, breaker: Optional[CircuitBreaker] = None,
+                 retry_if: Callable[[BaseException], bool] = is_transient):
+        """
+        Initializes the upstream policy.
+
+        Args:
+            name (str): The upstream name, for logs and metrics.
+            max_attempts (int): The maximum number of attempts per call, including the first.
+            base_delay (float): The backoff before the first retry, doubled on each later one.
+            max_delay (float): The cap on any single backoff.
+            hedge_after (Optional[float]): If set, async calls still pending after this many seconds
+                get a second, concurrent attempt and the first to succeed wins.
+            breaker (Optional[CircuitBreaker]): The circuit breaker; defaults to one with standard thresholds.
+            retry_if (Callable[[BaseException], bool]): Decides which errors are retried.
+        """
+        self.name = name
+        self.max_attempts = max(1, max_attempts)
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.hedge_after = hedge_after
+        self.breaker = breaker or CircuitBreaker(name)
+        self.retry_if = retry_if
+
+    def backoff(self, attempt: int, error: Optional[BaseException] = None) -> float:
+        """
+        Returns the delay before the next attempt, honouring a Retry-After hint up to max_delay.
+
+        Args:
+            attempt (int): The number of attempts made so far.
+            error (Optional[BaseException]): The error of the last attempt.
+
+        Returns:
+            float: The delay in seconds.
+        """
+        delay = random.uniform(0, min(self.max_delay, self.base_delay * 2 ** (attempt - 1)))
+        hint = _retry_after(error) if error is not None else None
+        return min(self.max_delay, max(delay, hint)) if hint is not None else delay
+
+    def _failed(self, attempt: int, error: Exception) -> Optional[float]:
+        """
+        Records a failed attempt and returns the delay before retrying, or None to give up.
+        """
+        transient = self.retry_if(error)
+        if transient:
+            self.breaker.record_failure()
+        else:
+            # A permanent error (e.g. a bad request) still means the upstream answered.
+            self.breaker.record_success()
+        if not transient or attempt >= self.max_attempts:
+            return None
+        delay = self.backoff(attempt, error)
+        get_metrics().inc("retries", upstream=self.name)
+        logger.warning("%s call failed (%s); retry %s/%s in %.2fs", self.name, error, attempt, self.max_attempts - 1, delay)
+        return delay
+
+    def call(self, func: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+        """
+        Calls a blocking function with retries and circuit breaking.
+
+        Args:
+            func (Callable[..., T]): The upstream call.
+            *args (Any): Positional arguments for the call.
+            **kwargs (Any): Keyword arguments for the call.
+
+        Returns:
+            T: The call's result.
+
+        Raises:
+            CircuitOpenError: If the circuit is open.
+            Exception: The last error, once it is permanent or the attempts are exhausted.
+        """
+        attempt = 0
+        while True:
+            attempt += 1
+            trial = self.breaker.allow()
+            try:
+                result = func(*args, **kwargs)
+            except Exception as e:
+                delay = self._failed(attempt, e)
+                if delay is None:
+                    raise
+                time.sleep(delay)
+                continue
+            except BaseException:
+                # An interrupted trial says nothing about the upstream, but must not keep its slot.
+                if trial:
+                    self.breaker.release()
+                raise
+            self.breaker.record_success()
+            return result
+
+    async def call_async(self, factory: Callable[[], Awaitable[T]]) -> T:
+        """
+        Awaits an upstream call with retries, optional hedging and circuit breaking.
+
+        Args:
+            factory (Callable[[], Awaitable[T]]): Creates a fresh awaitable for each attempt.
+
+        Returns:
+            T: The call's result.
+
+        Raises:
+            CircuitOpenError: If the circuit is open.
+            Exception: The last error, once it is permanent or the attempts are exhausted.
+        """
+        attempt = 0
+        while True:
+            attempt += 1
+            trial = self.breaker.allow()
+            try:
+                result = await (self._hedged(factory) if self.hedge_after else factory())
+            except Exception as e:
+                delay = self._failed(attempt, e)
+                if delay is None:
+                    raise
+                await asyncio.sleep(delay)
+                continue
+            except BaseException:
+                # A cancelled trial says nothing about the upstream, but must not keep its slot.
+                if trial:
+                    self.breaker.release()
+                raise
+            self.breaker.record_success()
+            return result
+
+    async def _hedged(self, factory: Callable[[], Awaitable[T]]) -> T:
+        """
+        Runs an attempt and, if it is slower than hedge_after, a concurrent backup; the first success wins.
+        """
+        tasks = [asyncio.ensure_future(factory())]
+        try:
+            done, _ = await asyncio.wait(tasks, timeout=self.hedge_after)
+            if done:
+                return tasks[0].result()
+            get_metrics().inc("hedges", upstream=self.name)
+            logger.info("%s call exceeded %ss; sending a hedged request", self.name, self.hedge_after)
+            tasks.append(asyncio.ensure_future(factory()))
+            pending = set(tasks)
+            error: Optional[BaseException] = None
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    # A cancelled attempt has no exception to inspect; calling exception() would raise.
+                    if task.cancelled():
+                        continue
+                    if task.exception() is None:
+                        return task.result()
+                    error = task.exception()
+            raise error if error is not None else asyncio.CancelledError()
+        finally:
+            for task in tasks:
+                if not task.done():
+                    task.cancel()
+
+
+_upstreams: Dict[str, Upstream] = {}
+_upstreams_lock = threading.Lock()
+
+
+def get_upstream(name: str) -> Upstream:
+    """
+    Returns the process-wide policy for an upstream, creating it from the configuration on first use.
+
+    The circuit breaker is shared, so every agent in the process sees the same upstream health.
+
+    Args:
+        name (str): The upstream name: gemini, serp or wikipedia.
+
+    Returns:
+        Upstream: The shared upstream policy.
+    """
+    upstream = _upstreams.get(name)
+    if upstream is None:
+        with _upstreams_lock:
+            upstream = _upstreams.get(name)
+            if upstream is None:
+                settings = config.RESILIENCE.get(name, {})
+                upstream = Upstream(
+                    name,
+                    max_attempts=settings.get('max_attempts', 3),
+                    base_delay=settings.get('base_delay', 0.5),
+                    max_delay=settings.get('max_delay', 8.0),
+                    hedge_after=settings.get('hedge_after'),
+                    breaker=CircuitBreaker(
+                        name,
+                        failure_threshold=settings.get('failure_threshold', 5),
+                        reset_timeout=settings.get('reset_timeout', 30.0)
+                    )
+                )
+                _upstreams[name] = upstream
+    return upstream
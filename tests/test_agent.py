@@ -0,0 +1,44 @@
+from src.bench.fakes import FakeGenerativeModel
+from src.react.trace import NullTraceSink
+from src.react.agent import Action
+from src.react.agent import Agent
+import pytest
+import json
+
+
+@pytest.fixture
+def agent() -> Agent:
+    agent = Agent(model=FakeGenerativeModel([""]), sink=NullTraceSink())
+    agent.register("wikipedia", lambda query: query)
+    agent.start("How old is the oldest tree in Brazil?")
+    return agent
+
+
+def test_single_action(agent):
+    response = json.dumps({"thought": "x", "action": {"name": "wikipedia", "input": "Brazil"}})
+    assert agent.decide(response).actions == [Action(name="wikipedia", input="Brazil")]
+
+
+def test_empty_actions_with_answer_is_an_answer(agent):
+    decision = agent.decide(json.dumps({"thought": "x", "actions": [], "answer": "yes"}))
+    assert decision.answer == "yes"
+    assert decision.actions == []
+
+
+def test_null_action_with_answer_is_an_answer(agent):
+    decision = agent.decide(json.dumps({"thought": "x", "action": None, "answer": "yes"}))
+    assert decision.answer == "yes"
+
+
+def test_no_action_and_no_answer_is_retried(agent):
+    assert agent.decide(json.dumps({"thought": "x", "actions": []})) is None
+
+
+@pytest.mark.parametrize("answer", [None, "", "  "])
+def test_null_or_blank_answer_is_retried(agent, answer):
+    assert agent.decide(json.dumps({"thought": "x", "answer": answer})) is None
+
+
+def test_null_answer_keeps_the_action(agent):
+    response = json.dumps({"thought": "x", "action": {"name": "wikipedia", "input": "Brazil"}, "answer": None})
+    assert agent.decide(response).actions == [Action(name="wikipedia", input="Brazil")]
@@ -0,0 +1,54 @@
+from src.react.batch import load_completed_ids
+from src.llm.tokens import RunUsage
+from src.react.batch import run_batch
+import src.react.batch as batch
+import json
+
+
+class GivingUpAgent:
+    """
+    Stands in for an agent that stops through give_up, e.g. while the model is unreachable.
+    """
+
+    def __init__(self):
+        self.usage = RunUsage()
+        self.answer = None
+        self.gave_up = None
+
+    def steps(self, query):
+        self.gave_up = "the language model could not be reached"
+        self.answer = f"I'm sorry, but {self.gave_up}. Here's what I know so far: user: {query}"
+        return iter([])
+
+
+class AnsweringAgent(GivingUpAgent):
+
+    def steps(self, query):
+        self.answer = "42"
+        return iter([])
+
+
+def test_only_ok_results_are_completed(tmp_path):
+    output = tmp_path / "results.jsonl"
+    lines = [{"id": "a", "status": "ok"}, {"id": "b", "status": "gave_up"}, {"id": "c", "status": "error"}]
+    output.write_text("".join(json.dumps(line) + "\n" for line in lines), encoding="utf-8")
+    assert load_completed_ids(str(output)) == {"a"}
+
+
+def test_given_up_query_is_recorded_and_retried_on_resume(tmp_path, monkeypatch):
+    input_path = tmp_path / "queries.jsonl"
+    output_path = tmp_path / "results.jsonl"
+    input_path.write_text(json.dumps({"id": "1", "query": "q"}) + "\n", encoding="utf-8")
+
+    monkeypatch.setattr(batch, "create_agent", lambda agent_cls: GivingUpAgent())
+    counts = run_batch(str(input_path), str(output_path), workers=1)
+    assert counts["gave_up"] == 1 and counts["ok"] == 0
+
+    monkeypatch.setattr(batch, "create_agent", lambda agent_cls: AnsweringAgent())
+    counts = run_batch(str(input_path), str(output_path), workers=1)
+    assert counts["ok"] == 1 and counts["skipped"] == 0
+
+    results = [json.loads(line) for line in output_path.read_text(encoding="utf-8").splitlines()]
+    assert [result["status"] for result in results] == ["gave_up", "ok"]
+    assert results[0]["error"] == "the language model could not be reached"
+    assert load_completed_ids(str(output_path)) == {"1"}
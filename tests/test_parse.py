@@ -0,0 +1,35 @@
+from src.llm.parse import parse_json
+import pytest
+import json
+
+
+def test_parses_fenced_json_with_trailing_comma():
+    value, repaired = parse_json('```json\n{"thought": "x", "answer": "ok",}\n```')
+    assert value == {"thought": "x", "answer": "ok"}
+    assert repaired
+
+
+def test_closes_object_left_open_after_complete_member():
+    value, repaired = parse_json('{"thought": "x", "answer": "The oldest tree in Brazil is about 3,000 years old."')
+    assert value == {"thought": "x", "answer": "The oldest tree in Brazil is about 3,000 years old."}
+    assert repaired
+
+
+def test_truncated_answer_is_not_accepted():
+    value, _ = parse_json('{"thought": "x", "answer": "The oldest tree in Brazil is about 3')
+    assert value == {"thought": "x"}
+
+
+def test_truncated_action_input_is_not_accepted():
+    value, _ = parse_json('{"thought": "x", "action": {"name": "wikipedia", "input": "Bra')
+    assert value == {"thought": "x"}
+
+
+def test_truncated_action_without_input_is_not_accepted():
+    value, _ = parse_json('{"thought": "x", "action": {"name": "wikipedia",')
+    assert value == {"thought": "x"}
+
+
+def test_truncated_before_any_complete_member_raises():
+    with pytest.raises(json.JSONDecodeError):
+        parse_json('{"answer": "The oldest tree in Brazil is about 3')
@@ -0,0 +1,73 @@
+from src.utils.resilience import CircuitOpenError
+from src.utils.resilience import CircuitBreaker
+from src.utils.resilience import Upstream
+import asyncio
+import pytest
+import time
+
+
+def _half_open_upstream() -> Upstream:
+    breaker = CircuitBreaker("test", failure_threshold=1, reset_timeout=0.0)
+    breaker.record_failure()
+    return Upstream("test", max_attempts=1, breaker=breaker)
+
+
+def test_cancelled_trial_releases_its_slot():
+    upstream = _half_open_upstream()
+
+    async def scenario():
+        task = asyncio.ensure_future(upstream.call_async(lambda: asyncio.sleep(10)))
+        await asyncio.sleep(0.01)
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+        return await upstream.call_async(lambda: asyncio.sleep(0, result="ok"))
+
+    assert asyncio.run(scenario()) == "ok"
+    assert upstream.breaker.state == "closed"
+
+
+def test_interrupted_blocking_trial_releases_its_slot():
+    upstream = _half_open_upstream()
+
+    def interrupted():
+        raise KeyboardInterrupt
+
+    with pytest.raises(KeyboardInterrupt):
+        upstream.call(interrupted)
+    assert upstream.call(lambda: "ok") == "ok"
+
+
+def test_half_open_admits_only_one_trial_at_a_time():
+    breaker = CircuitBreaker("test", failure_threshold=1, reset_timeout=0.0)
+    breaker.record_failure()
+    assert breaker.allow()
+    with pytest.raises(CircuitOpenError):
+        breaker.allow()
+    breaker.release()
+    assert breaker.allow()
+
+
+def test_failed_trial_reopens_the_circuit():
+    breaker = CircuitBreaker("test", failure_threshold=1, reset_timeout=60.0)
+    breaker.record_failure()
+    breaker._opened_at = time.monotonic() - 60.0
+    assert breaker.allow()
+    breaker.record_failure()
+    assert breaker.state == "open"
+
+
+def test_hedged_call_skips_a_cancelled_attempt():
+    upstream = Upstream("test", max_attempts=1, hedge_after=0.01, breaker=CircuitBreaker("test"))
+    attempts = []
+
+    async def attempt():
+        attempts.append(None)
+        if len(attempts) == 1:
+            await asyncio.sleep(0.02)
+            raise asyncio.CancelledError
+        await asyncio.sleep(0.05)
+        return "ok"
+
+    assert asyncio.run(upstream.call_async(attempt)) == "ok"
+    assert len(attempts) == 2